@@ -0,0 +1,112 @@
+"""
+Deadline-aware admission control for /decision.
+
+Every request gets a latency budget (DECISION_BUDGET_MS, or the caller's
+X-Decision-Budget-Ms header, clamped to MIN_DECISION_BUDGET_MS ..
+MAX_DECISION_BUDGET_MS) measured from the moment the ASGI server handed
+it to the app. A request is
+admitted to full model scoring only if an in-flight slot (at most
+MAX_IN_FLIGHT) frees up while there is still time left to score it, using
+an exponentially weighted estimate of recent scoring latency (capped at
+half the budget). Otherwise the caller falls back to the engine's
+rules-only degraded decision.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+MAX_IN_FLIGHT = int(os.environ.get("FRAUDSHIELD_MAX_IN_FLIGHT", "32"))
+DECISION_BUDGET_MS = float(os.environ.get("FRAUDSHIELD_DECISION_BUDGET_MS", "100"))
+MAX_DECISION_BUDGET_MS = 1000.0
+# Floor for the header: a caller cannot opt out of full scoring with 0
+MIN_DECISION_BUDGET_MS = float(os.environ.get("FRAUDSHIELD_MIN_DECISION_BUDGET_MS", "20"))
+
+BUDGET_HEADER = "x-decision-budget-ms"
+
+# Weight of the newest sample in the scoring-latency estimate
+_LATENCY_EWMA_ALPHA = 0.1
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, initial_latency_ms: float = 5.0):
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._expected_s = initial_latency_ms / 1000
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def expected_latency_ms(self) -> float:
+        return self._expected_s * 1000
+
+    @contextmanager
+    def admit(self, received_at: float, budget_ms: float) -> Iterator[Optional[str]]:
+        """
+        Try to take an in-flight slot before the request's deadline.
+
+        Yields None when admitted (the slot is held for the with-block and
+        its duration feeds the latency estimate), or the rejection reason:
+        "DEADLINE" if the budget was already spent queueing, "OVERLOAD" if
+        no slot freed up in time.
+        """
+        budget_s = budget_ms / 1000
+        # Reserve at most half the budget for scoring, so a stale, inflated
+        # estimate cannot reject everything (and never get refreshed)
+        latest_start = received_at + budget_s - min(self._expected_s, budget_s / 2)
+        wait = latest_start - time.monotonic()
+        if wait <= 0:
+            yield "DEADLINE"
+            return
+        if not self._slots.acquire(timeout=wait):
+            yield "OVERLOAD"
+            return
+
+        with self._lock:
+            self._in_flight += 1
+        start = time.monotonic()
+        try:
+            yield None
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self._in_flight -= 1
+                self._expected_s += _LATENCY_EWMA_ALPHA * (elapsed - self._expected_s)
+            self._slots.release()
+
+
+def request_budget_ms(header_value: Optional[str]) -> float:
+    """
+    Parse the caller's budget header, falling back to the default (also
+    for NaN / infinity), clamped to [MIN_DECISION_BUDGET_MS, MAX_DECISION_BUDGET_MS].
+    """
+    try:
+        budget = float(header_value) if header_value else DECISION_BUDGET_MS
+    except ValueError:
+        budget = DECISION_BUDGET_MS
+    if not math.isfinite(budget):
+        budget = DECISION_BUDGET_MS
+    return min(max(budget, MIN_DECISION_BUDGET_MS), MAX_DECISION_BUDGET_MS)
+
+
+class ReceivedAtMiddleware:
+    """
+    Pure-ASGI middleware stamping request.state.received_at (monotonic).
+
+    Runs before the request waits for a threadpool worker, so queueing
+    time counts against the budget.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["received_at"] = time.monotonic()
+        await self.app(scope, receive, send)
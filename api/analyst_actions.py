@@ -1,10 +1,211 @@
+"""
+Analyst feedback store.
+
+Keeps the newest MAX_ACTIONS analyst actions plus indexes:
+- txn_id -> latest action (O(1) lookup for /transactions rows), for the
+  MAX_LATEST_ACTIONS most recently acted-on transactions
+- txn_id -> latest verdict (latest CONFIRM_FRAUD / FALSE_POSITIVE), for
+  verdicts not exported yet
+- txn_id -> model feature vector, registered when the decision is made
+
+CONFIRM_FRAUD and FALSE_POSITIVE verdicts become training labels (1 / 0).
+export_labels() writes only the verdicts logged since the previous export
+as one chunk file under data/feedback/, and then forgets them, so label
+refresh costs time and memory proportional to new feedback.
+models/feedback_labels.py reads the chunks back for training.
+
+A verdict can only be exported with its feature vector. One without a
+vector is retried by later exports for FEATURELESS_GRACE_SECONDS (the
+decision may still be being recorded), then dropped as permanently
+featureless (unknown txn_id, or its vector was evicted) and counted in
+the feedback_labels_featureless metric.
+
+MVP ONLY: feature vectors are kept in memory for the newest
+MAX_FEATURE_ROWS decisions.
+"""
+import os
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Dict, List
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from api import metrics
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FEEDBACK_DIR = BASE_DIR / "data" / "feedback"
+
+# ESCALATE carries no label
+LABEL_FOR_ACTION = {"CONFIRM_FRAUD": 1, "FALSE_POSITIVE": 0}
+
+EXPORT_FORMATS = ("npz", "parquet")
+MAX_FEATURE_ROWS = int(os.environ.get("FRAUDSHIELD_FEEDBACK_MAX_FEATURE_ROWS", "500000"))
+MAX_ACTIONS = int(os.environ.get("FRAUDSHIELD_FEEDBACK_MAX_ACTIONS", "100000"))
+MAX_LATEST_ACTIONS = int(os.environ.get("FRAUDSHIELD_FEEDBACK_MAX_LATEST_ACTIONS", "500000"))
+FEATURELESS_GRACE_SECONDS = 60.0
+
+
+class FeedbackStore:
+    def __init__(self, export_dir: Path = FEEDBACK_DIR):
+        self.export_dir = Path(export_dir)
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+
+        self._actions: "deque[Dict]" = deque(maxlen=MAX_ACTIONS)
+        self._next_seq = 0
+        # txn_id -> latest action, least recently acted on first
+        self._latest: "OrderedDict[str, Dict]" = OrderedDict()
+        # txn_id -> latest verdict, for txn_ids in _label_log or _pending
+        self._latest_verdict: Dict[str, Dict] = {}
+        # txn_id -> feature vector, oldest registration first
+        self._features: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._columns: Optional[List[str]] = None
+
+        # txn_ids of label-bearing actions logged since the last export,
+        # in log order
+        self._label_log: List[str] = []
+        # Previously exported txn_ids whose verdicts still await a feature vector
+        self._pending: List[str] = []
+
+    # -----------------------------------------------------------------
+    # Recording
+    # -----------------------------------------------------------------
+
+    def register_transaction(self, txn_id: str, columns: Sequence[str], values: Sequence[float]):
+        """Remember (a copy of) the feature vector a decision was made on."""
+        with self._lock:
+            if self._columns is None:
+                self._columns = list(columns)
+            self._features[txn_id] = np.array(values, dtype=np.float32)
+            while len(self._features) > MAX_FEATURE_ROWS:
+                self._features.popitem(last=False)
+
+    def log_action(self, action: Dict) -> Dict:
+        with self._lock:
+            record = {
+                **action,
+                "seq": self._next_seq,
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+            self._next_seq += 1
+            self._actions.append(record)
+            self._latest[record["txn_id"]] = record
+            self._latest.move_to_end(record["txn_id"])
+            while len(self._latest) > MAX_LATEST_ACTIONS:
+                self._latest.popitem(last=False)
+            if record["action"] in LABEL_FOR_ACTION:
+                self._latest_verdict[record["txn_id"]] = record
+                self._label_log.append(record["txn_id"])
+        return record
+
+    # -----------------------------------------------------------------
+    # Lookup
+    # -----------------------------------------------------------------
+
+    def latest_action(self, txn_id: str) -> Optional[Dict]:
+        return self._latest.get(txn_id)
+
+    def feature_row(self, txn_id: str) -> Optional[np.ndarray]:
+        """The feature vector the transaction was decided on, if registered."""
+        return self._features.get(txn_id)
+
+    def actions(self) -> List[Dict]:
+        return list(self._actions)
+
+    # -----------------------------------------------------------------
+    # Label export
+    # -----------------------------------------------------------------
+
+    def export_labels(self, fmt: str = "npz") -> Dict:
+        """
+        Write labels for verdicts logged since the last export.
+
+        Each transaction appears once per chunk with its latest verdict;
+        readers resolve verdicts that change across chunks by chunk order.
+
+        Args:
+            fmt: "npz" (NumPy, always available) or "parquet" (needs pyarrow)
+
+        Returns:
+            dict with the chunk path (None if nothing new), row count, and
+            the number of verdicts dropped as permanently featureless.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        # One export at a time so chunks never overlap
+        with self._export_lock:
+            return self._export_new_verdicts(fmt)
+
+    def _export_new_verdicts(self, fmt: str) -> Dict:
+        now = datetime.utcnow()
+        with self._lock:
+            n_logged = len(self._label_log)
+            candidates = self._pending + self._label_log
+
+            txn_ids: List[str] = []
+            pending: List[str] = []
+            featureless = 0
+            seen = set()
+            for txn_id in reversed(candidates):
+                if txn_id in seen:
+                    continue
+                seen.add(txn_id)
+                if txn_id in self._features:
+                    txn_ids.append(txn_id)
+                elif _age_seconds(self._latest_verdict[txn_id], now) < FEATURELESS_GRACE_SECONDS:
+                    pending.append(txn_id)
+                else:
+                    featureless += 1
+            txn_ids.reverse()
+            pending.reverse()
+
+            X = np.array([self._features[t] for t in txn_ids], dtype=np.float32)
+            y = np.array(
+                [LABEL_FOR_ACTION[self._latest_verdict[t]["action"]] for t in txn_ids],
+                dtype=np.int8,
+            )
+            seq = np.array([self._latest_verdict[t]["seq"] for t in txn_ids], dtype=np.int64)
+            columns = list(self._columns or [])
+
+        path = None
+        if txn_ids:
+            self.export_dir.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+            path = self.export_dir / f"labels_{stamp}.{fmt}"
+            if fmt == "parquet":
+                frame = pd.DataFrame(X, columns=columns)
+                frame["label"] = y
+                frame["txn_id"] = txn_ids
+                frame["seq"] = seq
+                frame.to_parquet(path, index=False)
+            else:
+                np.savez(
+                    path, X=X, y=y, seq=seq,
+                    txn_id=np.array(txn_ids), columns=np.array(columns),
+                )
+
+        # Only once the chunk is written: a failed export is retried whole.
+        # Verdicts logged meanwhile stay in the log for the next export
+        with self._lock:
+            del self._label_log[:n_logged]
+            self._pending = pending
+            keep = set(pending).union(self._label_log)
+            for txn_id in seen - keep:
+                del self._latest_verdict[txn_id]
+        if featureless:
+            metrics.increment("feedback_labels_featureless", featureless)
+        return {"path": str(path) if path else None, "rows": len(txn_ids), "featureless": featureless}
+
+
+def _age_seconds(record: Dict, now: datetime) -> float:
+    return (now - datetime.fromisoformat(record["timestamp"])).total_seconds()
+
+
+FEEDBACK_STORE = FeedbackStore()
 
-ANALYST_ACTIONS: List[Dict] = []
 
-def log_action(action: Dict):
-    ANALYST_ACTIONS.append({
-        **action,
-        "timestamp": datetime.utcnow().isoformat()
-    })
+def log_action(action: Dict) -> Dict:
+    return FEEDBACK_STORE.log_action(action)
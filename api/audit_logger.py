@@ -2,58 +2,59 @@
 """
 Audit logging for fraud decision system.
 
-Records decision events to a JSONL file with hashed features for compliance
-and audit trail purposes.
+Records decision events with hashed features for compliance and audit
+trail purposes. Records are hash-chained and stored in hourly segments
+under logs/audit/ (see api/audit_store.py for compaction and queries).
 """
 import hashlib
-import json
-from datetime import datetime, timezone
-from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Optional, Union
 
+import numpy as np
 import pandas as pd
 
+from api.audit_store import AUDIT_STORE
+
+
+def compute_feature_hash(feature_values: Iterable[Any]) -> str:
+    """SHA256 of the comma-joined feature values (the audit trail's feature hash)."""
+    feature_str = ",".join(str(v) for v in feature_values)
+    return hashlib.sha256(feature_str.encode()).hexdigest()
+
 
 def log_decision(
     decision: str,
     risk_score: float,
-    anomaly_score: float,
+    anomaly_score: Optional[float],
     reason_code: str,
-    feature_row: pd.DataFrame,
+    feature_row: Union[pd.DataFrame, np.ndarray],
     model_versions: Dict[str, str],
-) -> None:
+    txn_id: str = "",
+) -> Dict[str, Any]:
     """
     Log a fraud decision to the audit trail.
 
     Args:
         decision: Decision outcome ("ALLOW", "SOFT_BLOCK", "HARD_BLOCK")
         risk_score: Fraud probability from 0.0 to 1.0
-        anomaly_score: Anomaly score from IsolationForest
+        anomaly_score: Anomaly score from IsolationForest (None if the
+            decision was made without it, on the fast path or degraded)
         reason_code: Descriptive reason for decision
-        feature_row: Single-row DataFrame with transaction features
+        feature_row: Single feature row (DataFrame or NumPy array)
         model_versions: Dictionary with model version information
-    """
-    # Ensure logs directory exists
-    logs_dir = Path(__file__).parent.parent / "logs"
-    logs_dir.mkdir(exist_ok=True)
+        txn_id: Transaction ID the decision was returned under
 
+    Returns:
+        The chained audit record (with prev_hash / record_hash).
+    """
     # Create feature hash (SHA256 of serialized feature values)
-    feature_values = feature_row.values.flatten()
-    feature_str = ",".join(str(v) for v in feature_values)
-    feature_hash = hashlib.sha256(feature_str.encode()).hexdigest()
-
-    # Create audit record
-    audit_record = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "decision": decision,
-        "risk_score": float(risk_score),
-        "anomaly_score": float(anomaly_score),
-        "reason_code": reason_code,
-        "feature_hash": feature_hash,
-        "model_versions": model_versions,
-    }
-
-    # Append to JSONL file (one JSON record per line)
-    audit_log_path = logs_dir / "audit_log.jsonl"
-    with open(audit_log_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(audit_record) + "\n")
\ No newline at end of file
+    feature_hash = compute_feature_hash(np.asarray(feature_row).flatten())
+
+    return AUDIT_STORE.append(
+        txn_id=txn_id,
+        decision=decision,
+        risk_score=risk_score,
+        anomaly_score=anomaly_score,
+        reason_code=reason_code,
+        feature_hash=feature_hash,
+        model_versions=model_versions,
+    )
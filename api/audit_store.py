@@ -0,0 +1,556 @@
+"""
+Segmented, hash-chained audit store.
+
+Layout under logs/audit/ (sharded workers each keep their own chain
+under logs/audit/worker-<n>/, see api/sharding.py):
+- segments/<YYYYMMDDTHH>.jsonl   hot, append-only hourly segments (UTC)
+- compacted/<YYYYMMDDTHH>.npz    closed segments converted to columns
+- manifest.json                  per compacted segment: min/max timestamp,
+                                 row count, decision counts, model versions
+                                 and the chain hashes at both ends
+
+anomaly_score is null on records of fast-path and degraded decisions
+(the anomaly model was not run); compacted segments store it as NaN.
+
+Integrity: every record carries prev_hash (the previous record's hash, or
+GENESIS_HASH) and record_hash = SHA256 over its canonical JSON, chaining
+all records across segments. Compaction stores every chained field
+losslessly (decision, reason_code and model_versions dictionary-encoded),
+so verify() recomputes the same chain from hot and compacted segments.
+
+Queries prune segments by time range, decision and model version using the
+manifest (hot segments by the hour in their name), then filter the
+surviving segments' columns with vectorized NumPy masks.
+
+One writer per directory: the chain tail lives in the writing process,
+so two processes appending to the same directory would interleave two
+chains. The writer holds an exclusive lock on <root>/writer.lock from
+start() (or its first append), and a second process fails to start with
+RuntimeError; run several scoring processes through api.dispatcher,
+whose workers each write their own directory.
+"""
+import fcntl
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from api import metrics
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+AUDIT_DIR = BASE_DIR / "logs" / "audit"
+WRITER_LOCK_NAME = "writer.lock"
+
+GENESIS_HASH = "0" * 64
+SEGMENT_US = 3600 * 1_000_000
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Fields covered by record_hash, in the order records are stored
+CHAINED_FIELDS = (
+    "ts_us",
+    "txn_id",
+    "decision",
+    "risk_score",
+    "anomaly_score",
+    "reason_code",
+    "feature_hash",
+    "model_versions",
+    "prev_hash",
+)
+# Low-cardinality columns stored as codes + vocabulary once compacted
+DICTIONARY_COLUMNS = ("decision", "reason_code", "model_versions")
+
+Timestamp = Union[datetime, str, int]
+
+
+def compute_record_hash(record: Dict[str, Any]) -> str:
+    canonical = json.dumps(
+        {field: record[field] for field in CHAINED_FIELDS},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _segment_name(ts_us: int) -> str:
+    return (_EPOCH + timedelta(microseconds=ts_us - ts_us % SEGMENT_US)).strftime("%Y%m%dT%H")
+
+
+def _segment_start_us(name: str) -> int:
+    start = datetime.strptime(name, "%Y%m%dT%H").replace(tzinfo=timezone.utc)
+    return (start - _EPOCH) // timedelta(microseconds=1)
+
+
+def _to_us(value: Timestamp) -> int:
+    """Epoch microseconds from an int, an ISO string or a datetime (naive = UTC)."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _iso(ts_us: int) -> str:
+    return (_EPOCH + timedelta(microseconds=int(ts_us))).isoformat()
+
+
+def _optional_float(value: float) -> Optional[float]:
+    """A stored anomaly_score: NaN in compacted columns means null."""
+    return None if np.isnan(value) else float(value)
+
+
+def _canonical_versions(model_versions: Dict[str, str]) -> str:
+    return json.dumps(model_versions, sort_keys=True, separators=(",", ":"))
+
+
+# ---------------------------------------------------------------------
+# Columnar segments
+# ---------------------------------------------------------------------
+
+def records_to_columns(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Convert chained records to the compacted column layout."""
+    columns = {
+        "ts_us": np.array([r["ts_us"] for r in records], dtype=np.int64),
+        "txn_id": np.array([r["txn_id"] for r in records], dtype=str),
+        "risk_score": np.array([r["risk_score"] for r in records], dtype=np.float64),
+        "anomaly_score": np.array(
+            [np.nan if r["anomaly_score"] is None else r["anomaly_score"] for r in records],
+            dtype=np.float64,
+        ),
+        "feature_hash": np.array([r["feature_hash"] for r in records], dtype="S64"),
+        "prev_hash": np.array([r["prev_hash"] for r in records], dtype="S64"),
+        "record_hash": np.array([r["record_hash"] for r in records], dtype="S64"),
+    }
+    for name in DICTIONARY_COLUMNS:
+        values = [
+            _canonical_versions(r[name]) if name == "model_versions" else r[name]
+            for r in records
+        ]
+        vocab, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+        columns[f"{name}_vocab"] = vocab
+        columns[f"{name}_codes"] = codes.astype(np.uint16)
+    return columns
+
+
+def _column_values(columns: Dict[str, np.ndarray], name: str, mask=slice(None)) -> np.ndarray:
+    if name in DICTIONARY_COLUMNS:
+        return columns[f"{name}_vocab"][columns[f"{name}_codes"][mask]]
+    values = columns[name][mask]
+    return values.astype(str) if values.dtype.kind == "S" else values
+
+
+def _iter_records(columns: Dict[str, np.ndarray]) -> Iterator[Dict[str, Any]]:
+    """Rebuild the chained records of a compacted segment, in order."""
+    decoded = {
+        name: _column_values(columns, name)
+        for name in CHAINED_FIELDS + ("record_hash",)
+    }
+    versions = [json.loads(v) for v in columns["model_versions_vocab"]]
+    for i in range(len(columns["ts_us"])):
+        yield {
+            "ts_us": int(decoded["ts_us"][i]),
+            "txn_id": str(decoded["txn_id"][i]),
+            "decision": str(decoded["decision"][i]),
+            "risk_score": float(decoded["risk_score"][i]),
+            "anomaly_score": _optional_float(decoded["anomaly_score"][i]),
+            "reason_code": str(decoded["reason_code"][i]),
+            "feature_hash": str(decoded["feature_hash"][i]),
+            "model_versions": versions[columns["model_versions_codes"][i]],
+            "prev_hash": str(decoded["prev_hash"][i]),
+            "record_hash": str(decoded["record_hash"][i]),
+        }
+
+
+class AuditStore:
+    def __init__(self, root: Path = AUDIT_DIR, compact_interval_seconds: int = 300):
+        self.compact_interval_seconds = compact_interval_seconds
+
+        # _lock orders appends (and so the chain); _segments_lock keeps
+        # queries from seeing a segment mid-swap from hot to compacted
+        self._lock = threading.Lock()
+        self._segments_lock = threading.Lock()
+
+        self._file = None
+        self._file_segment: Optional[str] = None
+        # Open file holding the writer lock on root, once claimed
+        self._writer_lock = None
+        self._thread: Optional[threading.Thread] = None
+        self._open(root)
+
+    def reopen(self, root: Path) -> None:
+        """
+        Continue the chain stored under another directory (e.g. a sharded
+        worker's own, see api/sharding.py). Call before serving traffic.
+        """
+        self.close()
+        with self._lock, self._segments_lock:
+            if self._writer_lock is not None:
+                self._writer_lock.close()
+                self._writer_lock = None
+            self._open(root)
+
+    def _open(self, root: Path) -> None:
+        self.root = Path(root)
+        self.segments_dir = self.root / "segments"
+        self.compacted_dir = self.root / "compacted"
+        self.manifest_path = self.root / "manifest.json"
+        self._manifest: List[Dict[str, Any]] = self._load_manifest()
+        self._last_hash, self._last_ts_us = self._recover_chain_tail()
+
+    def _claim(self) -> None:
+        """
+        Become the directory's only writer (caller holds _lock).
+        Raises RuntimeError if another process is writing to it.
+        """
+        if self._writer_lock is not None:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.root / WRITER_LOCK_NAME, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise RuntimeError(
+                f"Another process is writing the audit chain in {self.root}; run one "
+                "writer per directory (use api.dispatcher for several scoring processes)"
+            )
+        self._writer_lock = lock_file
+        # The previous writer may have appended or compacted since _open()
+        with self._segments_lock:
+            self._manifest = self._load_manifest()
+            self._last_hash, self._last_ts_us = self._recover_chain_tail()
+
+    # -----------------------------------------------------------------
+    # Request path
+    # -----------------------------------------------------------------
+
+    def append(
+        self,
+        txn_id: str,
+        decision: str,
+        risk_score: float,
+        anomaly_score: Optional[float],
+        reason_code: str,
+        feature_hash: str,
+        model_versions: Dict[str, str],
+    ) -> Dict[str, Any]:
+        """Append one decision to the current hourly segment and return the record."""
+        with self._lock:
+            self._claim()
+            # Timestamps never go backwards along the chain
+            ts_us = max(time.time_ns() // 1000, self._last_ts_us)
+            record = {
+                "ts_us": ts_us,
+                "txn_id": txn_id,
+                "decision": decision,
+                "risk_score": float(risk_score),
+                "anomaly_score": None if anomaly_score is None else float(anomaly_score),
+                "reason_code": reason_code,
+                "feature_hash": feature_hash,
+                "model_versions": dict(model_versions),
+                "prev_hash": self._last_hash,
+            }
+            record["record_hash"] = compute_record_hash(record)
+            record["timestamp"] = _iso(ts_us)
+
+            segment = _segment_name(ts_us)
+            if segment != self._file_segment:
+                if self._file is not None:
+                    self._file.close()
+                self.segments_dir.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.segments_dir / f"{segment}.jsonl", "a", encoding="utf-8")
+                self._file_segment = segment
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+            self._last_hash = record["record_hash"]
+            self._last_ts_us = ts_us
+        return record
+
+    def close(self) -> None:
+        """Close the open hot segment (the next append reopens it)."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self._file = None
+            self._file_segment = None
+
+    # -----------------------------------------------------------------
+    # Compaction
+    # -----------------------------------------------------------------
+
+    def compact(self) -> int:
+        """
+        Convert closed hot segments (older than the current hour and not
+        open for writing) to compacted columnar segments.
+
+        Returns:
+            number of segments compacted.
+        """
+        with self._lock:
+            open_segment = self._file_segment
+        current = _segment_name(time.time_ns() // 1000)
+        compacted_names = {entry["name"] for entry in self._manifest}
+
+        done = 0
+        for name in self._hot_segments():
+            if name >= current or name == open_segment:
+                continue
+            path = self.segments_dir / f"{name}.jsonl"
+            if name in compacted_names:
+                # Crashed after the manifest update, before the unlink
+                path.unlink(missing_ok=True)
+                continue
+
+            records = list(self._read_hot(name))
+            if not records:
+                path.unlink(missing_ok=True)
+                continue
+            columns = records_to_columns(records)
+
+            self.compacted_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.compacted_dir / f"{name}.tmp.npz"
+            np.savez(tmp_path, **columns)
+            tmp_path.replace(self.compacted_dir / f"{name}.npz")
+
+            decisions, counts = np.unique(_column_values(columns, "decision"), return_counts=True)
+            entry = {
+                "name": name,
+                "rows": len(records),
+                "min_ts_us": int(columns["ts_us"].min()),
+                "max_ts_us": int(columns["ts_us"].max()),
+                "decisions": {str(d): int(c) for d, c in zip(decisions, counts)},
+                "model_versions": [json.loads(v) for v in columns["model_versions_vocab"]],
+                "first_prev_hash": records[0]["prev_hash"],
+                "last_hash": records[-1]["record_hash"],
+            }
+            with self._segments_lock:
+                self._manifest = sorted(self._manifest + [entry], key=lambda e: e["name"])
+                self._save_manifest()
+                path.unlink()
+            done += 1
+        return done
+
+    def start(self) -> None:
+        """
+        Claim the directory's writer lock (RuntimeError if another process
+        holds it), then start the daemon thread that compacts closed
+        segments periodically.
+        """
+        with self._lock:
+            self._claim()
+        if self._thread is not None:
+            return
+
+        def _loop():
+            while True:
+                time.sleep(self.compact_interval_seconds)
+                try:
+                    self.compact()
+                except Exception:
+                    metrics.increment("audit_compaction_errors")
+
+        self._thread = threading.Thread(target=_loop, name="audit-compaction", daemon=True)
+        self._thread.start()
+
+    # -----------------------------------------------------------------
+    # Queries
+    # -----------------------------------------------------------------
+
+    def query(
+        self,
+        start: Optional[Timestamp] = None,
+        end: Optional[Timestamp] = None,
+        decision: Optional[str] = None,
+        reason_code: Optional[str] = None,
+        model_version: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Audit records with start <= timestamp < end matching every filter
+        given, oldest first.
+
+        Args:
+            start, end: datetimes (naive = UTC), ISO strings or epoch microseconds
+            decision: e.g. "HARD_BLOCK"
+            reason_code: exact reason code
+            model_version: matches records where any model's version equals it
+        """
+        start_us = _to_us(start) if start is not None else None
+        end_us = _to_us(end) if end is not None else None
+        filters = {"decision": decision, "reason_code": reason_code}
+
+        frames = []
+        with self._segments_lock:
+            for columns in self._candidate_segments(start_us, end_us, decision, model_version):
+                mask = np.ones(len(columns["ts_us"]), dtype=bool)
+                if start_us is not None:
+                    mask &= columns["ts_us"] >= start_us
+                if end_us is not None:
+                    mask &= columns["ts_us"] < end_us
+                for name, value in filters.items():
+                    if value is not None:
+                        codes = np.flatnonzero(columns[f"{name}_vocab"] == value)
+                        mask &= np.isin(columns[f"{name}_codes"], codes)
+                if model_version is not None:
+                    codes = [
+                        i for i, v in enumerate(columns["model_versions_vocab"])
+                        if model_version in json.loads(v).values()
+                    ]
+                    mask &= np.isin(columns["model_versions_codes"], codes)
+                if mask.any():
+                    frames.append(self._frame(columns, mask))
+
+        if not frames:
+            return pd.DataFrame(columns=["timestamp", *CHAINED_FIELDS, "record_hash"])
+        return pd.concat(frames, ignore_index=True)
+
+    def _candidate_segments(
+        self,
+        start_us: Optional[int],
+        end_us: Optional[int],
+        decision: Optional[str],
+        model_version: Optional[str],
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """Columns of every segment the filters cannot rule out, oldest first."""
+        for entry in self._manifest:
+            if start_us is not None and entry["max_ts_us"] < start_us:
+                continue
+            if end_us is not None and entry["min_ts_us"] >= end_us:
+                continue
+            if decision is not None and decision not in entry["decisions"]:
+                continue
+            if model_version is not None and not any(
+                model_version in versions.values() for versions in entry["model_versions"]
+            ):
+                continue
+            with np.load(self.compacted_dir / f"{entry['name']}.npz") as segment:
+                yield {name: segment[name] for name in segment.files}
+
+        compacted_names = {entry["name"] for entry in self._manifest}
+        for name in self._hot_segments():
+            if name in compacted_names:
+                continue
+            segment_start = _segment_start_us(name)
+            if start_us is not None and segment_start + SEGMENT_US <= start_us:
+                continue
+            if end_us is not None and segment_start >= end_us:
+                continue
+            records = list(self._read_hot(name))
+            if records:
+                yield records_to_columns(records)
+
+    @staticmethod
+    def _frame(columns: Dict[str, np.ndarray], mask: np.ndarray) -> pd.DataFrame:
+        frame = pd.DataFrame({
+            name: _column_values(columns, name, mask)
+            for name in CHAINED_FIELDS + ("record_hash",)
+        })
+        frame["model_versions"] = frame["model_versions"].map(json.loads)
+        scores = frame["anomaly_score"]
+        frame["anomaly_score"] = scores.astype(object).where(scores.notna(), None)
+        frame.insert(0, "timestamp", [_iso(ts) for ts in frame["ts_us"]])
+        return frame
+
+    # -----------------------------------------------------------------
+    # Integrity
+    # -----------------------------------------------------------------
+
+    def verify(self) -> Dict[str, Any]:
+        """
+        Recompute the hash chain over every segment, oldest first.
+
+        Returns:
+            {"ok", "records", "segments", "error"} where error names the
+            first segment/row that breaks the chain (None if intact).
+        """
+        expected_prev = GENESIS_HASH
+        n_records = 0
+        n_segments = 0
+
+        with self._segments_lock:
+            for name, records in self._iter_segments():
+                n_segments += 1
+                for row, record in enumerate(records):
+                    reason = None
+                    if record["prev_hash"] != expected_prev:
+                        reason = "prev_hash does not match the previous record"
+                    elif compute_record_hash(record) != record["record_hash"]:
+                        reason = "record_hash does not match the record"
+                    if reason is not None:
+                        return {
+                            "ok": False,
+                            "records": n_records,
+                            "segments": n_segments,
+                            "error": {"segment": name, "row": row, "reason": reason},
+                        }
+                    expected_prev = record["record_hash"]
+                    n_records += 1
+
+        return {"ok": True, "records": n_records, "segments": n_segments, "error": None}
+
+    def _iter_segments(self) -> Iterator[Tuple[str, Iterator[Dict[str, Any]]]]:
+        compacted_names = {entry["name"] for entry in self._manifest}
+        names = sorted(
+            [(entry["name"], True) for entry in self._manifest]
+            + [(name, False) for name in self._hot_segments() if name not in compacted_names]
+        )
+        for name, is_compacted in names:
+            if is_compacted:
+                with np.load(self.compacted_dir / f"{name}.npz") as segment:
+                    columns = {key: segment[key] for key in segment.files}
+                yield name, _iter_records(columns)
+            else:
+                yield name, self._read_hot(name)
+
+    # -----------------------------------------------------------------
+    # Storage helpers
+    # -----------------------------------------------------------------
+
+    def _hot_segments(self) -> List[str]:
+        return sorted(p.stem for p in self.segments_dir.glob("*.jsonl"))
+
+    def _read_hot(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Records of a hot segment, without a last line still being written."""
+        with open(self.segments_dir / f"{name}.jsonl", "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                if line.strip():
+                    yield json.loads(line)
+
+    def _load_manifest(self) -> List[Dict[str, Any]]:
+        if not self.manifest_path.exists():
+            return []
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)["segments"]
+
+    def _save_manifest(self) -> None:
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"segments": self._manifest}, f, indent=2)
+        tmp_path.replace(self.manifest_path)
+
+    def _recover_chain_tail(self) -> Tuple[str, int]:
+        """(last record_hash, last ts_us) so a restarted writer continues the chain."""
+        compacted_names = {entry["name"] for entry in self._manifest}
+        hot = [name for name in self._hot_segments() if name not in compacted_names]
+        if hot:
+            last = None
+            for record in self._read_hot(hot[-1]):
+                last = record
+            if last is not None:
+                return last["record_hash"], last["ts_us"]
+        if self._manifest:
+            return self._manifest[-1]["last_hash"], self._manifest[-1]["max_ts_us"]
+        return GENESIS_HASH, 0
+
+
+AUDIT_STORE = AuditStore()
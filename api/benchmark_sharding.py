@@ -0,0 +1,123 @@
+"""
+Benchmark decision throughput of the sharded worker pool (api/sharding.py)
+at 1, 2, 4 and 8 workers.
+
+Drives the pool directly, without HTTP, so the numbers reflect dispatch
+and scoring rather than the web server. A closed loop of client threads
+(--concurrency per worker) sends decisions for --users synthetic users,
+with a latency budget large enough that no decision is degraded.
+Reported per pool size:
+- decisions/s, and speedup / parallel efficiency vs 1 worker
+- p50 / p99 end-to-end latency, milliseconds
+- fraction of users served by the busiest worker (shard balance)
+
+Scaling is bounded by the number of cores (printed first).
+
+Run from the repo root:
+    python -m api.benchmark_sharding [--workers 1 2 4 8] [--seconds 10]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+
+from api.sharding import WorkerPool, routing_key
+
+BUDGET_MS = 60_000
+
+
+def synthetic_payload(rng: random.Random, user: int) -> Dict:
+    fraud = rng.random() < 0.08
+    return {
+        "amount": rng.randint(8000, 30000) if fraud else rng.randint(100, 5000),
+        "txn_hour": rng.choice([0, 1, 2, 3, 23]) if fraud else rng.randint(8, 22),
+        "is_qr": int(fraud),
+        "beneficiary_age_min": rng.randint(1, 10) if fraud else rng.randint(1440, 100000),
+        "device_changed": int(fraud),
+        "location_velocity": int(fraud),
+        "failed_auth_24h": rng.randint(2, 5) if fraud else rng.randint(0, 1),
+        "user_id": f"user_{user}",
+    }
+
+
+def run(n_workers: int, users: int, seconds: float, concurrency: int) -> Dict:
+    with tempfile.TemporaryDirectory() as audit_root, tempfile.TemporaryDirectory() as velocity_root:
+        pool = WorkerPool(n_workers, audit_root=audit_root, velocity_root=velocity_root)
+        pool.start()
+        try:
+            # Warm up every worker (imports, first model calls)
+            for shard in range(n_workers):
+                pool.call(shard, "metrics").result()
+
+            latencies: List[List[float]] = []
+            deadline = time.monotonic() + seconds
+
+            def client(seed: int):
+                rng = random.Random(seed)
+                mine = []
+                while time.monotonic() < deadline:
+                    payload = synthetic_payload(rng, rng.randrange(users))
+                    shard = pool.shard_for(routing_key(payload["user_id"], ""))
+                    t0 = time.monotonic()
+                    pool.call(
+                        shard, "decision", payload=payload, received_at=t0, budget_ms=BUDGET_MS
+                    ).result()
+                    mine.append(time.monotonic() - t0)
+                latencies.append(mine)
+
+            threads = [
+                threading.Thread(target=client, args=(seed,))
+                for seed in range(concurrency * n_workers)
+            ]
+            start = time.monotonic()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - start
+        finally:
+            pool.stop()
+
+    latencies_ms = np.concatenate([np.asarray(l) for l in latencies]) * 1000
+    load = Counter(pool.shard_for(routing_key(f"user_{u}", "")) for u in range(users))
+    return {
+        "decisions_per_s": len(latencies_ms) / elapsed,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_shard_share": max(load.values()) / users,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark api/sharding.py")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=4, help="client threads per worker")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU cores, {args.users:,} users, {args.seconds:.0f} s per run\n")
+    header = f"{'workers':>7} {'decisions/s':>12} {'speedup':>8} {'efficiency':>10} {'p50 ms':>8} {'p99 ms':>8} {'max shard':>9}"
+    print(header)
+    print("-" * len(header))
+
+    baseline = None
+    for n_workers in args.workers:
+        result = run(n_workers, args.users, args.seconds, args.concurrency)
+        baseline = baseline or result["decisions_per_s"]
+        speedup = result["decisions_per_s"] / baseline
+        print(
+            f"{n_workers:>7} {result['decisions_per_s']:>12,.0f} {speedup:>8.2f} "
+            f"{speedup / n_workers:>10.0%} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+            f"{result['max_shard_share']:>9.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,18 +5,36 @@ Loads pre-trained RandomForest and IsolationForest models and applies
 explicit decision rules to classify transactions as:
 ALLOW, SOFT_BLOCK, or HARD_BLOCK.
 
+Decisions run as a two-stage cascade: a shallow fast-path model (trained
+alongside the RandomForest, see models/train_supervised.py) returns ALLOW
+for clearly benign rows, and only the remaining rows are scored by the
+full RandomForest + IsolationForest ensemble.
+
+Feature rows are float32 NumPy arrays in models.feature_spec.FEATURE_SPEC
+column order (the same order training uses); DataFrames are still accepted
+and reordered through the spec.
+
 This module is:
 - Deterministic
 - Stateless
 - Safe to call in real-time
 """
 
+import hashlib
+import os
 from pathlib import Path
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 import joblib
+import numpy as np
 import pandas as pd
 
+from api import metrics
+from models.attributions import ForestAttributor
+from models.feature_spec import FEATURE_SPEC
+
+FeatureRows = Union[np.ndarray, pd.DataFrame]
+
 
 # ---------------------------------------------------------------------
 # Model loading (done once at module import)
@@ -24,88 +42,327 @@ import pandas as pd
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-_FRAUD_MODEL_PATH = BASE_DIR / "models" / "fraud_model.pkl"
+# Set FRAUDSHIELD_FRAUD_MODEL=fraud_model_compact.pkl to serve the compacted
+# artifact produced by models/compact_model.py
+_FRAUD_MODEL_PATH = BASE_DIR / "models" / os.environ.get(
+    "FRAUDSHIELD_FRAUD_MODEL", "fraud_model.pkl"
+)
 _ANOMALY_MODEL_PATH = BASE_DIR / "models" / "anomaly_model.pkl"
 
+_FAST_PATH_MODEL_PATH = BASE_DIR / "models" / "fast_path_model.pkl"
+
 _fraud_model = joblib.load(_FRAUD_MODEL_PATH)
 _anomaly_model = joblib.load(_ANOMALY_MODEL_PATH)
 
+# Optional cascade stage 1: {"model", "allow_threshold"} (see
+# models/train_supervised.train_fast_path)
+_fast_path: Optional[Dict[str, Any]] = (
+    joblib.load(_FAST_PATH_MODEL_PATH) if _FAST_PATH_MODEL_PATH.exists() else None
+)
+
+
+def _artifact_version(path: Path) -> str:
+    """<file name>@<first 12 hex chars of its SHA256>, recorded in the audit trail."""
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+    return f"{path.name}@{digest}"
+
+
+MODEL_VERSIONS: Dict[str, str] = {
+    "fraud_model": _artifact_version(_FRAUD_MODEL_PATH),
+    "anomaly_model": _artifact_version(_ANOMALY_MODEL_PATH),
+}
+if _fast_path is not None:
+    MODEL_VERSIONS["fast_path_model"] = _artifact_version(_FAST_PATH_MODEL_PATH)
+
+
+def _check_feature_order(model, name: str) -> None:
+    """Fail fast if a model was trained on a different column order."""
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        return
+    if tuple(names) != FEATURE_SPEC.columns:
+        raise ValueError(
+            f"{name} was trained on columns {list(names)}, "
+            f"expected FEATURE_SPEC order {list(FEATURE_SPEC.columns)}"
+        )
+    # Rows are served as NumPy arrays in spec order; drop the names so
+    # sklearn does not warn about missing feature names on every call.
+    del model.feature_names_in_
+
+
+_check_feature_order(_fraud_model, "fraud model")
+_check_feature_order(_anomaly_model, "anomaly model")
+
+# Per-node path contributions of the fraud model, precomputed once
+_attributor = ForestAttributor.from_model(_fraud_model)
+
+# Set FRAUDSHIELD_FAST_PATH=0 to always run the full ensemble
+FAST_PATH_ENABLED = os.environ.get("FRAUDSHIELD_FAST_PATH", "1") != "0"
+
+
+# ---------------------------------------------------------------------
+# Decision thresholds (MVP – intentionally simple)
+# Tune with: python -m models.backtest_thresholds
+# ---------------------------------------------------------------------
+
+HIGH_FRAUD_THRESHOLD = 0.7
+SOFT_FRAUD_THRESHOLD = 0.5
+
+HIGH_ANOMALY_THRESHOLD = -0.15
+SOFT_ANOMALY_THRESHOLD = -0.10
+
+# Rules-only (degraded) mode: failed authentications that count as a signal
+DEGRADED_FAILED_AUTH_THRESHOLD = 2
+
 
 # ---------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------
 
-def make_decision(feature_row: pd.DataFrame) -> Dict[str, Any]:
+def make_decision(feature_row: FeatureRows) -> Dict[str, Any]:
     """
     Make a fraud decision for a single transaction.
 
     Args:
         feature_row:
-            Single-row pandas DataFrame with numeric features.
-            Must include:
-            - is_qr
-            - beneficiary_is_new
+            Single row of model features: a (1, n_features) float32 array in
+            FEATURE_SPEC order (see FEATURE_SPEC.fill_row), or a single-row
+            pandas DataFrame with the FEATURE_SPEC columns.
 
     Returns:
         dict with:
         - decision: "ALLOW" | "SOFT_BLOCK" | "HARD_BLOCK"
         - risk_score: float (0.0 – 1.0)
-        - anomaly_score: float (lower = more anomalous)
+        - anomaly_score: float (lower = more anomalous), or None on the
+          fast path, where the anomaly model is not run
         - reason_code: str
+        - stage: "FAST_PATH" | "FULL"
+        - degraded: False (see make_rules_only_decision)
     """
 
     # ----------------------------
     # Defensive checks
     # ----------------------------
-    if not isinstance(feature_row, pd.DataFrame):
-        raise ValueError("feature_row must be a pandas DataFrame")
+    X = _as_matrix(feature_row)
 
-    if feature_row.shape[0] != 1:
+    if X.shape[0] != 1:
         raise ValueError("feature_row must contain exactly one row")
 
-    # IMPORTANT:
-    # Always pass a DataFrame (not .values) to avoid sklearn warnings
-    X = feature_row.copy()
+    return make_decisions(X)[0]
 
-    # ----------------------------
-    # Fraud probability
-    # ----------------------------
-    if hasattr(_fraud_model, "predict_proba"):
-        fraud_probability = float(_fraud_model.predict_proba(X)[0, 1])
-    else:
-        # Fallback (should not happen in our setup)
-        fraud_probability = float(_fraud_model.predict(X)[0])
 
-    # ----------------------------
-    # Anomaly score
-    # (lower = more suspicious)
-    # ----------------------------
-    anomaly_score = float(_anomaly_model.decision_function(X)[0])
+def make_decisions(
+    features: FeatureRows,
+    use_fast_path: bool = FAST_PATH_ENABLED,
+) -> List[Dict[str, Any]]:
+    """
+    Make fraud decisions for a batch of transactions through the cascade.
+
+    Rows the fast-path model scores below its allow threshold are returned
+    as ALLOW with stage "FAST_PATH" (risk_score is the fast-path model's
+    probability and anomaly_score is None); every other row is scored by
+    the full ensemble in a single vectorized call and run through the
+    decision rules.
+
+    Args:
+        features:
+            (n, n_features) array in FEATURE_SPEC order, or a DataFrame
+            with the FEATURE_SPEC columns.
+        use_fast_path:
+            Set False to score every row with the full ensemble.
+
+    Returns:
+        list of decision dicts (same keys as make_decision), in row order.
+    """
+    features = _as_matrix(features)
+    n_rows = len(features)
+    decisions: List[Optional[Dict[str, Any]]] = [None] * n_rows
+    full_rows = np.arange(n_rows)
 
     # ----------------------------
-    # Extract rule features
+    # Stage 1: fast path
     # ----------------------------
-    is_qr = int(feature_row["is_qr"].iloc[0])
-    beneficiary_is_new = int(feature_row["beneficiary_is_new"].iloc[0])
+    # A zero threshold short-circuits nothing: skip the extra model call
+    if use_fast_path and _fast_path is not None and _fast_path["allow_threshold"] > 0 and n_rows:
+        fast_proba = _fast_path["model"].predict_proba(features)[:, 1]
+        benign = fast_proba < _fast_path["allow_threshold"]
+        for i in np.flatnonzero(benign):
+            decisions[i] = {
+                "decision": "ALLOW",
+                "risk_score": float(fast_proba[i]),
+                "anomaly_score": None,
+                "reason_code": "NO_SIGNIFICANT_RISK",
+                "stage": "FAST_PATH",
+                "degraded": False,
+            }
+        full_rows = np.flatnonzero(~benign)
 
     # ----------------------------
-    # Apply explicit rules
+    # Stage 2: full ensemble + explicit rules
+    # (lower anomaly = more suspicious)
     # ----------------------------
-    decision, reason_code = _apply_decision_rules(
-        fraud_probability=fraud_probability,
-        anomaly_score=anomaly_score,
-        is_qr=is_qr,
-        beneficiary_is_new=beneficiary_is_new,
-    )
+    if full_rows.size:
+        X = features if full_rows.size == n_rows else features[full_rows]
+        risk_scores, anomaly_scores = score_features(X)
+        is_qr = X[:, FEATURE_SPEC.index["is_qr"]]
+        beneficiary_is_new = X[:, FEATURE_SPEC.index["beneficiary_is_new"]]
+
+        for k, i in enumerate(full_rows):
+            decision, reason_code = _apply_decision_rules(
+                fraud_probability=float(risk_scores[k]),
+                anomaly_score=float(anomaly_scores[k]),
+                is_qr=int(is_qr[k]),
+                beneficiary_is_new=int(beneficiary_is_new[k]),
+            )
+            decisions[i] = {
+                "decision": decision,
+                "risk_score": float(risk_scores[k]),
+                "anomaly_score": float(anomaly_scores[k]),
+                "reason_code": reason_code,
+                "stage": "FULL",
+                "degraded": False,
+            }
+
+    metrics.increment("decisions_total", n_rows)
+    metrics.increment("decisions_fast_path", n_rows - int(full_rows.size))
+
+    return decisions
+
+
+def make_rules_only_decision(feature_row: FeatureRows) -> Dict[str, Any]:
+    """
+    Cheap deterministic decision used when there is no time to run the models.
+
+    Counts four raw payload signals: QR payment, new beneficiary, device
+    change and repeated failed authentications. All four give HARD_BLOCK,
+    two or more give SOFT_BLOCK, otherwise ALLOW. Unlike the exception
+    fallback in the API this never approves a risky-looking payment blindly.
+
+    Returns:
+        dict with the same keys as make_decision, stage "DEGRADED",
+        degraded True, risk_score = fraction of signals present and
+        anomaly_score None (the anomaly model was not run).
+    """
+    row = _as_matrix(feature_row)[0]
+    index = FEATURE_SPEC.index
+
+    signals = []
+    if row[index["is_qr"]] == 1:
+        signals.append("QR")
+    if row[index["beneficiary_is_new"]] == 1:
+        signals.append("NEW_BENEFICIARY")
+    if row[index["device_changed"]] == 1:
+        signals.append("DEVICE_CHANGE")
+    if row[index["failed_auth_24h"]] >= DEGRADED_FAILED_AUTH_THRESHOLD:
+        signals.append("FAILED_AUTH")
+
+    if len(signals) == 4:
+        decision = "HARD_BLOCK"
+    elif len(signals) >= 2:
+        decision = "SOFT_BLOCK"
+    else:
+        decision = "ALLOW"
+
+    metrics.increment("decisions_total")
+    metrics.increment("decisions_degraded")
 
     return {
         "decision": decision,
-        "risk_score": fraud_probability,
-        "anomaly_score": anomaly_score,
-        "reason_code": reason_code,
+        "risk_score": len(signals) / 4,
+        "anomaly_score": None,
+        "reason_code": "DEGRADED_" + ("_".join(signals) if signals else "NO_RULE_SIGNAL"),
+        "stage": "DEGRADED",
+        "degraded": True,
     }
 
 
+def score_features(features: FeatureRows) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score a batch of feature rows with both models in one call each.
+
+    Args:
+        features:
+            (n, n_features) array in FEATURE_SPEC order, or a DataFrame
+            with the FEATURE_SPEC columns.
+
+    Returns:
+        (risk_scores, anomaly_scores) as float64 arrays, one entry per row.
+    """
+    features = _as_matrix(features)
+    if hasattr(_fraud_model, "predict_proba"):
+        risk_scores = _fraud_model.predict_proba(features)[:, 1]
+    else:
+        # Fallback (should not happen in our setup)
+        risk_scores = _fraud_model.predict(features)
+
+    anomaly_scores = _anomaly_model.decision_function(features)
+
+    return (
+        np.asarray(risk_scores, dtype=np.float64),
+        np.asarray(anomaly_scores, dtype=np.float64),
+    )
+
+
+def attribute_features(features: FeatureRows) -> List[Dict[str, Any]]:
+    """
+    Per-feature contributions to the fraud model's probability, per row.
+
+    Costs about one fraud-model prediction for the whole batch (see
+    models/attributions.py). Contributions explain the full RandomForest's
+    score, so on FAST_PATH decisions they do not add up to risk_score.
+
+    Args:
+        features:
+            (n, n_features) array in FEATURE_SPEC order, or a DataFrame
+            with the FEATURE_SPEC columns.
+
+    Returns:
+        list of dicts, in row order, with:
+        - base_value: the model's average fraud probability
+        - fraud_probability: base_value + sum of contributions
+        - contributions: {feature: contribution}, largest magnitude first
+    """
+    base_value, contributions = _attributor.explain(_as_matrix(features))
+    rows = []
+    for row in contributions:
+        order = np.argsort(-np.abs(row), kind="stable")
+        rows.append({
+            "base_value": base_value,
+            "fraud_probability": base_value + float(row.sum()),
+            "contributions": {FEATURE_SPEC.columns[j]: float(row[j]) for j in order},
+        })
+    return rows
+
+
+def top_risk_features(attribution: Dict[str, Any], k: int = 3) -> List[str]:
+    """Names of the (up to) k features that raised the fraud probability most."""
+    raising = [(v, f) for f, v in attribution["contributions"].items() if v > 0]
+    return [f for _, f in sorted(raising, key=lambda item: -item[0])[:k]]
+
+
+def limit_model_threads(n_jobs: int) -> None:
+    """Cap the models' joblib parallelism (sharded workers use one core each)."""
+    for model in (_fraud_model, _anomaly_model):
+        if hasattr(model, "n_jobs"):
+            model.n_jobs = n_jobs
+
+
+def _as_matrix(features: FeatureRows) -> np.ndarray:
+    """Return a 2-D float32 array in FEATURE_SPEC column order."""
+    if isinstance(features, pd.DataFrame):
+        return FEATURE_SPEC.from_frame(features)
+    if not isinstance(features, np.ndarray):
+        raise ValueError("features must be a NumPy array or pandas DataFrame")
+    if features.ndim == 1:
+        features = features.reshape(1, -1)
+    if features.shape[1] != FEATURE_SPEC.n_features:
+        raise ValueError(
+            f"expected {FEATURE_SPEC.n_features} features in FEATURE_SPEC order, "
+            f"got {features.shape[1]}"
+        )
+    return features
+
+
 # ---------------------------------------------------------------------
 # Internal rule engine
 # ---------------------------------------------------------------------
@@ -123,13 +380,6 @@ def _apply_decision_rules(
         (decision, reason_code)
     """
 
-    # Thresholds (MVP – intentionally simple)
-    HIGH_FRAUD_THRESHOLD = 0.7
-    SOFT_FRAUD_THRESHOLD = 0.5
-
-    HIGH_ANOMALY_THRESHOLD = -0.15
-    SOFT_ANOMALY_THRESHOLD = -0.10
-
     # Flags
     high_fraud = fraud_probability >= HIGH_FRAUD_THRESHOLD
     high_anomaly = anomaly_score <= HIGH_ANOMALY_THRESHOLD
@@ -0,0 +1,281 @@
+"""
+Multi-process serving mode: a front dispatcher over user-sharded workers.
+
+Run instead of api.main (one uvicorn process; it starts the workers):
+    FRAUDSHIELD_WORKERS=4 uvicorn api.dispatcher:app
+
+Every /decision is routed by consistent hash of user_id to one of
+FRAUDSHIELD_WORKERS scoring processes (api/sharding.py). So each user's
+state and queue entries live in exactly one worker. Transactions without
+a user_id are routed by client_txn_id, so that a retry reaches the
+worker holding its idempotency entry, or else by their field hash.
+
+The mule graph is the one piece of state that spans users. It stays in
+the dispatcher: graph features are read here (O(1)) and sent along with
+the transaction, so beneficiary fan-in counts payers from every shard.
+The payment is added to the graph only once its worker has recorded a
+new decision; replays of an idempotent retry and failed attempts leave
+the graph unchanged.
+
+Exposes:
+- POST /decision         → routed to the user's worker
+- GET  /transactions     → merged from all workers, newest first
+- GET  /transactions/page, /transactions/delta → as in api/main.py, with
+  one cursor component per worker ("12.40.7"); clients treat cursors as
+  opaque strings
+- POST /explain          → routed to the worker that decided txn_id
+- POST /analyst/action   → routed to the worker that decided txn_id
+  (workers issue txn_<shard>_<hex> ids, so no lookup table is kept)
+- POST /analyst/export   → label chunks from every worker
+- GET  /metrics          → per-worker metrics and summed counters
+- GET  /audit/verify     → each worker's hash chain (logs/audit/worker-<n>/)
+- GET  /health           → workers alive
+
+/decision/stream, /drift, /audit queries and /admin/profile are only
+served by the single-process app (api/main.py).
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+
+from api.admission import BUDGET_HEADER, ReceivedAtMiddleware, request_budget_ms
+from api.analyst_actions import EXPORT_FORMATS
+from api.schemas import AnalystActionPayload, ExplainPayload, TransactionPayload
+from api.sharding import WorkerError, WorkerPool, WorkerUnavailable, routing_key
+from models.mule_graph import MuleGraph, load_mule_graph
+
+N_WORKERS = int(os.environ.get("FRAUDSHIELD_WORKERS", str(os.cpu_count() or 1)))
+# A worker that has not answered by then is treated as unavailable
+WORKER_TIMEOUT_S = float(os.environ.get("FRAUDSHIELD_WORKER_TIMEOUT_S", "5"))
+
+app = FastAPI(title="FraudShield API (sharded)", version="1.0.0")
+app.add_middleware(ReceivedAtMiddleware)
+
+POOL = WorkerPool(N_WORKERS)
+
+# Loaded by start_workers(), not at import (the workers import api.main,
+# not this module), and snapshotted in the background and on shutdown
+MULE_GRAPH: Optional[MuleGraph] = None
+MULE_GRAPH_SNAPSHOT_INTERVAL_S = float(os.environ.get("FRAUDSHIELD_MULE_GRAPH_SNAPSHOT_S", "300"))
+
+
+@app.on_event("startup")
+def start_workers():
+    global MULE_GRAPH
+    MULE_GRAPH = load_mule_graph()
+    MULE_GRAPH.start(MULE_GRAPH_SNAPSHOT_INTERVAL_S)
+    POOL.start()
+
+
+@app.on_event("shutdown")
+def stop_workers():
+    POOL.stop()
+    MULE_GRAPH.save()
+
+
+# ---------------------------------------------------------------------
+# Helper functions
+# ---------------------------------------------------------------------
+
+async def _result(future: Future) -> Any:
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), WORKER_TIMEOUT_S)
+    except (WorkerUnavailable, asyncio.TimeoutError):
+        raise HTTPException(status_code=503, detail="Scoring worker unavailable")
+    except WorkerError as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+async def _gather(futures: List[Future]) -> List[Any]:
+    return list(await asyncio.gather(*(_result(f) for f in futures)))
+
+
+def decision_shard(payload: TransactionPayload) -> int:
+    fallback = payload.client_txn_id or json.dumps(
+        payload.dict(exclude={"client_txn_id"}), sort_keys=True
+    )
+    return POOL.shard_for(routing_key(payload.user_id, fallback))
+
+
+def txn_shard(txn_id: str) -> int:
+    """Shard named in a worker's txn_<shard>_<hex> id; other keys by hash."""
+    parts = txn_id.split("_")
+    if len(parts) == 3 and parts[1].isdigit() and int(parts[1]) < POOL.n_workers:
+        return int(parts[1])
+    return POOL.shard_for(f"txn:{txn_id}")
+
+
+def parse_cursor(cursor: Optional[str]) -> List[str]:
+    """Per-worker components of a cursor; all empty if none was sent."""
+    parts = cursor.split(".") if cursor else [""] * POOL.n_workers
+    if len(parts) != POOL.n_workers:
+        raise HTTPException(status_code=400, detail="Cursor is from a different worker count")
+    return parts
+
+# ---------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------
+
+@app.post("/decision")
+async def get_fraud_decision(
+    payload: TransactionPayload, request: Request, attributions: bool = False
+) -> dict:
+    """
+    Same contract as api/main.py's /decision; returns 503 if the user's
+    worker is down (retries are idempotent).
+    """
+    graph = None
+    if payload.user_id and payload.beneficiary_id:
+        graph = MULE_GRAPH.features(payload.beneficiary_id)
+
+    shard = decision_shard(payload)
+    decision = await _result(POOL.call(
+        shard,
+        "decision",
+        payload=payload.dict(),
+        received_at=getattr(request.state, "received_at", None) or time.monotonic(),
+        budget_ms=request_budget_ms(request.headers.get(BUDGET_HEADER)),
+        attributions=attributions,
+        graph=graph,
+    ))
+    if "txn_id" in decision and graph is not None and not decision.get("replayed"):
+        MULE_GRAPH.record(payload.user_id, payload.beneficiary_id)
+    return decision
+
+
+@app.get("/transactions")
+async def get_transactions(filter: str = "ALL") -> List[Dict]:
+    """Analyst transaction queue across all workers, newest first."""
+    queues = await _gather(POOL.broadcast("transactions", filter_decision=filter))
+    rows = [row for queue in queues for row in queue]
+    return sorted(rows, key=lambda row: row["timestamp"], reverse=True)
+
+
+@app.get("/transactions/page")
+async def get_transactions_page(
+    decision: str = "ALL",
+    before: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+) -> dict:
+    """
+    Newest `limit` records across workers older than the `before` cursor.
+    Cursor components: a worker's record id, "" (newest) or "-" (done).
+    """
+    befores = parse_cursor(before)
+    # Finished workers are still asked for an empty page, for their seq
+    pages = await _gather([
+        POOL.call(
+            shard, "transactions_page",
+            decision=decision,
+            before=int(b) if b not in ("", "-") else None,
+            limit=0 if b == "-" else limit,
+        )
+        for shard, b in enumerate(befores)
+    ])
+    candidates = sorted(
+        ((row, shard) for shard, page in enumerate(pages) for row in page["records"]),
+        key=lambda item: item[0]["timestamp"],
+        reverse=True,
+    )[:limit]
+
+    next_befores = ["-"] * POOL.n_workers
+    for shard, page in enumerate(pages):
+        taken = [row["id"] for row, s in candidates if s == shard]
+        if len(taken) < len(page["records"]):
+            # Untaken rows stay eligible for the next page
+            next_befores[shard] = str(min(taken)) if taken else befores[shard]
+        elif page["next_before"] is not None:
+            next_befores[shard] = str(page["next_before"])
+
+    return {
+        "seq": ".".join(page["seq"] for page in pages),
+        "records": [row for row, _ in candidates],
+        "next_before": None if set(next_befores) == {"-"} else ".".join(next_befores),
+    }
+
+
+@app.get("/transactions/delta")
+async def get_transactions_delta(
+    since: Optional[str] = None,
+    decision: str = "ALL",
+    limit: int = Query(500, ge=1, le=5000),
+    if_none_match: Optional[str] = Header(None),
+):
+    """Changes since the `since` cursor from every worker (see api/main.py)."""
+    sinces = [s or None for s in parse_cursor(since)]
+    deltas = await _gather([
+        POOL.call(shard, "transactions_delta", since=s, decision=decision, limit=limit)
+        for shard, s in enumerate(sinces)
+    ])
+    cursor = ".".join(d["seq"] for d in deltas)
+    etag = f'"{cursor}"'
+    # Unchanged only if every worker still has the epoch and offset sent
+    if since is not None and if_none_match == f'"{since}"' and cursor == since:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    records = [row for delta in deltas for row in delta["records"]]
+    return JSONResponse(
+        {
+            "records": sorted(records, key=lambda row: row["timestamp"]),
+            "seq": cursor,
+            "more": any(d["more"] for d in deltas),
+            "reset": any(d["reset"] for d in deltas),
+        },
+        headers={"ETag": etag},
+    )
+
+
+@app.post("/explain")
+async def explain(payload: ExplainPayload) -> dict:
+    key = payload.txn_id or payload.reason_code
+    return await _result(POOL.call(txn_shard(key), "explain", payload=payload.dict()))
+
+
+@app.post("/analyst/action")
+async def analyst_action(payload: AnalystActionPayload) -> dict:
+    await _result(POOL.call(txn_shard(payload.txn_id), "analyst_action", action=payload.dict()))
+    return {"status": "logged"}
+
+
+@app.post("/analyst/export")
+async def export_analyst_labels(fmt: str = "npz") -> dict:
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"fmt must be one of {', '.join(EXPORT_FORMATS)}")
+    chunks = await _gather(POOL.broadcast("export_labels", fmt=fmt))
+    return {
+        "paths": [chunk["path"] for chunk in chunks if chunk["path"]],
+        "rows": sum(chunk["rows"] for chunk in chunks),
+        "featureless": sum(chunk["featureless"] for chunk in chunks),
+    }
+
+
+@app.get("/metrics")
+async def get_metrics() -> dict:
+    workers = await _gather(POOL.broadcast("metrics"))
+    counters: Dict[str, int] = {}
+    for worker in workers:
+        for name, value in worker["counters"].items():
+            counters[name] = counters.get(name, 0) + value
+    return {"counters": counters, "workers": workers}
+
+
+@app.get("/audit/verify")
+async def verify_audit() -> dict:
+    workers = await _gather(POOL.broadcast("audit_verify"))
+    return {"ok": all(w["ok"] for w in workers), "workers": workers}
+
+
+@app.get("/health")
+def health_check() -> dict:
+    alive = POOL.alive
+    return {
+        "status": "healthy" if alive == POOL.n_workers else "degraded",
+        "workers": POOL.n_workers,
+        "workers_alive": alive,
+    }
@@ -0,0 +1,149 @@
+"""
+Streaming drift monitor for model features and scores.
+
+Live values are binned with the fixed edges recorded by
+models/train_drift_reference.py and counted into a ring of time buckets
+(default 12 x 5 minutes = a rolling 1-hour window). Recording a decision
+is a bisect plus an increment per column, and memory is fixed by the
+number of columns, bins and buckets, not by traffic volume.
+
+PSI and KS statistics against the reference histograms are computed by a
+background thread every `refresh_seconds`, off the request path, and
+served from GET /drift.
+"""
+import json
+import threading
+import time
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+REFERENCE_PATH = BASE_DIR / "models" / "drift_reference.json"
+
+# Smoothing for empty bins so PSI stays finite
+_EPSILON = 1e-4
+
+# Rule-of-thumb PSI bands
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+
+
+class DriftMonitor:
+    def __init__(
+        self,
+        reference: Dict[str, Any],
+        window_seconds: int = 3600,
+        n_buckets: int = 12,
+        refresh_seconds: int = 60,
+    ):
+        columns = reference["columns"]
+        self.names = list(columns)
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._edges = [columns[name]["edges"] for name in self.names]
+
+        max_bins = max(len(e) for e in self._edges) + 1
+        self._reference = np.zeros((len(self.names), max_bins), dtype=np.float64)
+        for i, name in enumerate(self.names):
+            counts = columns[name]["counts"]
+            self._reference[i, :len(counts)] = counts
+        self._n_bins = np.array([len(e) + 1 for e in self._edges])
+
+        self.window_seconds = window_seconds
+        self.n_buckets = n_buckets
+        self.bucket_seconds = window_seconds / n_buckets
+        self.refresh_seconds = refresh_seconds
+
+        self._counts = np.zeros((n_buckets, len(self.names), max_bins), dtype=np.int64)
+        self._bucket_epoch = np.full(n_buckets, -1, dtype=np.int64)
+        self._lock = threading.Lock()
+
+        self._latest: Dict[str, Any] = {"status": "warming_up"}
+        self._thread: Optional[threading.Thread] = None
+
+    # -----------------------------------------------------------------
+    # Request path
+    # -----------------------------------------------------------------
+
+    def observe(self, values: Dict[str, float]) -> None:
+        """Count one decision's feature/score values into the current bucket."""
+        epoch = int(time.time() // self.bucket_seconds)
+        slot = epoch % self.n_buckets
+
+        with self._lock:
+            if self._bucket_epoch[slot] != epoch:
+                self._counts[slot] = 0
+                self._bucket_epoch[slot] = epoch
+            counts = self._counts[slot]
+            for name, value in values.items():
+                i = self._index.get(name)
+                if i is not None:
+                    counts[i, bisect_right(self._edges[i], value)] += 1
+
+    # -----------------------------------------------------------------
+    # Background statistics
+    # -----------------------------------------------------------------
+
+    def compute(self) -> Dict[str, Any]:
+        """Compute PSI/KS per column over the rolling window."""
+        current_epoch = int(time.time() // self.bucket_seconds)
+        with self._lock:
+            live = self._bucket_epoch > current_epoch - self.n_buckets
+            window = self._counts[live].sum(axis=0)
+
+        columns = {}
+        for i, name in enumerate(self.names):
+            n_bins = self._n_bins[i]
+            observed = window[i, :n_bins].astype(np.float64)
+            expected = self._reference[i, :n_bins]
+            n_observed = int(observed.sum())
+            if n_observed == 0 or expected.sum() == 0:
+                columns[name] = {"count": n_observed, "psi": None, "ks": None}
+                continue
+
+            p = np.clip(observed / n_observed, _EPSILON, None)
+            q = np.clip(expected / expected.sum(), _EPSILON, None)
+            psi = float(np.sum((p - q) * np.log(p / q)))
+            ks = float(np.max(np.abs(
+                np.cumsum(observed) / n_observed - np.cumsum(expected) / expected.sum()
+            )))
+            columns[name] = {
+                "count": n_observed,
+                "psi": psi,
+                "ks": ks,
+                "status": "alert" if psi >= PSI_ALERT else "warn" if psi >= PSI_WARN else "ok",
+            }
+
+        self._latest = {
+            "status": "ok",
+            "computed_at": time.time(),
+            "window_seconds": self.window_seconds,
+            "columns": columns,
+        }
+        return self._latest
+
+    def latest(self) -> Dict[str, Any]:
+        return self._latest
+
+    def start(self) -> None:
+        """Start the daemon thread that refreshes statistics periodically."""
+        if self._thread is not None:
+            return
+
+        def _loop():
+            while True:
+                time.sleep(self.refresh_seconds)
+                self.compute()
+
+        self._thread = threading.Thread(target=_loop, name="drift-monitor", daemon=True)
+        self._thread.start()
+
+
+def load_drift_monitor(path: Path = REFERENCE_PATH) -> Optional[DriftMonitor]:
+    """Return a DriftMonitor for the recorded reference, or None if absent."""
+    if not Path(path).exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return DriftMonitor(json.load(f))
@@ -0,0 +1,99 @@
+"""
+Idempotent decision cache for retried /decision calls.
+
+Payment switches retry on timeouts. Results are cached per idempotency
+key (the client's transaction ID, or a hash of the transaction fields)
+in a bounded TTL + LRU map, so a retry inside the window gets the
+original decision back instead of being re-scored and re-recorded.
+
+Hash keys get a much shorter TTL than client IDs: without an ID a retry
+cannot be told apart from a second, identical payment, so only
+duplicates arriving within seconds (the switch's retry window) are
+treated as retries. Later identical payments are decided, recorded and
+counted in the velocity features as separate transactions.
+
+Concurrent duplicates are coalesced: the first caller computes the
+decision, and callers arriving while it is in flight wait for its result,
+for at most their own timeout.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get("FRAUDSHIELD_IDEMPOTENCY_TTL_S", "300"))
+IDEMPOTENCY_HASH_TTL_SECONDS = float(os.environ.get("FRAUDSHIELD_IDEMPOTENCY_HASH_TTL_S", "10"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.environ.get("FRAUDSHIELD_IDEMPOTENCY_MAX_ENTRIES", "100000"))
+
+
+class IdempotencyCache:
+    def __init__(
+        self,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS,
+        max_entries: int = IDEMPOTENCY_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (expires_at, result), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl_seconds: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Return (result, replayed). The result is cached for ttl_seconds
+        (default: the cache's TTL).
+
+        replayed is False only for the caller that actually ran `compute`.
+        A caller waiting for an in-flight duplicate raises
+        concurrent.futures.TimeoutError after `timeout` seconds (default:
+        no limit); the computation goes on.
+        Exceptions are not cached: they propagate to the computing caller
+        and to anyone waiting on it, and the next call retries.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[1], True
+                del self._entries[key]
+
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not owner:
+            return future.result(timeout=timeout), True
+
+        try:
+            result = compute()
+        except BaseException as exc:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(exc)
+            raise
+
+        with self._lock:
+            ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._in_flight[key]
+        future.set_result(result)
+        return result, False
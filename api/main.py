@@ -3,21 +3,64 @@ FastAPI application for real-time fraud decision making.
 
 Exposes:
 - POST /decision        → real-time fraud decision
+- POST /decision/stream → bulk NDJSON decisions (streamed back as NDJSON)
 - GET  /transactions    → analyst transaction queue
+- GET  /transactions/page  → one page of the queue (server-side filter)
+- GET  /transactions/delta → queue changes since a seq cursor (ETag/304)
 - POST /explain         → post-decision explanation (RAG-based)
 - POST /analyst/action  → analyst override actions
+- POST /analyst/export  → export new analyst verdicts as training labels
+- GET  /metrics         → service counters (e.g. fast-path fraction)
+- GET  /drift           → feature/score drift statistics (PSI, KS)
+- GET  /audit           → query the audit trail (time range, decision, model version)
+- GET  /audit/verify    → verify the audit trail's hash chain
+- POST /admin/profile   → sample all threads for N seconds (debug token)
 - GET  /health          → health check
 """
 
+from concurrent import futures
 from datetime import datetime
+import json
+import os
+import threading
+import time
 import uuid
-from typing import List, Dict, Optional
-
-import pandas as pd
-from fastapi import FastAPI
-from pydantic import BaseModel, Field
-
-from api.decision_engine import make_decision
+from pathlib import Path
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from starlette.requests import ClientDisconnect
+
+from api import metrics
+from api.admission import (
+    BUDGET_HEADER,
+    AdmissionController,
+    ReceivedAtMiddleware,
+    request_budget_ms,
+)
+from api.analyst_actions import EXPORT_FORMATS, FEEDBACK_STORE
+from api.audit_logger import compute_feature_hash, log_decision
+from api.audit_store import AUDIT_STORE
+from api.decision_engine import (
+    MODEL_VERSIONS,
+    attribute_features,
+    make_decision,
+    make_decisions,
+    make_rules_only_decision,
+    top_risk_features,
+)
+from api.drift_monitor import load_drift_monitor
+from api.idempotency import IDEMPOTENCY_HASH_TTL_SECONDS, IdempotencyCache
+from api.profiling import PROFILE_HEADER, PROFILER
+from api.schemas import AnalystActionPayload, ExplainPayload, TransactionPayload
+from api.transactions_store import TRANSACTIONS
+from models.feature_spec import FEATURE_SPEC
+from models.mule_graph import GraphFeatures, MuleGraph, load_mule_graph
+from models.velocity import SNAPSHOT_DIR as VELOCITY_DIR, VelocityCounters
 from rag.explainer import explain_decision
 
 # ---------------------------------------------------------------------
@@ -25,13 +68,76 @@ from rag.explainer import explain_decision
 # ---------------------------------------------------------------------
 
 app = FastAPI(title="FraudShield API", version="1.0.0")
+app.add_middleware(ReceivedAtMiddleware)
+
+# Bounded in-flight model scoring for /decision
+ADMISSION = AdmissionController()
+
+# Retried /decision calls get the original decision back
+IDEMPOTENCY = IdempotencyCache()
 
 # ---------------------------------------------------------------------
 # In-memory stores (MVP ONLY)
 # ---------------------------------------------------------------------
 
-TRANSACTIONS: List[Dict] = []
-ANALYST_ACTIONS: List[Dict] = []
+# Loaded by start_service() / start_worker(), not at import: a sharded
+# worker imports this module but owns no graph and keeps its own velocity
+# and audit state.
+
+# Payer -> beneficiary graph (warm-started from models/mule_graph.npz if
+# models/train_mule_graph.py has been run or a previous run saved it, and
+# snapshotted back there in the background and on shutdown; None in
+# sharded workers, which get graph features from the dispatcher)
+MULE_GRAPH: Optional[MuleGraph] = None
+MULE_GRAPH_SNAPSHOT_INTERVAL_S = float(os.environ.get("FRAUDSHIELD_MULE_GRAPH_SNAPSHOT_S", "300"))
+
+# Per-user 24h velocity counters and amount moments, restored from the
+# last snapshot and snapshotted in the background
+VELOCITY = VelocityCounters()
+VELOCITY_SNAPSHOT_INTERVAL_S = float(os.environ.get("FRAUDSHIELD_VELOCITY_SNAPSHOT_S", "60"))
+
+# Drift monitor (None until models/train_drift_reference.py has been run,
+# and in sharded workers)
+DRIFT_MONITOR = None
+
+
+@app.on_event("startup")
+def start_service():
+    """Single-process app: load the stores and start background threads."""
+    global MULE_GRAPH, DRIFT_MONITOR
+    MULE_GRAPH = load_mule_graph()
+    MULE_GRAPH.start(MULE_GRAPH_SNAPSHOT_INTERVAL_S)
+    VELOCITY.reopen(VELOCITY_DIR)
+    VELOCITY.start(VELOCITY_SNAPSHOT_INTERVAL_S)
+    DRIFT_MONITOR = load_drift_monitor()
+    if DRIFT_MONITOR is not None:
+        DRIFT_MONITOR.start()
+    # Compacts closed hourly audit segments in the background
+    AUDIT_STORE.start()
+
+
+def start_worker(shard: int, audit_root: Path, velocity_root: Path) -> None:
+    """
+    Sharded worker (api/sharding.py): per-worker audit chain and velocity,
+    and txn_ids that name the shard so the dispatcher can route by them.
+    """
+    global TXN_ID_PREFIX
+    TXN_ID_PREFIX = f"txn_{shard}_"
+    AUDIT_STORE.reopen(audit_root)
+    AUDIT_STORE.start()
+    VELOCITY.reopen(velocity_root)
+    VELOCITY.start(VELOCITY_SNAPSHOT_INTERVAL_S)
+
+
+@app.on_event("shutdown")
+def save_velocity():
+    VELOCITY.save()
+
+
+@app.on_event("shutdown")
+def save_mule_graph():
+    if MULE_GRAPH is not None:
+        MULE_GRAPH.save()
 
 # ---------------------------------------------------------------------
 # Constants
@@ -44,89 +150,381 @@ SAFE_ALLOW_RESPONSE = {
     "reason_code": "INPUT_VALIDATION_FAILED",
 }
 
-# ---------------------------------------------------------------------
-# Request schemas
-# ---------------------------------------------------------------------
+# txn_id = prefix + 8 hex digits; sharded workers use txn_<shard>_
+TXN_ID_PREFIX = "txn_"
+
+# /explain: attributed features added to the retrieval query
+EXPLAIN_TOP_FEATURES = 3
 
-class TransactionPayload(BaseModel):
-    amount: float = Field(..., gt=0)
-    txn_hour: int = Field(..., ge=0, le=23)
-    is_qr: int = Field(..., ge=0, le=1)
-    beneficiary_age_min: int = Field(..., ge=0)
-    device_changed: int = Field(..., ge=0, le=1)
-    location_velocity: int = Field(..., ge=0)
-    failed_auth_24h: int = Field(..., ge=0)
+# /decision/stream: rows scored per vectorized model call, and the longest
+# accepted NDJSON line (bounds buffered, unparsed input per stream)
+STREAM_BLOCK_SIZE = 256
+STREAM_MAX_LINE_BYTES = 64 * 1024
 
+# ---------------------------------------------------------------------
+# Responses
+# ---------------------------------------------------------------------
 
-class ExplainPayload(BaseModel):
-    reason_code: str = Field(..., min_length=1)
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator also consumes the request body.
 
+    Starlette's default implementation listens for client disconnects by
+    calling receive() concurrently, which would steal request-body messages
+    from the iterator; here request.stream() in the iterator surfaces the
+    disconnect instead.
+    """
 
-class AnalystActionPayload(BaseModel):
-    txn_id: str
-    action: str = Field(..., description="CONFIRM_FRAUD | FALSE_POSITIVE | ESCALATE")
-    notes: Optional[str] = None
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
 
 # ---------------------------------------------------------------------
 # Helper functions
 # ---------------------------------------------------------------------
 
 def add_transaction(record: Dict):
-    TRANSACTIONS.insert(0, record)  # newest first
+    TRANSACTIONS.add(record)
 
 
 def list_transactions(filter_decision: str = "ALL") -> List[Dict]:
-    if filter_decision == "ALL":
-        return TRANSACTIONS
-    return [t for t in TRANSACTIONS if t["decision"] == filter_decision]
+    return [with_analyst_action(t) for t in TRANSACTIONS.list(filter_decision)]
+
+
+def transactions_page(decision: str = "ALL", before: Optional[int] = None, limit: int = 50) -> Dict:
+    # Read first: a record added meanwhile is then also in the next delta
+    seq = TRANSACTIONS.seq
+    records, next_before = TRANSACTIONS.page(decision, before, limit)
+    return {
+        "seq": seq,
+        "records": [with_analyst_action(t) for t in records],
+        "next_before": next_before,
+    }
+
+
+def transactions_delta(since: Optional[str] = None, decision: str = "ALL", limit: int = 500) -> Dict:
+    delta = TRANSACTIONS.delta(since, decision, limit)
+    return {**delta, "records": [with_analyst_action(t) for t in delta["records"]]}
+
+
+def with_analyst_action(record: Dict) -> Dict:
+    latest = FEEDBACK_STORE.latest_action(record["txn_id"])
+    return {**record, "analyst_action": latest["action"] if latest else None}
+
+
+# Per-thread feature buffers, reused across requests (FastAPI runs sync
+# endpoints and run_in_threadpool calls on a pool of worker threads)
+_buffers = threading.local()
+
+
+def build_feature_rows(
+    payloads: List[TransactionPayload],
+    graphs: Optional[List[Optional[GraphFeatures]]] = None,
+) -> np.ndarray:
+    """
+    Fill this thread's preallocated float32 buffer from payloads.
+    The returned view is overwritten by the thread's next call.
+
+    Each payload with both account IDs is also recorded in the mule graph,
+    after its graph features are read, unless the caller already did so
+    and passes the features in `graphs` (the sharded dispatcher does).
+    Each payload with a user_id is counted in the velocity counters and
+    its amount in the user's amount moments before txn_velocity_24h and
+    amount_zscore are read.
+    """
+    buffer = getattr(_buffers, "rows", None)
+    if buffer is None or len(buffer) < len(payloads):
+        buffer = FEATURE_SPEC.new_buffer(max(len(payloads), STREAM_BLOCK_SIZE))
+        _buffers.rows = buffer
+    if graphs is None:
+        graphs = [observe_graph(p) for p in payloads]
+    velocities = [observe_velocity(p) for p in payloads]
+    moments = [observe_amount(p) for p in payloads]
+    return FEATURE_SPEC.fill_batch(buffer, payloads, graphs, velocities, moments)
+
+
+def observe_graph(payload: TransactionPayload) -> Optional[GraphFeatures]:
+    if MULE_GRAPH is not None and payload.user_id and payload.beneficiary_id:
+        return MULE_GRAPH.observe(payload.user_id, payload.beneficiary_id)
+    return None
+
+
+def observe_velocity(payload: TransactionPayload) -> Optional[float]:
+    if payload.user_id:
+        return float(VELOCITY.observe(payload.user_id, values=(1.0, payload.amount))[0])
+    return None
+
+
+def observe_amount(payload: TransactionPayload) -> Optional[np.ndarray]:
+    if payload.user_id:
+        return VELOCITY.observe_amount(payload.user_id, payload.amount)
+    return None
+
+
+def record_decision(payload: TransactionPayload, feature_row: np.ndarray, decision: Dict) -> Dict:
+    txn_record = {
+        "txn_id": f"{TXN_ID_PREFIX}{uuid.uuid4().hex[:8]}",
+        "client_txn_id": payload.client_txn_id,
+        "amount": payload.amount,
+        "decision": decision["decision"],
+        "risk_score": decision["risk_score"],
+        "anomaly_score": decision["anomaly_score"],
+        "reason_code": decision["reason_code"],
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+    add_transaction(txn_record)
+    FEEDBACK_STORE.register_transaction(
+        txn_record["txn_id"], FEATURE_SPEC.columns, feature_row
+    )
+    log_decision(
+        decision["decision"],
+        decision["risk_score"],
+        decision["anomaly_score"],
+        decision["reason_code"],
+        feature_row,
+        MODEL_VERSIONS,
+        txn_id=txn_record["txn_id"],
+    )
+    observe_drift(feature_row, decision)
+    return txn_record
+
+
+def observe_drift(feature_row: np.ndarray, decision: Dict):
+    if DRIFT_MONITOR is None:
+        return
+    values = dict(zip(FEATURE_SPEC.columns, feature_row.tolist()))
+    # Scores are only comparable to the reference on full-ensemble decisions
+    if decision.get("stage") == "FULL":
+        values["risk_score"] = decision["risk_score"]
+        values["anomaly_score"] = decision["anomaly_score"]
+    DRIFT_MONITOR.observe(values)
+
+
+def idempotency_key(payload: TransactionPayload) -> Optional[Tuple[str, Optional[float]]]:
+    """
+    (key, TTL) for the idempotency cache. Without a client_txn_id the key
+    is a hash of the fields (user_id and beneficiary_id included), kept
+    only for the short hash TTL: identical payments further apart are
+    separate transactions, and are counted as such in the velocity
+    features (see api/idempotency.py).
+
+    None (no idempotency) without client_txn_id and user_id: identical
+    payments of different, unidentified payers cannot be told apart.
+    """
+    if payload.client_txn_id is not None:
+        return f"client:{payload.client_txn_id}", None
+    if not payload.user_id:
+        return None
+    values = payload.dict(exclude={"client_txn_id"}).values()
+    return f"hash:{compute_feature_hash(values)}", IDEMPOTENCY_HASH_TTL_SECONDS
+
+
+def explain_top_features(txn_id: Optional[str]) -> List[str]:
+    feature_row = FEEDBACK_STORE.feature_row(txn_id) if txn_id else None
+    if feature_row is None:
+        return []
+    return top_risk_features(attribute_features(feature_row)[0], EXPLAIN_TOP_FEATURES)
 
 
 def log_analyst_action(action: Dict):
-    ANALYST_ACTIONS.append({
-        **action,
-        "timestamp": datetime.utcnow().isoformat()
-    })
+    FEEDBACK_STORE.log_action(action)
+    # Delta readers see the record again with its new analyst_action
+    TRANSACTIONS.touch(action["txn_id"])
 
 # ---------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------
 
 @app.post("/decision")
-def get_fraud_decision(payload: TransactionPayload) -> dict:
+def get_fraud_decision(
+    payload: TransactionPayload, request: Request, attributions: bool = False
+) -> dict:
     """
     Real-time fraud decision endpoint.
     Deterministic, fail-safe, and auditable.
+
+    Latency budget: DECISION_BUDGET_MS or the X-Decision-Budget-Ms header.
+    If the models cannot be run within it (queued too long, or too many
+    decisions in flight), a rules-only decision is returned with
+    "degraded": true instead.
+
+    Idempotent: a retry (same client_txn_id within the cache TTL, or the
+    same transaction fields, user_id included, within the much shorter
+    hash TTL if none is sent) returns the original decision and txn_id
+    with "replayed": true, and is not recorded or counted in velocity
+    again. Concurrent duplicates wait for the first one's decision, within
+    their own latency budget; past it they get an unrecorded rules-only
+    decision ("degraded": true, no txn_id).
+
+    ?attributions=true adds per-feature contributions to the fraud model's
+    probability (about the cost of one more model call; not computed for
+    degraded decisions). A replay returns what the original call computed.
+
+    Sampled or X-Debug-Profile requests are profiled (api/profiling.py).
     """
     try:
-        feature_row = pd.DataFrame([{
-            "amount": payload.amount,
-            "txn_hour": payload.txn_hour,
-            "is_qr": payload.is_qr,
-            "beneficiary_age_min": payload.beneficiary_age_min,
-            "device_changed": payload.device_changed,
-            "location_velocity": payload.location_velocity,
-            "failed_auth_24h": payload.failed_auth_24h,
-        }])
-
-        decision = make_decision(feature_row)
-
-        txn_record = {
-            "txn_id": f"txn_{uuid.uuid4().hex[:8]}",
-            "amount": payload.amount,
-            "decision": decision["decision"],
-            "risk_score": decision["risk_score"],
-            "anomaly_score": decision["anomaly_score"],
-            "reason_code": decision["reason_code"],
-            "timestamp": datetime.utcnow().isoformat(),
-        }
-
-        add_transaction(txn_record)
-        return decision
+        with PROFILER.for_request(request.headers.get(PROFILE_HEADER), "decision"):
+            return decide_transaction(
+                payload,
+                getattr(request.state, "received_at", None) or time.monotonic(),
+                request_budget_ms(request.headers.get(BUDGET_HEADER)),
+                attributions,
+            )
 
     except Exception:
         return SAFE_ALLOW_RESPONSE
 
 
+def decide_transaction(
+    payload: TransactionPayload,
+    received_at: float,
+    budget_ms: float,
+    attributions: bool = False,
+    graph: Optional[GraphFeatures] = None,
+) -> Dict:
+    """
+    The /decision path without the HTTP layer (also run by sharded workers).
+
+    Args:
+        payload: validated transaction
+        received_at: time.monotonic() when the request arrived
+        budget_ms: latency budget for admission control
+        attributions: add per-feature contributions to the response
+        graph: mule-graph features already observed by the caller
+            (default: observe them in this process's graph)
+    """
+    def decide() -> Dict:
+        graphs = None if graph is None else [graph]
+        feature_row = build_feature_rows([payload], graphs)
+
+        with ADMISSION.admit(received_at, budget_ms) as rejected:
+            if not rejected:
+                decision = make_decision(feature_row)
+        if rejected:
+            metrics.increment(f"admission_rejected_{rejected.lower()}")
+            decision = make_rules_only_decision(feature_row)
+
+        txn_record = record_decision(payload, feature_row[0], decision)
+        if attributions and not decision["degraded"]:
+            decision = {**decision, "attributions": attribute_features(feature_row)[0]}
+        return {**decision, "txn_id": txn_record["txn_id"]}
+
+    cache_key = idempotency_key(payload)
+    if cache_key is None:
+        return decide()
+    key, ttl_seconds = cache_key
+    remaining_s = max(received_at + budget_ms / 1000 - time.monotonic(), 0.0)
+    try:
+        decision, replayed = IDEMPOTENCY.get_or_compute(key, decide, ttl_seconds, remaining_s)
+    except futures.TimeoutError:
+        # The duplicate in flight records the transaction; answer this one
+        # from the stateless payload signals without touching any state
+        metrics.increment("idempotency_wait_timeouts")
+        row = FEATURE_SPEC.new_buffer(1)
+        FEATURE_SPEC.fill_row(row[0], payload)
+        return make_rules_only_decision(row)
+    if replayed:
+        metrics.increment("decisions_replayed")
+        return {**decision, "replayed": True}
+    return decision
+
+
+@app.post("/decision/stream")
+async def stream_fraud_decisions(request: Request) -> DuplexStreamingResponse:
+    """
+    Bulk decision endpoint.
+    Request body: NDJSON, one TransactionPayload object per line (may be chunked).
+    Response: NDJSON, one line per input line, in input order:
+      {"line": n, "txn_id": ..., "decision": ..., ...}  or
+      {"line": n, "error": "INPUT_VALIDATION_FAILED", "detail": [...]}
+
+    Lines are validated and scored in blocks of STREAM_BLOCK_SIZE with one
+    vectorized model call per block. The body is only read as fast as
+    decisions are streamed back, so at most one block is in flight.
+    """
+    return DuplexStreamingResponse(
+        _stream_decisions(request), media_type="application/x-ndjson"
+    )
+
+
+async def _stream_decisions(request: Request) -> AsyncIterator[bytes]:
+    pending = b""
+    block: List[Tuple[int, bytes]] = []
+    line_no = 0
+
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+
+        for line in lines:
+            if not line.strip():
+                continue
+            block.append((line_no, line))
+            line_no += 1
+            if len(block) >= STREAM_BLOCK_SIZE:
+                yield await run_in_threadpool(_decide_block, block)
+                block = []
+
+        if len(pending) > STREAM_MAX_LINE_BYTES:
+            # Answer every complete line first; the long one is next in order
+            if block:
+                yield await run_in_threadpool(_decide_block, block)
+            yield _ndjson({"line": line_no, "error": "LINE_TOO_LONG"})
+            return
+
+    if pending.strip():
+        block.append((line_no, pending))
+    if block:
+        yield await run_in_threadpool(_decide_block, block)
+
+
+def _decide_block(block: List[Tuple[int, bytes]]) -> bytes:
+    """Validate, score and record one block of NDJSON lines."""
+    results: Dict[int, Dict] = {}
+    valid: List[Tuple[int, TransactionPayload]] = []
+
+    for line_no, line in block:
+        try:
+            valid.append((line_no, TransactionPayload(**json.loads(line))))
+        except (ValueError, TypeError) as exc:
+            detail = (
+                [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()]
+                if isinstance(exc, ValidationError) else ["invalid JSON object"]
+            )
+            results[line_no] = {
+                "line": line_no, "error": "INPUT_VALIDATION_FAILED", "detail": detail,
+            }
+
+    if valid:
+        payloads = [payload for _, payload in valid]
+        try:
+            features = build_feature_rows(payloads)
+            decisions = make_decisions(features)
+        except Exception:
+            features = decisions = None
+        # Rows are recorded one by one: a row whose scoring or recording
+        # failed gets the fail-safe response, rows already recorded keep
+        # their decision and txn_id
+        for i, (line_no, payload) in enumerate(valid):
+            results[line_no] = {"line": line_no, **SAFE_ALLOW_RESPONSE}
+            if decisions is None:
+                continue
+            try:
+                txn_record = record_decision(payload, features[i], decisions[i])
+            except Exception:
+                continue
+            results[line_no] = {"line": line_no, "txn_id": txn_record["txn_id"], **decisions[i]}
+
+    return b"".join(_ndjson(results[line_no]) for line_no, _ in block)
+
+
+def _ndjson(obj: Dict) -> bytes:
+    return json.dumps(obj).encode() + b"\n"
+
+
 @app.get("/transactions")
 def get_transactions(filter: str = "ALL") -> List[Dict]:
     """
@@ -136,17 +534,69 @@ def get_transactions(filter: str = "ALL") -> List[Dict]:
     return list_transactions(filter)
 
 
+@app.get("/transactions/page")
+def get_transactions_page(
+    decision: str = "ALL",
+    before: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+) -> dict:
+    """
+    Up to `limit` queue records (one decision, or ALL) older than the
+    record id `before` (default: the newest), newest first.
+
+    Returns seq, the cursor to poll /transactions/delta from,
+    and next_before for the following page (null on the last one).
+    """
+    return transactions_page(decision, before, limit)
+
+
+@app.get("/transactions/delta")
+def get_transactions_delta(
+    since: Optional[str] = None,
+    decision: str = "ALL",
+    limit: int = Query(500, ge=1, le=5000),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Queue records added or changed (analyst action) after the cursor
+    `since` (a seq from /transactions/page or an earlier delta), filtered
+    by decision; cost is proportional to the changes.
+
+    Response: {records, seq, more, reset}; poll again with since=seq
+    (immediately if more is true; reload from /transactions/page if reset
+    is true, e.g. the cursor predates a restart). The ETag is the returned
+    seq, so a poll sending it back with since=seq gets 304 Not Modified
+    while nothing changed after that cursor. Cursors carry the queue's
+    per-instance epoch, so a stale one never matches after a restart.
+    """
+    etag = f'"{since}"'
+    if since is not None and if_none_match == etag and since == TRANSACTIONS.seq:
+        return Response(status_code=304, headers={"ETag": etag})
+    delta = transactions_delta(since, decision, limit)
+    return JSONResponse(delta, headers={"ETag": f'"{delta["seq"]}"'})
+
+
 @app.post("/explain")
-async def explain(payload: ExplainPayload) -> dict:
+async def explain(payload: ExplainPayload, request: Request) -> dict:
     """
     Post-decision explanation endpoint (RAG).
     Never affects decisioning.
+
+    With a txn_id from /decision, the features that raised that
+    transaction's fraud probability most are attributed and used to
+    narrow retrieval; they are returned as top_features.
     """
+    with PROFILER.for_request(request.headers.get(PROFILE_HEADER), "explain"):
+        return explain_transaction(payload)
+
+
+def explain_transaction(payload: ExplainPayload) -> Dict:
     try:
-        explanation = explain_decision(payload.reason_code)
+        top_features = explain_top_features(payload.txn_id)
         return {
             "reason_code": payload.reason_code,
-            "explanation": explanation,
+            "top_features": top_features,
+            "explanation": explain_decision(payload.reason_code, top_features),
         }
     except Exception:
         return {
@@ -165,6 +615,86 @@ def analyst_action(payload: AnalystActionPayload) -> dict:
     return {"status": "logged"}
 
 
+@app.post("/analyst/export")
+def export_analyst_labels(fmt: str = "npz") -> dict:
+    """
+    Export CONFIRM_FRAUD / FALSE_POSITIVE verdicts logged since the last
+    export as a training-label chunk (fmt = npz | parquet).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"fmt must be one of {', '.join(EXPORT_FORMATS)}")
+    return FEEDBACK_STORE.export_labels(fmt)
+
+
+@app.get("/metrics")
+def get_metrics() -> dict:
+    """
+    Service counters.
+    fast_path_fraction = decisions short-circuited by the cascade / all decisions
+    degraded_fraction  = rules-only decisions under load shedding / all decisions
+    decisions_replayed = retries answered from the idempotency cache
+    """
+    return {
+        "counters": metrics.snapshot(),
+        "fast_path_fraction": metrics.ratio("decisions_fast_path", "decisions_total"),
+        "degraded_fraction": metrics.ratio("decisions_degraded", "decisions_total"),
+        "in_flight": ADMISSION.in_flight,
+        "expected_scoring_ms": ADMISSION.expected_latency_ms,
+    }
+
+
+@app.get("/drift")
+def get_drift() -> dict:
+    """
+    Drift statistics of live traffic against the training reference.
+    Refreshed periodically in the background, never on this request.
+    """
+    if DRIFT_MONITOR is None:
+        return {"status": "no_reference"}
+    return DRIFT_MONITOR.latest()
+
+
+@app.get("/audit")
+def query_audit(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    decision: Optional[str] = None,
+    reason_code: Optional[str] = None,
+    model_version: Optional[str] = None,
+    limit: int = 1000,
+) -> dict:
+    """
+    Audit records with start <= timestamp < end (ISO 8601, UTC if no
+    offset) matching the given filters, oldest first, at most `limit`.
+    """
+    try:
+        start_at, end_at = (datetime.fromisoformat(v) if v else None for v in (start, end))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be ISO 8601 timestamps")
+    frame = AUDIT_STORE.query(start_at, end_at, decision, reason_code, model_version)
+    return {
+        "total": len(frame),
+        "records": frame.head(limit).to_dict(orient="records"),
+    }
+
+
+@app.get("/audit/verify")
+def verify_audit() -> dict:
+    """Recompute the audit trail's hash chain across all segments."""
+    return AUDIT_STORE.verify()
+
+
+@app.post("/admin/profile")
+def start_profiling(request: Request, seconds: float = 10.0) -> dict:
+    """
+    Sample every thread for `seconds` (capped) into logs/profiles/.
+    Requires the X-Debug-Profile header to match FRAUDSHIELD_PROFILE_TOKEN.
+    """
+    if not PROFILER.is_authorized(request.headers.get(PROFILE_HEADER)):
+        raise HTTPException(status_code=403, detail="Profiling not authorized")
+    return {"status": "sampling", "seconds": PROFILER.start_continuous(seconds)}
+
+
 @app.get("/health")
 def health_check() -> dict:
     return {"status": "healthy"}
@@ -0,0 +1,27 @@
+"""
+In-process service counters.
+
+Counters are plain integers guarded by a lock so they can be incremented
+from FastAPI's worker threads. Exposed through GET /metrics.
+"""
+import threading
+from typing import Dict
+
+_lock = threading.Lock()
+_COUNTERS: Dict[str, int] = {}
+
+
+def increment(name: str, value: int = 1) -> None:
+    with _lock:
+        _COUNTERS[name] = _COUNTERS.get(name, 0) + value
+
+
+def snapshot() -> Dict[str, int]:
+    with _lock:
+        return dict(_COUNTERS)
+
+
+def ratio(numerator: str, denominator: str) -> float:
+    counters = snapshot()
+    total = counters.get(denominator, 0)
+    return counters.get(numerator, 0) / total if total else 0.0
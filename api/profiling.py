@@ -0,0 +1,231 @@
+"""
+Opt-in sampling profiler for request latency investigations.
+
+A request is profiled when either:
+- it carries the X-Debug-Profile header with FRAUDSHIELD_PROFILE_TOKEN, or
+- it falls in the FRAUDSHIELD_PROFILE_SAMPLE_RATE fraction of requests.
+POST /admin/profile additionally samples every thread for N seconds.
+
+Profiling is stack sampling, not tracing: a background thread reads
+sys._current_frames() every PROFILE_INTERVAL_MS and counts the watched
+threads' stacks, so profiled code runs unmodified. Output is in collapsed
+("folded") stack format, one "frame;frame;frame count" line per stack,
+ready for flamegraph.pl or speedscope, written to logs/profiles/ (oldest
+files deleted beyond PROFILE_MAX_FILES).
+
+With no token and a zero sample rate (the defaults) the request path only
+checks two attributes, and no sampler thread runs.
+
+Profiling never affects the profiled request: a profile that cannot be
+written is dropped and counted in the profile_write_errors metric.
+"""
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import ContextManager, Iterator, List, Optional
+
+from api import metrics
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROFILE_DIR = BASE_DIR / "logs" / "profiles"
+
+PROFILE_HEADER = "x-debug-profile"
+PROFILE_TOKEN = os.environ.get("FRAUDSHIELD_PROFILE_TOKEN") or None
+PROFILE_SAMPLE_RATE = float(os.environ.get("FRAUDSHIELD_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("FRAUDSHIELD_PROFILE_INTERVAL_MS", "2"))
+PROFILE_MAX_FILES = int(os.environ.get("FRAUDSHIELD_PROFILE_MAX_FILES", "200"))
+MAX_CONTINUOUS_SECONDS = 300.0
+
+
+class _Session:
+    """Stack counts for one profiled request (one thread) or one continuous run (all threads)."""
+
+    def __init__(self, label: str, thread_id: Optional[int], deadline: Optional[float] = None):
+        self.label = label
+        self.thread_id = thread_id
+        self.deadline = deadline
+        # Updated by the sampler under SamplingProfiler._lock, and only
+        # while the session is registered
+        self.stacks: Counter = Counter()
+
+
+def _frame_label(code) -> str:
+    path = Path(code.co_filename)
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class SamplingProfiler:
+    def __init__(
+        self,
+        output_dir: Path = PROFILE_DIR,
+        token: Optional[str] = PROFILE_TOKEN,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        interval_ms: float = PROFILE_INTERVAL_MS,
+        max_files: int = PROFILE_MAX_FILES,
+    ):
+        self.output_dir = Path(output_dir)
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval_s = interval_ms / 1000
+        self.max_files = max_files
+
+        self._lock = threading.Lock()
+        self._sessions: List[_Session] = []
+        self._thread: Optional[threading.Thread] = None
+
+    # -----------------------------------------------------------------
+    # Request path
+    # -----------------------------------------------------------------
+
+    def is_authorized(self, header_value: Optional[str]) -> bool:
+        """Constant-time check of the debug header against the token."""
+        return (
+            self.token is not None
+            and header_value is not None
+            and hmac.compare_digest(header_value.encode(), self.token.encode())
+        )
+
+    def for_request(self, header_value: Optional[str], label: str) -> ContextManager:
+        """
+        Context manager profiling the current thread if this request is
+        selected (debug header or sample rate), else a no-op.
+        """
+        if self.token is None and not self.sample_rate:
+            return nullcontext()
+        if self.is_authorized(header_value) or (
+            self.sample_rate and random.random() < self.sample_rate
+        ):
+            return self.profile_thread(label)
+        return nullcontext()
+
+    @contextmanager
+    def profile_thread(self, label: str) -> Iterator[_Session]:
+        """Sample the calling thread until the block exits, then write the profile."""
+        session = _Session(label, threading.get_ident())
+        self._add(session)
+        try:
+            yield session
+        finally:
+            self._remove(session)
+            self._write(session)
+
+    # -----------------------------------------------------------------
+    # Continuous sampling
+    # -----------------------------------------------------------------
+
+    def start_continuous(self, seconds: float, label: str = "continuous") -> float:
+        """
+        Sample all threads for `seconds` (capped at MAX_CONTINUOUS_SECONDS).
+        The profile is written by the sampler thread when the run ends.
+
+        Returns:
+            the run length actually used, in seconds.
+        """
+        seconds = min(max(seconds, 0.0), MAX_CONTINUOUS_SECONDS)
+        self._add(_Session(label, None, deadline=time.monotonic() + seconds))
+        return seconds
+
+    # -----------------------------------------------------------------
+    # Sampler thread
+    # -----------------------------------------------------------------
+
+    def _add(self, session: _Session) -> None:
+        with self._lock:
+            self._sessions.append(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def _remove(self, session: _Session) -> None:
+        with self._lock:
+            self._sessions.remove(session)
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._sessions:
+                    # Exit while holding the lock so _add starts a new thread
+                    self._thread = None
+                    return
+                sessions = list(self._sessions)
+
+            frames = sys._current_frames()
+            now = time.monotonic()
+            collapsed = {}
+            samples = []
+
+            for session in sessions:
+                if session.thread_id is None:
+                    thread_ids = [t for t in frames if t != own_id]
+                else:
+                    thread_ids = [session.thread_id] if session.thread_id in frames else []
+                for thread_id in thread_ids:
+                    if thread_id not in collapsed:
+                        collapsed[thread_id] = _collapse(frames[thread_id])
+                samples.append([collapsed[t] for t in thread_ids])
+            del frames
+
+            finished = []
+            with self._lock:
+                for session, stacks in zip(sessions, samples):
+                    # A session removed meanwhile is being written: leave it alone
+                    if session not in self._sessions:
+                        continue
+                    session.stacks.update(stacks)
+                    if session.deadline is not None and now >= session.deadline:
+                        self._sessions.remove(session)
+                        finished.append(session)
+            for session in finished:
+                self._write(session)
+
+            time.sleep(self.interval_s)
+
+    # -----------------------------------------------------------------
+    # Output
+    # -----------------------------------------------------------------
+
+    def _write(self, session: _Session) -> Optional[Path]:
+        """
+        Write collapsed stacks and rotate old profiles of a session that is
+        no longer registered (so the sampler no longer updates it).
+        Returns None if there were no samples or the write failed; never raises.
+        """
+        if not session.stacks:
+            return None
+
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+            path = self.output_dir / f"{stamp}_{session.label}_{os.getpid()}.collapsed"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in session.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            metrics.increment("profiles_written")
+
+            profiles = sorted(self.output_dir.glob("*.collapsed"))
+            for old in profiles[:max(len(profiles) - self.max_files, 0)]:
+                old.unlink(missing_ok=True)
+        except Exception:
+            metrics.increment("profile_write_errors")
+            return None
+        return path
+
+
+PROFILER = SamplingProfiler()
@@ -0,0 +1,34 @@
+"""
+Request schemas shared by the API (api/main.py) and the sharded
+dispatcher (api/dispatcher.py).
+"""
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class TransactionPayload(BaseModel):
+    amount: float = Field(..., gt=0)
+    txn_hour: int = Field(..., ge=0, le=23)
+    is_qr: int = Field(..., ge=0, le=1)
+    beneficiary_age_min: int = Field(..., ge=0)
+    device_changed: int = Field(..., ge=0, le=1)
+    location_velocity: int = Field(..., ge=0)
+    failed_auth_24h: int = Field(..., ge=0)
+    # Accounts for the mule-network graph features (cold-start values if absent)
+    user_id: Optional[str] = Field(None, min_length=1, max_length=128)
+    beneficiary_id: Optional[str] = Field(None, min_length=1, max_length=128)
+    # Idempotency key; retries without one are matched on the field hash
+    client_txn_id: Optional[str] = Field(None, min_length=1, max_length=128)
+
+
+class ExplainPayload(BaseModel):
+    reason_code: str = Field(..., min_length=1)
+    # Decided transaction whose top risk features should guide the explanation
+    txn_id: Optional[str] = None
+
+
+class AnalystActionPayload(BaseModel):
+    txn_id: str
+    action: str = Field(..., description="CONFIRM_FRAUD | FALSE_POSITIVE | ESCALATE")
+    notes: Optional[str] = None
@@ -0,0 +1,292 @@
+"""
+User-affinity sharding of the decision service over worker processes.
+
+- HashRing: consistent hashing of routing keys (user_id) onto a fixed
+  number of shards, with virtual nodes for balance. Resizing the pool
+  only moves about 1/N of the users to a different worker.
+- WorkerPool: one scoring process per shard, each running the regular
+  decision service (api/main.py) single-threaded. So a user's rolling
+  state, transaction-queue entries, idempotency cache and feedback rows all
+  live in exactly one process. Workers skip the single-process startup
+  (no mule graph, which the dispatcher owns, and no drift monitor), and
+  run /explain on a thread of their own, so loading or running the
+  explainer never holds up the shard's decisions.
+
+Transport: each worker is connected to the dispatcher by a duplex
+multiprocessing Pipe (a local AF_UNIX socket pair) carrying pickled
+(request_id, op, kwargs) -> (request_id, ok, result) messages. A reader
+thread per worker resolves the dispatcher's futures, so many requests
+can be queued on one worker at a time. Queueing time counts against the
+request's latency budget, because workers see the dispatcher's
+received_at; time.monotonic() is system-wide on Linux.
+
+Workers are started through a forkserver that has already imported
+api.decision_engine. The loaded models are therefore shared
+copy-on-write instead of being loaded once per worker.
+
+Each worker writes its own hash chain under <audit root>/worker-<n>/,
+since the audit store assumes a single writer per chain, and snapshots
+its users' velocity counters under <velocity root>/worker-<n>/. When the
+worker count changes, users that move to another shard start their 24h
+window cold.
+"""
+import bisect
+import hashlib
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from api.audit_store import AUDIT_DIR
+from models.velocity import SNAPSHOT_DIR as VELOCITY_DIR
+
+# Virtual nodes per shard on the hash ring
+RING_VNODES = 128
+
+# Imported once in the forkserver, inherited by every worker
+PRELOAD_MODULES = ["api.decision_engine"]
+
+# Worker ops run off the scoring loop, on the worker's explain thread
+BACKGROUND_OPS = frozenset({"explain"})
+
+
+class WorkerUnavailable(RuntimeError):
+    """The worker process exited, or its connection was closed."""
+
+
+class WorkerError(RuntimeError):
+    """An operation raised inside the worker."""
+
+
+# ---------------------------------------------------------------------
+# Consistent hashing
+# ---------------------------------------------------------------------
+
+def _hash64(key: str) -> int:
+    # Stable across processes and restarts (unlike hash())
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, n_shards: int, vnodes: int = RING_VNODES):
+        if n_shards < 1:
+            raise ValueError("n_shards must be >= 1")
+        self.n_shards = n_shards
+        points = sorted(
+            (_hash64(f"shard-{shard}#{v}"), shard)
+            for shard in range(n_shards)
+            for v in range(vnodes)
+        )
+        self._points = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, key: str) -> int:
+        """Shard owning `key`: the first ring point clockwise from its hash."""
+        i = bisect.bisect(self._points, _hash64(key))
+        return self._shards[i % len(self._points)]
+
+
+# ---------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------
+
+def _serve(index: int, conn, audit_root: str, velocity_root: str) -> None:
+    """Worker main loop: run ops from the dispatcher one at a time."""
+    from api import main as service
+    from api.decision_engine import limit_model_threads
+
+    service.start_worker(
+        index,
+        Path(audit_root) / f"worker-{index}", Path(velocity_root) / f"worker-{index}"
+    )
+    # One core per worker; no model thread pools competing across workers
+    limit_model_threads(1)
+
+    def decision(payload, received_at, budget_ms, attributions=False, graph=None):
+        try:
+            return service.decide_transaction(
+                service.TransactionPayload(**payload), received_at, budget_ms, attributions, graph
+            )
+        except Exception:
+            return service.SAFE_ALLOW_RESPONSE
+
+    handlers: Dict[str, Callable[..., Any]] = {
+        "decision": decision,
+        "transactions": service.list_transactions,
+        "transactions_page": service.transactions_page,
+        "transactions_delta": service.transactions_delta,
+        "explain": lambda payload: service.explain_transaction(service.ExplainPayload(**payload)),
+        "analyst_action": service.log_analyst_action,
+        "export_labels": service.FEEDBACK_STORE.export_labels,
+        "metrics": service.get_metrics,
+        "audit_verify": service.verify_audit,
+    }
+
+    send_lock = threading.Lock()
+    background = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"shard-{index}-explain")
+
+    def run(request_id: int, op: str, kwargs: Dict[str, Any]) -> None:
+        try:
+            reply = (request_id, True, handlers[op](**kwargs))
+        except Exception as exc:
+            reply = (request_id, False, f"{type(exc).__name__}: {exc}")
+        with send_lock:
+            conn.send(reply)
+
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+            request_id, op, kwargs = message
+            if op in BACKGROUND_OPS:
+                background.submit(run, request_id, op, kwargs)
+            else:
+                run(request_id, op, kwargs)
+    finally:
+        background.shutdown(wait=True)
+        service.AUDIT_STORE.close()
+        service.VELOCITY.save()
+        conn.close()
+
+
+# ---------------------------------------------------------------------
+# Dispatcher side
+# ---------------------------------------------------------------------
+
+class _Worker:
+    """Dispatcher-side handle: send requests, match replies by id."""
+
+    def __init__(self, index: int, process, conn):
+        self.index = index
+        self.process = process
+        self._conn = conn
+        # _lock guards the pending map; _send_lock serializes writes. They
+        # are separate so a send blocked on a full socket never stops the
+        # reader thread from draining replies.
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._closed = False
+        self._reader = threading.Thread(
+            target=self._read_replies, name=f"shard-{index}-reader", daemon=True
+        )
+        self._reader.start()
+
+    @property
+    def alive(self) -> bool:
+        return not self._closed and self.process.is_alive()
+
+    def call(self, op: str, kwargs: Dict[str, Any]) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                future.set_exception(WorkerUnavailable(f"worker {self.index} is not running"))
+                return future
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                self._conn.send((request_id, op, kwargs))
+        except (OSError, ValueError) as exc:
+            with self._lock:
+                owned = self._pending.pop(request_id, None) is not None
+            if owned and future.set_running_or_notify_cancel():
+                future.set_exception(WorkerUnavailable(f"worker {self.index}: {exc}"))
+        return future
+
+    def _read_replies(self) -> None:
+        try:
+            while True:
+                request_id, ok, result = self._conn.recv()
+                with self._lock:
+                    future = self._pending.pop(request_id, None)
+                # Skip callers that gave up (a timed-out wait cancels the future)
+                if future is None or not future.set_running_or_notify_cancel():
+                    continue
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(WorkerError(result))
+        except (EOFError, OSError):
+            pass
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if future.set_running_or_notify_cancel():
+                future.set_exception(WorkerUnavailable(f"worker {self.index} exited"))
+
+    def stop(self, timeout: float) -> None:
+        try:
+            with self._send_lock:
+                self._conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self._conn.close()
+        self._reader.join(timeout)
+
+
+class WorkerPool:
+    def __init__(
+        self, n_workers: int, audit_root: Path = AUDIT_DIR, velocity_root: Path = VELOCITY_DIR
+    ):
+        self.n_workers = n_workers
+        self.audit_root = Path(audit_root)
+        self.velocity_root = Path(velocity_root)
+        self.ring = HashRing(n_workers)
+        self._workers: List[_Worker] = []
+
+    def start(self) -> None:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(PRELOAD_MODULES)
+        for index in range(self.n_workers):
+            parent_conn, child_conn = context.Pipe(duplex=True)
+            process = context.Process(
+                target=_serve,
+                args=(index, child_conn, str(self.audit_root), str(self.velocity_root)),
+                name=f"fraudshield-shard-{index}",
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._workers.append(_Worker(index, process, parent_conn))
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Ask every worker to exit (closing its audit segment and saving its
+        velocity counters), then reap it.
+        """
+        for worker in self._workers:
+            worker.stop(timeout)
+        self._workers = []
+
+    @property
+    def alive(self) -> int:
+        return sum(worker.alive for worker in self._workers)
+
+    def shard_for(self, key: str) -> int:
+        return self.ring.shard_for(key)
+
+    def call(self, shard: int, op: str, **kwargs) -> Future:
+        """Run `op` on one worker; the future resolves to its result."""
+        return self._workers[shard].call(op, kwargs)
+
+    def broadcast(self, op: str, **kwargs) -> List[Future]:
+        """Run `op` on every worker, futures in shard order."""
+        return [worker.call(op, kwargs) for worker in self._workers]
+
+
+def routing_key(user_id: Optional[str], fallback: str) -> str:
+    """Route by user; transactions without a user_id by `fallback`."""
+    return f"user:{user_id}" if user_id else f"key:{fallback}"
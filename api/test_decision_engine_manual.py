@@ -11,7 +11,9 @@ row = pd.DataFrame([{
     "amount_zscore": 2.1,
     "is_night": 1,
     "beneficiary_is_new": 1,
-    "txn_velocity_24h": 5
+    "txn_velocity_24h": 5,
+    "beneficiary_fan_in": 0,
+    "component_size": 1
 }])
 
 result = make_decision(row)
@@ -0,0 +1,67 @@
+"""
+Sharding check: the hash ring is stable, balanced and moves few users
+when a worker is added, and a 2-worker pool keeps each user's
+transactions, audit chain and velocity counters in one worker.
+"""
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+from api.sharding import HashRing, WorkerPool, routing_key
+from models.velocity import VelocityCounters
+
+
+def main():
+    users = [routing_key(f"user_{i}", "") for i in range(20_000)]
+
+    ring4, ring5 = HashRing(4), HashRing(5)
+    owners4 = [ring4.shard_for(u) for u in users]
+    rebuilt = HashRing(4)
+    assert owners4 == [rebuilt.shard_for(u) for u in users], "ring must be deterministic"
+
+    shares = [count / len(users) for count in Counter(owners4).values()]
+    print("Users per shard (4 shards):", [f"{s:.1%}" for s in shares])
+    assert min(shares) > 0.15 and max(shares) < 0.35
+
+    moved = sum(a != ring5.shard_for(u) for a, u in zip(owners4, users)) / len(users)
+    print(f"Moved when growing 4 -> 5 shards: {moved:.1%}")
+    assert moved < 0.35
+
+    payload = {
+        "amount": 500, "txn_hour": 12, "is_qr": 0, "beneficiary_age_min": 5000,
+        "device_changed": 0, "location_velocity": 0, "failed_auth_24h": 0,
+    }
+    with tempfile.TemporaryDirectory() as audit_root, tempfile.TemporaryDirectory() as velocity_root:
+        pool = WorkerPool(2, audit_root=audit_root, velocity_root=velocity_root)
+        pool.start()
+        try:
+            for user in ("alice", "bob", "carol", "dave"):
+                shard = pool.shard_for(routing_key(user, ""))
+                for amount in (100, 200, 300):
+                    pool.call(
+                        shard, "decision",
+                        payload={**payload, "amount": amount, "user_id": user},
+                        received_at=0.0, budget_ms=1e12,
+                    ).result()
+
+            queues = [f.result() for f in pool.broadcast("transactions", filter_decision="ALL")]
+            assert sum(len(q) for q in queues) == 12
+            audits = [f.result() for f in pool.broadcast("audit_verify")]
+            assert all(a["ok"] for a in audits), audits
+            assert sum(a["records"] for a in audits) == 12
+        finally:
+            pool.stop()
+        assert {p.name for p in Path(audit_root).iterdir()} <= {"worker-0", "worker-1"}
+
+        # Each worker saved its own users' counters on exit
+        for user in ("alice", "bob", "carol", "dave"):
+            shard = pool.shard_for(routing_key(user, ""))
+            counters = VelocityCounters.load(Path(velocity_root) / f"worker-{shard}")
+            assert counters.stats(user)["txn_count"] == 3
+
+    print("Sharded pool keeps users, queues, audit chains and velocity per worker")
+
+
+# Worker processes re-import a script run as __main__ under this name
+if __name__ != "__mp_main__":
+    main()
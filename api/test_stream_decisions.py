@@ -0,0 +1,33 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from api.main import STREAM_MAX_LINE_BYTES, app
+
+txn = {
+    "amount": 1200, "txn_hour": 14, "is_qr": 0, "beneficiary_age_min": 5000,
+    "device_changed": 0, "location_velocity": 3, "failed_auth_24h": 0,
+}
+
+def stream(body: bytes):
+    with TestClient(app) as client:
+        response = client.post("/decision/stream", content=body)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+# Valid lines plus a line that never ends
+lines = [json.dumps({**txn, "client_txn_id": f"s{i}"}).encode() for i in range(3)]
+body = b"\n".join(lines) + b"\n" + b"x" * (STREAM_MAX_LINE_BYTES + 1)
+out = stream(body)
+
+# The three valid lines are decided before the long line is reported at index 3
+assert [row["line"] for row in out] == [0, 1, 2, 3]
+assert all("decision" in row for row in out[:3])
+assert out[3] == {"line": 3, "error": "LINE_TOO_LONG"}
+
+# An ordinary stream answers every line in order
+out = stream(b"\n".join(lines) + b"\n{bad json}\n")
+assert [row["line"] for row in out] == [0, 1, 2, 3]
+assert out[3]["error"] == "INPUT_VALIDATION_FAILED"
+
+print("stream decisions OK")
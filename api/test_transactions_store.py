@@ -0,0 +1,46 @@
+"""
+Queue check: pages are filtered and paginated by id, and deltas return
+only records added or changed after a cursor from the same queue.
+"""
+from api.transactions_store import TransactionQueue
+
+queue = TransactionQueue()
+decisions = ["ALLOW", "SOFT_BLOCK", "ALLOW", "HARD_BLOCK"] * 30
+for i, decision in enumerate(decisions):
+    queue.add({"txn_id": f"t{i}", "decision": decision, "timestamp": f"{i:06d}"})
+assert queue.seq == f"{queue.epoch}:120"
+
+# Pagination, newest first, by decision
+page, next_before = queue.page("ALLOW", limit=25)
+assert [r["txn_id"] for r in page[:2]] == ["t118", "t116"] and len(page) == 25
+older, next_before = queue.page("ALLOW", before=next_before, limit=25)
+assert len(older) == 25 and next_before is not None
+last, next_before = queue.page("ALLOW", before=next_before, limit=25)
+assert len(last) == 10 and next_before is None
+assert len({r["txn_id"] for r in page + older + last}) == 60
+
+# Deltas: new rows and touched rows once each, in change order
+since = queue.seq
+assert queue.delta(since) == {"records": [], "seq": since, "more": False, "reset": False}
+queue.add({"txn_id": "t120", "decision": "HARD_BLOCK", "timestamp": "000120"})
+assert queue.touch("t3") and queue.touch("t5") and queue.touch("t3")
+assert not queue.touch("unknown")
+delta = queue.delta(since)
+assert [r["txn_id"] for r in delta["records"]] == ["t120", "t5", "t3"]
+assert [r["txn_id"] for r in queue.delta(since, "HARD_BLOCK")["records"]] == ["t120", "t3"]
+
+# Bounded reads continue from the returned seq; unknown cursors ask for a reload
+first = queue.delta(since, limit=2)
+assert first["more"] and first["seq"] == f"{queue.epoch}:122"
+assert not queue.delta(first["seq"], limit=2)["more"]
+assert queue.delta(f"{queue.epoch}:999")["reset"]
+
+# A restarted queue (new epoch) rejects old cursors even once it has as
+# many changes as the cursor's offset
+restarted = TransactionQueue()
+for i in range(130):
+    restarted.add({"txn_id": f"r{i}", "decision": "ALLOW", "timestamp": f"{i:06d}"})
+assert restarted.delta(since)["reset"] and restarted.delta(since)["records"] == []
+assert len(restarted.delta()["records"]) == 130
+
+print("Transaction queue pages and deltas OK")
@@ -1,13 +1,132 @@
-from datetime import datetime
-from typing import List, Dict
+"""
+In-memory analyst transaction queue (MVP only) with incremental reads.
 
-# In-memory store (MVP only)
-TRANSACTIONS: List[Dict] = []
+- Records are kept in arrival order; a record's id is its position
+- Per-decision id lists (ascending) serve filtered, paginated reads by
+  bisection, so a page costs O(page size)
+- A change log holds the record id of every insert and every analyst
+  action. A client's sequence number is an offset into it, so a delta
+  read costs O(changes since that number), whatever the queue size
 
-def add_transaction(txn: Dict):
-    TRANSACTIONS.insert(0, txn)  # newest first
+Sequence numbers are handed out as "<epoch>:<offset>" cursors, where the
+epoch is random per queue instance. MVP ONLY: the queue is not persisted,
+so a restarted service has a new epoch and clients holding a cursor from
+before the restart are told to reload, however many changes it has seen.
+"""
+import bisect
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
 
-def list_transactions(filter_decision: str | None = None):
-    if not filter_decision or filter_decision == "ALL":
-        return TRANSACTIONS
-    return [t for t in TRANSACTIONS if t["decision"] == filter_decision]
+
+class TransactionQueue:
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._records: List[Dict] = []
+        self._ids: Dict[str, int] = {}
+        self._by_decision: Dict[str, List[int]] = {}
+        self._changes: List[int] = []
+
+    @property
+    def seq(self) -> str:
+        """Cursor after the changes so far (where the next delta starts)."""
+        return self._cursor(len(self._changes))
+
+    def _cursor(self, offset: int) -> str:
+        return f"{self.epoch}:{offset}"
+
+    def _offset(self, cursor: Optional[str]) -> Optional[int]:
+        """Change-log offset of a cursor (None = start), or None if not ours."""
+        if cursor is None:
+            return 0
+        epoch, _, offset = cursor.partition(":")
+        if epoch != self.epoch or not offset.isdigit() or int(offset) > len(self._changes):
+            return None
+        return int(offset)
+
+    # -----------------------------------------------------------------
+    # Writes
+    # -----------------------------------------------------------------
+
+    def add(self, record: Dict) -> Dict:
+        """Append a decided transaction; returns it with its id."""
+        with self._lock:
+            record = {**record, "id": len(self._records)}
+            self._records.append(record)
+            self._ids[record["txn_id"]] = record["id"]
+            self._by_decision.setdefault(record["decision"], []).append(record["id"])
+            self._changes.append(record["id"])
+        return record
+
+    def touch(self, txn_id: str) -> bool:
+        """Log a change to a transaction (e.g. an analyst action)."""
+        with self._lock:
+            record_id = self._ids.get(txn_id)
+            if record_id is None:
+                return False
+            self._changes.append(record_id)
+        return True
+
+    # -----------------------------------------------------------------
+    # Reads
+    # -----------------------------------------------------------------
+
+    def list(self, decision: str = "ALL") -> List[Dict]:
+        """Every record (optionally one decision), newest first."""
+        records, _ = self.page(decision, limit=len(self._records))
+        return records
+
+    def page(
+        self, decision: str = "ALL", before: Optional[int] = None, limit: int = 50
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Up to `limit` records with id < before (default: the newest),
+        newest first.
+
+        Returns:
+            (records, next_before); next_before is None on the last page.
+        """
+        with self._lock:
+            ids = range(len(self._records)) if decision == "ALL" else self._by_decision.get(decision, [])
+            end = len(ids) if before is None else bisect.bisect_left(ids, before)
+            start = max(0, end - limit)
+            records = [self._records[i] for i in reversed(ids[start:end])]
+        next_before = records[-1]["id"] if start > 0 and records else None
+        return records, next_before
+
+    def delta(self, since: Optional[str] = None, decision: str = "ALL", limit: int = 500) -> Dict:
+        """
+        Records added or changed after the cursor `since` (default: all).
+
+        A record changed several times is returned once. At most `limit`
+        changes are read per call; "more" says whether to call again.
+
+        Returns:
+            dict with records (in change order), seq (pass as `since`
+            next time), more, and reset (True if `since` is from another
+            queue instance, e.g. before a restart: reload from page()).
+        """
+        with self._lock:
+            total = len(self._changes)
+            start = self._offset(since)
+            if start is None:
+                return {"records": [], "seq": self._cursor(total), "more": False, "reset": True}
+            changes = self._changes[start:start + limit]
+            latest = {record_id: None for record_id in reversed(changes)}
+            records = [self._records[i] for i in reversed(list(latest))]
+        if decision != "ALL":
+            records = [r for r in records if r["decision"] == decision]
+        end = start + len(changes)
+        return {"records": records, "seq": self._cursor(end), "more": end < total, "reset": False}
+
+
+TRANSACTIONS = TransactionQueue()
+
+
+def add_transaction(txn: Dict) -> Dict:
+    return TRANSACTIONS.add(txn)
+
+
+def list_transactions(filter_decision: Optional[str] = None) -> List[Dict]:
+    return TRANSACTIONS.list(filter_decision or "ALL")
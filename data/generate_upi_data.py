@@ -2,14 +2,26 @@ import random
 import uuid
 import pandas as pd
 
+# Fraud pays out to a small pool of mule accounts; legitimate payments go
+# to each user's own handful of regular payees
+N_MULE_ACCOUNTS = 25
+PAYEES_PER_USER = 5
+
+# Transactions fall on random days of one week (UTC, from 2024-01-01),
+# at their txn_hour
+START_TIME = 1704067200
+N_DAYS = 7
+
 rows = []
 
 for i in range(3000):
     is_fraud = random.random() < 0.08  # ~8% fraud
+    user_id = f"user_{random.randint(1, 400)}"
 
     row = {
         "txn_id": str(uuid.uuid4()),
-        "user_id": f"user_{random.randint(1, 400)}",
+        "user_id": user_id,
+        "beneficiary_id": f"{user_id}_payee_{random.randint(1, PAYEES_PER_USER)}",
         "amount": random.randint(100, 5000),
         "txn_hour": random.randint(8, 22),
         "is_qr": 0,
@@ -28,9 +40,17 @@ for i in range(3000):
         row["device_changed"] = 1
         row["location_velocity"] = 1
         row["failed_auth_24h"] = random.randint(2, 5)
+        row["beneficiary_id"] = f"mule_{random.randint(1, N_MULE_ACCOUNTS)}"
         row["label"] = 1
 
+    row["timestamp"] = (
+        START_TIME
+        + random.randrange(N_DAYS) * 86400
+        + row["txn_hour"] * 3600
+        + random.randrange(3600)
+    )
     rows.append(row)
 
 df = pd.DataFrame(rows)
+df.insert(1, "timestamp", df.pop("timestamp"))
 df.to_csv("upi_transactions.csv", index=False)
@@ -0,0 +1,90 @@
+"""
+Per-feature risk attributions for the flattened RandomForest.
+
+Uses path-based (Saabas) attributions: every split on a row's path moves
+the predicted fraud probability from the parent node's value to the
+child's, and that change is credited to the split feature. Averaged over
+trees, a row's fraud probability is exactly
+
+    base_value + sum(contributions)
+
+where base_value is the mean root value (the forest's prior).
+
+Because the credit only depends on the node a row ends in, the summed
+contributions along the root -> node path are precomputed for every node
+when the attributor is built. Attributing a batch is then one
+CompactForest.apply (the cost of a prediction) plus one gather per tree,
+instead of TreeSHAP's per-row recursion over every tree.
+"""
+from typing import Tuple
+
+import numpy as np
+
+from models.compact_forest import CompactForest
+
+
+class ForestAttributor:
+    """Path attributions for a CompactForest (or a fitted RandomForestClassifier)."""
+
+    def __init__(self, forest: CompactForest):
+        self.forest = forest
+        self.base_value = float(forest.value[forest.roots].mean(dtype=np.float64))
+        self.node_contributions = _path_contributions(forest)
+
+    @classmethod
+    def from_model(cls, model) -> "ForestAttributor":
+        """Build from a CompactForest, flattening a RandomForestClassifier first."""
+        if not isinstance(model, CompactForest):
+            model = CompactForest.from_forest(model)
+        return cls(model)
+
+    @property
+    def n_features(self) -> int:
+        return self.forest.n_features_in_
+
+    def explain(self, X) -> Tuple[float, np.ndarray]:
+        """
+        Attribute the fraud probability of every row to its features.
+
+        Args:
+            X: (n_rows, n_features) array, or a single row
+
+        Returns:
+            (base_value, contributions) with contributions of shape
+            (n_rows, n_features); base_value + contributions.sum(axis=1)
+            equals the forest's predict_proba(X)[:, 1].
+        """
+        leaves = self.forest.apply(X)
+        contributions = np.zeros((leaves.shape[1], self.n_features), dtype=np.float64)
+        # One gather per tree keeps memory at O(rows x features)
+        for tree_leaves in leaves:
+            contributions += self.node_contributions[tree_leaves]
+        contributions /= len(leaves)
+        return self.base_value, contributions
+
+
+def _path_contributions(forest: CompactForest) -> np.ndarray:
+    """
+    Summed per-feature value changes from each node's root down to it.
+
+    Walks all trees level by level: a child inherits its parent's vector
+    and adds value[child] - value[parent] on the parent's split feature.
+
+    Returns:
+        (n_nodes, n_features) float64 array.
+    """
+    value = forest.value.astype(np.float64)
+    contributions = np.zeros((forest.n_nodes, forest.n_features_in_), dtype=np.float64)
+
+    frontier = forest.roots
+    while frontier.size:
+        # Leaves point to themselves
+        internal = frontier[forest.left[frontier] != frontier]
+        split_feature = forest.feature[internal]
+        children = []
+        for child in (forest.left[internal], forest.right[internal]):
+            contributions[child] = contributions[internal]
+            contributions[child, split_feature] += value[child] - value[internal]
+            children.append(child)
+        frontier = np.concatenate(children)
+    return contributions
@@ -0,0 +1,273 @@
+# models/backtest_thresholds.py
+"""
+Backtest the decision-engine thresholds against the labeled dataset.
+
+- Scores the full labeled dataset once with the trained models and caches
+  risk/anomaly scores to models/backtest_scores.npz
+- Sweeps a grid of (SOFT_FRAUD_THRESHOLD, SOFT_ANOMALY_THRESHOLD) pairs, which
+  decide block vs allow, and a grid of (HIGH_FRAUD_THRESHOLD,
+  HIGH_ANOMALY_THRESHOLD) pairs, which decide hard block
+- Every grid point is evaluated in one pass from sorted-score cumulative
+  counts instead of re-applying the rules per combination
+- Writes confusion matrices, block rates and precision/recall for every grid
+  point to models/backtest_soft_grid.csv and models/backtest_hard_grid.csv
+
+The block/allow sweep assumes the high thresholds are at least as strict as
+the soft ones (as in decision_engine), so every HARD_BLOCK is also caught by
+the soft rules and only the soft thresholds decide whether a row is blocked.
+"""
+import argparse
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.train_supervised import load_features_and_labels
+
+
+CSV_PATH = "data/upi_transactions.csv"
+SCORES_CACHE_PATH = "models/backtest_scores.npz"
+SOFT_GRID_PATH = "models/backtest_soft_grid.csv"
+HARD_GRID_PATH = "models/backtest_hard_grid.csv"
+MODEL_PATHS = ("models/fraud_model.pkl", "models/anomaly_model.pkl")
+
+GRID_SIZE = 100
+
+
+# ---------------------------------------------------------------------
+# Scoring (done once, then cached)
+# ---------------------------------------------------------------------
+
+def _cache_key(csv_path: str) -> np.ndarray:
+    """Modification times of the inputs the cached scores depend on."""
+    return np.array(
+        [os.path.getmtime(p) for p in (csv_path, *MODEL_PATHS)], dtype=np.float64
+    )
+
+
+def load_scores(csv_path: str = CSV_PATH, refresh: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Return risk/anomaly scores, rule inputs and labels for every row.
+
+    Scores are read from SCORES_CACHE_PATH when the CSV and model files have
+    not changed since the cache was written; otherwise the dataset is scored
+    with the decision engine and the cache is rewritten.
+    """
+    key = _cache_key(csv_path)
+    if not refresh and os.path.exists(SCORES_CACHE_PATH):
+        cached = np.load(SCORES_CACHE_PATH)
+        if np.array_equal(cached["cache_key"], key):
+            return {name: cached[name] for name in cached.files}
+
+    # Imported lazily: loading the engine loads both models
+    from api.decision_engine import score_features
+
+    features, labels = load_features_and_labels(csv_path)
+    print(f"Scoring {len(features)} transactions...")
+    risk, anomaly = score_features(features)
+
+    scores = {
+        "risk": risk,
+        "anomaly": anomaly,
+        "is_qr": features["is_qr"].to_numpy(dtype=np.int8),
+        "beneficiary_is_new": features["beneficiary_is_new"].to_numpy(dtype=np.int8),
+        "label": labels.to_numpy(dtype=np.int8),
+        "cache_key": key,
+    }
+    np.savez(SCORES_CACHE_PATH, **scores)
+    print(f"Cached scores to '{SCORES_CACHE_PATH}'.")
+    return scores
+
+
+# ---------------------------------------------------------------------
+# Cumulative-count sweep
+# ---------------------------------------------------------------------
+
+def dominance_counts(
+    risk: np.ndarray,
+    anomaly: np.ndarray,
+    fraud_grid: np.ndarray,
+    anomaly_grid: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Count rows flagged by every (fraud, anomaly) threshold pair at once.
+
+    Each row is bucketed by how many sorted grid thresholds it passes, the
+    buckets are histogrammed, and a 2-D cumulative sum turns the histogram
+    into counts for every grid point: O(n log g + g^2) instead of O(n g^2).
+
+    Args:
+        risk: fraud probabilities, one per row
+        anomaly: anomaly scores, one per row (lower = more anomalous)
+        fraud_grid: ascending fraud thresholds (flag when risk >= t)
+        anomaly_grid: ascending anomaly thresholds (flag when anomaly <= t)
+
+    Returns:
+        (both, fraud_only_marginal, anomaly_only_marginal) where
+        both[i, j] = #rows with risk >= fraud_grid[i] and anomaly <= anomaly_grid[j],
+        fraud_only_marginal[i] = #rows with risk >= fraud_grid[i],
+        anomaly_only_marginal[j] = #rows with anomaly <= anomaly_grid[j].
+    """
+    n_f = len(fraud_grid)
+    n_a = len(anomaly_grid)
+
+    # risk >= fraud_grid[i]  <=>  i < r_bucket
+    r_bucket = np.searchsorted(fraud_grid, risk, side="right")
+    # anomaly <= anomaly_grid[j]  <=>  j >= a_bucket
+    a_bucket = np.searchsorted(anomaly_grid, anomaly, side="left")
+
+    hist = np.bincount(
+        r_bucket * (n_a + 1) + a_bucket, minlength=(n_f + 1) * (n_a + 1)
+    ).reshape(n_f + 1, n_a + 1)
+
+    # cum[r, a] = #rows with r_bucket >= r and a_bucket <= a
+    cum = hist[::-1].cumsum(axis=0)[::-1].cumsum(axis=1)
+
+    both = cum[1:, :n_a]
+    fraud_marginal = cum[1:, n_a]
+    anomaly_marginal = cum[0, :n_a]
+    return both, fraud_marginal, anomaly_marginal
+
+
+def _metrics_frame(
+    fraud_grid: np.ndarray,
+    anomaly_grid: np.ndarray,
+    tp: np.ndarray,
+    fp: np.ndarray,
+    positives: int,
+    negatives: int,
+) -> pd.DataFrame:
+    """Flatten per-grid-point counts into a confusion-matrix table."""
+    fn = positives - tp
+    tn = negatives - fp
+    flagged = tp + fp
+    total = positives + negatives
+
+    precision = np.divide(tp, flagged, out=np.zeros(tp.shape), where=flagged > 0)
+    recall = np.divide(tp, positives, out=np.zeros(tp.shape), where=positives > 0)
+
+    f_mesh, a_mesh = np.meshgrid(fraud_grid, anomaly_grid, indexing="ij")
+    return pd.DataFrame({
+        "fraud_threshold": f_mesh.ravel(),
+        "anomaly_threshold": a_mesh.ravel(),
+        "tp": tp.ravel(),
+        "fp": fp.ravel(),
+        "fn": fn.ravel(),
+        "tn": tn.ravel(),
+        "block_rate": (flagged / max(total, 1)).ravel(),
+        "precision": precision.ravel(),
+        "recall": recall.ravel(),
+    })
+
+
+def sweep_soft_thresholds(
+    scores: Dict[str, np.ndarray],
+    fraud_grid: np.ndarray,
+    anomaly_grid: np.ndarray,
+) -> pd.DataFrame:
+    """
+    Block/allow confusion for every (soft fraud, soft anomaly) threshold pair.
+
+    A row is blocked when risk >= fraud threshold OR anomaly <= anomaly
+    threshold; the union is counted as |fraud| + |anomaly| - |both|.
+    """
+    labels = scores["label"].astype(bool)
+    per_class = {}
+    for name, mask in (("pos", labels), ("neg", ~labels)):
+        both, f_marg, a_marg = dominance_counts(
+            scores["risk"][mask], scores["anomaly"][mask], fraud_grid, anomaly_grid
+        )
+        per_class[name] = f_marg[:, None] + a_marg[None, :] - both
+
+    return _metrics_frame(
+        fraud_grid, anomaly_grid,
+        tp=per_class["pos"], fp=per_class["neg"],
+        positives=int(labels.sum()), negatives=int((~labels).sum()),
+    )
+
+
+def sweep_hard_thresholds(
+    scores: Dict[str, np.ndarray],
+    fraud_grid: np.ndarray,
+    anomaly_grid: np.ndarray,
+) -> pd.DataFrame:
+    """
+    Hard-block confusion for every (high fraud, high anomaly) threshold pair.
+
+    A row is hard-blocked when it is a QR payment to a new beneficiary with
+    risk >= fraud threshold AND anomaly <= anomaly threshold.
+    """
+    labels = scores["label"].astype(bool)
+    eligible = (scores["is_qr"] == 1) & (scores["beneficiary_is_new"] == 1)
+    per_class = {}
+    for name, mask in (("pos", labels), ("neg", ~labels)):
+        rows = mask & eligible
+        both, _, _ = dominance_counts(
+            scores["risk"][rows], scores["anomaly"][rows], fraud_grid, anomaly_grid
+        )
+        per_class[name] = both
+
+    return _metrics_frame(
+        fraud_grid, anomaly_grid,
+        tp=per_class["pos"], fp=per_class["neg"],
+        positives=int(labels.sum()), negatives=int((~labels).sum()),
+    )
+
+
+def default_grids(scores: Dict[str, np.ndarray], size: int = GRID_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """Evenly spaced fraud thresholds in (0, 1] and anomaly thresholds over the observed range."""
+    fraud_grid = np.linspace(1.0 / size, 1.0, size)
+    anomaly_grid = np.linspace(scores["anomaly"].min(), scores["anomaly"].max(), size)
+    return fraud_grid, anomaly_grid
+
+
+# ---------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--grid-size", type=int, default=GRID_SIZE)
+    parser.add_argument("--refresh-scores", action="store_true")
+    args = parser.parse_args()
+
+    from api.decision_engine import (
+        HIGH_ANOMALY_THRESHOLD,
+        HIGH_FRAUD_THRESHOLD,
+        SOFT_ANOMALY_THRESHOLD,
+        SOFT_FRAUD_THRESHOLD,
+    )
+
+    scores = load_scores(args.csv, refresh=args.refresh_scores)
+    fraud_grid, anomaly_grid = default_grids(scores, args.grid_size)
+
+    soft = sweep_soft_thresholds(scores, fraud_grid, anomaly_grid)
+    hard = sweep_hard_thresholds(scores, fraud_grid, anomaly_grid)
+    soft.to_csv(SOFT_GRID_PATH, index=False)
+    hard.to_csv(HARD_GRID_PATH, index=False)
+    print(f"Evaluated {len(soft)} soft and {len(hard)} hard grid points "
+          f"over {len(scores['label'])} transactions.")
+
+    current_soft = sweep_soft_thresholds(
+        scores, np.array([SOFT_FRAUD_THRESHOLD]), np.array([SOFT_ANOMALY_THRESHOLD])
+    )
+    current_hard = sweep_hard_thresholds(
+        scores, np.array([HIGH_FRAUD_THRESHOLD]), np.array([HIGH_ANOMALY_THRESHOLD])
+    )
+    print("\nCurrent soft thresholds (block vs allow):")
+    print(current_soft.to_string(index=False))
+    print("\nCurrent high thresholds (hard block):")
+    print(current_hard.to_string(index=False))
+
+    f1 = 2 * soft["precision"] * soft["recall"] / (soft["precision"] + soft["recall"])
+    print("\nTop soft grid points by F1:")
+    print(soft.assign(f1=f1.fillna(0)).nlargest(5, "f1").to_string(index=False))
+
+    print(f"\nSoft grid saved to '{SOFT_GRID_PATH}'.")
+    print(f"Hard grid saved to '{HARD_GRID_PATH}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# models/benchmark_mule_graph.py
+"""
+Benchmark the incremental mule graph at scale (default 10M edges).
+
+- Bulk-inserts synthetic payer -> beneficiary edges through the integer-ID
+  core (beneficiary popularity is heavy-tailed, so some accounts collect
+  large fan-in, as mule accounts do)
+- Times decision-path observe() calls (name lookup + features + update)
+  on top of the loaded graph: p50 / p99 microseconds
+- Times snapshot save / restore and reports snapshot size and peak RSS
+
+Run from the repo root:
+    python -m models.benchmark_mule_graph [--edges 10000000]
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from models.mule_graph import MuleGraph
+
+
+def synthetic_edges(n_edges: int, n_payers: int, n_beneficiaries: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    src = rng.integers(0, n_payers, size=n_edges)
+    # Heavy-tailed beneficiary popularity
+    dst = n_payers + (rng.zipf(1.3, size=n_edges) - 1) % n_beneficiaries
+    return src, dst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark models/mule_graph.py")
+    parser.add_argument("--edges", type=int, default=10_000_000)
+    parser.add_argument("--payers", type=int, default=2_000_000)
+    parser.add_argument("--beneficiaries", type=int, default=500_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"Generating {args.edges:,} edges "
+          f"({args.payers:,} payers, {args.beneficiaries:,} beneficiaries)...")
+    src, dst = synthetic_edges(args.edges, args.payers, args.beneficiaries)
+
+    graph = MuleGraph()
+    graph.add_nodes(args.payers + args.beneficiaries)
+    # One simulated day of traffic
+    ts = np.linspace(0, 86_400, args.edges).tolist()
+
+    start = time.perf_counter()
+    for s, d, t in zip(src.tolist(), dst.tolist(), ts):
+        graph.add_edge_ids(s, d, t)
+    insert_s = time.perf_counter() - start
+    del src, dst, ts
+    print(f"Insert:   {insert_s:.1f} s ({args.edges / insert_s:,.0f} edges/s), "
+          f"{graph.n_edges:,} distinct edges")
+
+    rng = np.random.default_rng(1)
+    payers = [f"payer_{i}" for i in rng.integers(0, args.lookups // 4, size=args.lookups)]
+    beneficiaries = [f"ben_{i}" for i in rng.zipf(1.3, size=args.lookups) % 5_000]
+    latencies = np.empty(args.lookups)
+    for i, (payer, beneficiary) in enumerate(zip(payers, beneficiaries)):
+        t0 = time.perf_counter()
+        graph.observe(payer, beneficiary, ts=86_400.0)
+        latencies[i] = time.perf_counter() - t0
+    latencies_us = latencies * 1e6
+    print(f"Observe:  p50 {np.percentile(latencies_us, 50):.2f} us, "
+          f"p99 {np.percentile(latencies_us, 99):.2f} us over {args.lookups:,} calls")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "mule_graph.npz"
+        start = time.perf_counter()
+        graph.save(path)
+        save_s = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / 2**20
+
+        start = time.perf_counter()
+        restored = MuleGraph.load(path)
+        load_s = time.perf_counter() - start
+
+    assert restored.n_edges == graph.n_edges and restored.n_nodes == graph.n_nodes
+    print(f"Snapshot: save {save_s:.1f} s, restore {load_s:.1f} s, {size_mb:.0f} MB")
+    # ru_maxrss is in kilobytes on Linux
+    print(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# models/benchmark_velocity.py
+"""
+Benchmark the per-user velocity counters at scale (default 2M users).
+
+- Loads one observe() per user (a day of traffic), then times
+  decision-path observe() calls on the loaded state: p50 / p99 microseconds
+- Saves a snapshot while observe() keeps running in the foreground and
+  reports the longest observe() stall during the save
+- Times restore (memory-mapped) and the first observe() calls after it,
+  and reports snapshot size and peak RSS
+
+Run from the repo root:
+    python -m models.benchmark_velocity [--users 2000000]
+"""
+import argparse
+import resource
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from models.velocity import VelocityCounters
+
+
+def timed_observes(counters: VelocityCounters, users, ts: float) -> np.ndarray:
+    latencies = np.empty(len(users))
+    for i, user in enumerate(users):
+        t0 = time.perf_counter()
+        counters.observe(user, ts, (1.0, 100.0))
+        latencies[i] = time.perf_counter() - t0
+    return latencies * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark models/velocity.py")
+    parser.add_argument("--users", type=int, default=2_000_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+
+    counters = VelocityCounters()
+    names = [f"user_{i}" for i in range(args.users)]
+    # One simulated day of traffic
+    ts = np.linspace(0, 86_400, args.users).tolist()
+
+    start = time.perf_counter()
+    for name, t in zip(names, ts):
+        counters.observe(name, t, (1.0, 100.0))
+    load_s = time.perf_counter() - start
+    print(f"Load:     {load_s:.1f} s ({args.users / load_s:,.0f} observes/s), {counters.n_users:,} users")
+
+    rng = np.random.default_rng(0)
+    lookups = [names[i] for i in rng.integers(0, args.users, size=args.lookups)]
+    latencies_us = timed_observes(counters, lookups, 86_400.0)
+    print(f"Observe:  p50 {np.percentile(latencies_us, 50):.2f} us, "
+          f"p99 {np.percentile(latencies_us, 99):.2f} us over {args.lookups:,} calls")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        timings = {}
+
+        def save():
+            t0 = time.perf_counter()
+            counters.save(directory)
+            timings["save_s"] = time.perf_counter() - t0
+
+        saver = threading.Thread(target=save)
+        saver.start()
+        during = []
+        while saver.is_alive():
+            during.append(timed_observes(counters, lookups[:1000], 86_500.0))
+        saver.join()
+        during_us = np.concatenate(during) if during else np.zeros(1)
+        size_mb = sum(p.stat().st_size for p in directory.rglob("*") if p.is_file()) / 2**20
+        print(f"Snapshot: save {timings['save_s']:.1f} s, {size_mb:.0f} MB; "
+              f"{len(during_us):,} observes during save, max stall {during_us.max() / 1000:.1f} ms")
+
+        start = time.perf_counter()
+        restored = VelocityCounters.load(directory)
+        restore_s = time.perf_counter() - start
+        first_us = timed_observes(restored, lookups[:10_000], 86_600.0)
+        assert restored.n_users == counters.n_users
+        print(f"Restore:  {restore_s:.1f} s (memory-mapped); first 10k observes "
+              f"p50 {np.percentile(first_us, 50):.2f} us, p99 {np.percentile(first_us, 99):.2f} us")
+
+    # ru_maxrss is in kilobytes on Linux
+    print(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Flattened, inference-only RandomForest for low-latency scoring.
+
+CompactForest stores every tree of a fitted RandomForestClassifier in a
+handful of contiguous NumPy arrays (feature, float32 threshold, children,
+float32 class-1 probability) and walks all trees for a whole batch at once.
+Sibling leaves that predict the same probability are merged into their
+parent, which shrinks the artifact and shortens paths without changing
+predictions.
+
+Predictions match the source forest's predict_proba: sklearn compares
+float32 inputs against float64 thresholds, so thresholds are rounded
+*down* to float32, which keeps `x <= threshold` exact for float32 x.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+
+class CompactForest:
+    """Inference-only, array-backed form of a binary RandomForestClassifier."""
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features_in_: int,
+        version: str,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features_in_
+        self.version = version
+        self.classes_ = np.array([0, 1])
+
+    # -----------------------------------------------------------------
+    # Construction
+    # -----------------------------------------------------------------
+
+    @classmethod
+    def from_forest(cls, forest, version: str = "compact") -> "CompactForest":
+        """Flatten a fitted binary RandomForestClassifier."""
+        positive = list(forest.classes_).index(1)
+
+        features: List[np.ndarray] = []
+        thresholds: List[np.ndarray] = []
+        lefts: List[np.ndarray] = []
+        rights: List[np.ndarray] = []
+        values: List[np.ndarray] = []
+        roots: List[int] = []
+        max_depth = 0
+        offset = 0
+
+        for estimator in forest.estimators_:
+            feature, threshold, left, right, value, depth = _compact_tree(
+                estimator.tree_, positive
+            )
+            roots.append(offset)
+            features.append(feature)
+            thresholds.append(threshold)
+            # Child indices are tree-local; shift them into the global arrays
+            lefts.append(left + offset)
+            rights.append(right + offset)
+            values.append(value)
+            max_depth = max(max_depth, depth)
+            offset += len(feature)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            n_features_in_=int(forest.n_features_in_),
+            version=version,
+        )
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    # -----------------------------------------------------------------
+    # Inference
+    # -----------------------------------------------------------------
+
+    def apply(self, X) -> np.ndarray:
+        """Return the leaf index reached in every tree, shape (n_trees, n_rows)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[None, :]
+        node = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_proba(self, X) -> np.ndarray:
+        p_fraud = self.value[self.apply(X)].mean(axis=0, dtype=np.float64)
+        return np.column_stack([1.0 - p_fraud, p_fraud])
+
+    def predict(self, X) -> np.ndarray:
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(np.int64)
+
+
+def _compact_tree(tree, positive: int) -> Tuple[np.ndarray, ...]:
+    """
+    Flatten one sklearn tree, merging sibling leaves with equal probability.
+
+    Leaves point to themselves (left == right == own index) so a fixed number
+    of traversal steps can be applied to every row without branching.
+
+    Returns:
+        (feature, threshold, left, right, value, depth) with tree-local indices.
+    """
+    counts = tree.value[:, 0, :]
+    totals = counts.sum(axis=1)
+    proba = np.divide(
+        counts[:, positive], totals, out=np.zeros(len(totals)), where=totals > 0
+    ).astype(np.float32)
+
+    children_left = tree.children_left
+    children_right = tree.children_right
+    is_leaf = children_left == -1
+
+    # Bottom-up merge: node ids are assigned in pre-order, so children always
+    # have larger ids than their parent.
+    for node in range(tree.node_count - 1, -1, -1):
+        if is_leaf[node]:
+            continue
+        lo, hi = children_left[node], children_right[node]
+        if is_leaf[lo] and is_leaf[hi] and proba[lo] == proba[hi]:
+            is_leaf[node] = True
+            proba[node] = proba[lo]
+
+    # Renumber the reachable nodes in pre-order
+    order: List[int] = []
+    depth_of = {0: 0}
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if not is_leaf[node]:
+            for child in (children_right[node], children_left[node]):
+                depth_of[child] = depth_of[node] + 1
+                stack.append(child)
+    new_id = {old: new for new, old in enumerate(order)}
+
+    n = len(order)
+    feature = np.zeros(n, dtype=np.int32)
+    threshold = np.full(n, np.inf, dtype=np.float32)
+    left = np.arange(n, dtype=np.int32)
+    right = np.arange(n, dtype=np.int32)
+    value = np.empty(n, dtype=np.float32)
+
+    for old, new in new_id.items():
+        value[new] = proba[old]
+        if is_leaf[old]:
+            continue
+        feature[new] = tree.feature[old]
+        threshold[new] = _float32_floor(tree.threshold[old])
+        left[new] = new_id[children_left[old]]
+        right[new] = new_id[children_right[old]]
+
+    depth = max(depth_of[old] for old in order)
+    return feature, threshold, left, right, value, depth
+
+
+def _float32_floor(t: float) -> np.float32:
+    """Largest float32 <= t, so float32 comparisons match float64 ones."""
+    t32 = np.float32(t)
+    if float(t32) > t:
+        t32 = np.nextafter(t32, np.float32(-np.inf))
+    return t32
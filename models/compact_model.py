@@ -0,0 +1,172 @@
+# models/compact_model.py
+"""
+Latency-aware compaction of the supervised fraud model.
+
+- Reuses the train/test split from train_supervised
+- Trains smaller RandomForest candidates (fewer estimators, capped depth)
+- Flattens each into a CompactForest (merged duplicate leaves, float32
+  thresholds) and measures ROC-AUC, single-row latency, batch latency and
+  artifact size; the default sklearn forest is measured as the baseline
+- Prints the Pareto table and saves it to models/compaction_pareto.csv
+- Picks the fastest candidate within MAX_AUC_LOSS of the baseline ROC-AUC
+  and saves it to models/fraud_model_compact.pkl
+
+Serve the compact artifact with FRAUDSHIELD_FRAUD_MODEL=fraud_model_compact.pkl.
+"""
+import io
+import time
+from typing import Dict, List
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from models.compact_forest import CompactForest
+from models.train_supervised import load_features_and_labels
+
+
+ESTIMATOR_GRID = (10, 25, 50, 100)
+DEPTH_GRID = (4, 6, 8, 12, None)
+
+# We would rather give up 0.1% AUC than pay for latency
+MAX_AUC_LOSS = 0.001
+
+SINGLE_ROW_REPEATS = 200
+BATCH_ROWS = 10_000
+
+PARETO_PATH = "models/compaction_pareto.csv"
+COMPACT_MODEL_PATH = "models/fraud_model_compact.pkl"
+
+
+# ---------------------------------------------------------------------
+# Measurement helpers
+# ---------------------------------------------------------------------
+
+def artifact_size(model) -> int:
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.getbuffer().nbytes
+
+
+def single_row_latency_ms(model, X: np.ndarray) -> float:
+    """Median wall time of predict_proba on one row."""
+    timings = []
+    for i in range(SINGLE_ROW_REPEATS):
+        row = X[i % len(X)].reshape(1, -1)
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def batch_latency_ms(model, X: np.ndarray) -> float:
+    """Best-of-3 wall time of predict_proba on BATCH_ROWS rows."""
+    batch = np.resize(X, (BATCH_ROWS, X.shape[1]))
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        model.predict_proba(batch)
+        timings.append(time.perf_counter() - start)
+    return float(min(timings) * 1000)
+
+
+def node_count(model) -> int:
+    if isinstance(model, CompactForest):
+        return model.n_nodes
+    return sum(e.tree_.node_count for e in model.estimators_)
+
+
+def measure(name: str, model, X_test: np.ndarray, y_test: np.ndarray) -> Dict:
+    return {
+        "model": name,
+        "roc_auc": float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])),
+        "single_row_ms": single_row_latency_ms(model, X_test),
+        "batch_ms": batch_latency_ms(model, X_test),
+        "size_kb": artifact_size(model) / 1024,
+        "nodes": node_count(model),
+    }
+
+
+def pareto_front(table: pd.DataFrame) -> pd.Series:
+    """True for rows not dominated on (higher AUC, lower latency, smaller size)."""
+    auc = table["roc_auc"].to_numpy()
+    lat = table["single_row_ms"].to_numpy()
+    size = table["size_kb"].to_numpy()
+    optimal = []
+    for i in range(len(table)):
+        dominated = (
+            (auc >= auc[i]) & (lat <= lat[i]) & (size <= size[i])
+            & ((auc > auc[i]) | (lat < lat[i]) | (size < size[i]))
+        )
+        optimal.append(not dominated.any())
+    return pd.Series(optimal, index=table.index)
+
+
+# ---------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------
+
+def main():
+    csv_path = "data/upi_transactions.csv"
+    print(f"Loading features and labels from '{csv_path}'...")
+    X_df, y = load_features_and_labels(csv_path)
+    X = X_df.values.astype(np.float32)
+    y = y.values
+
+    # Same split as train_supervised
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, stratify=y, random_state=42
+    )
+
+    baseline = RandomForestClassifier(class_weight="balanced", random_state=42, n_jobs=-1)
+    baseline.fit(X_train, y_train)
+    rows: List[Dict] = [measure("sklearn-100xfull", baseline, X_test, y_test)]
+    baseline_auc = rows[0]["roc_auc"]
+
+    candidates: Dict[str, CompactForest] = {}
+    for n_estimators in ESTIMATOR_GRID:
+        for max_depth in DEPTH_GRID:
+            clf = RandomForestClassifier(
+                n_estimators=n_estimators,
+                max_depth=max_depth,
+                class_weight="balanced",
+                random_state=42,
+                n_jobs=-1,
+            )
+            clf.fit(X_train, y_train)
+            name = f"compact-{n_estimators}x{max_depth or 'full'}"
+            compact = CompactForest.from_forest(clf, version=name)
+            candidates[name] = compact
+            rows.append(measure(name, compact, X_test, y_test))
+            print(f"  measured {name}")
+
+    table = pd.DataFrame(rows)
+    table["pareto"] = pareto_front(table)
+    table.to_csv(PARETO_PATH, index=False)
+
+    print("\nCompaction results (single-row and batch latency in ms):")
+    print(table.sort_values("single_row_ms").to_string(index=False, float_format="%.4f"))
+
+    eligible = table[
+        table["model"].isin(candidates) & (table["roc_auc"] >= baseline_auc - MAX_AUC_LOSS)
+    ]
+    if eligible.empty:
+        print("\nNo compact candidate within the AUC budget; nothing saved.")
+        return
+
+    chosen = eligible.sort_values(["single_row_ms", "size_kb"]).iloc[0]
+    joblib.dump(candidates[chosen["model"]], COMPACT_MODEL_PATH)
+    print(
+        f"\nChosen: {chosen['model']} (ROC-AUC {chosen['roc_auc']:.4f} vs "
+        f"{baseline_auc:.4f}, {rows[0]['single_row_ms'] / chosen['single_row_ms']:.1f}x "
+        f"faster single-row, {chosen['size_kb']:.0f} KB)"
+    )
+    print(f"Compact model saved to '{COMPACT_MODEL_PATH}'.")
+    print(f"Pareto table saved to '{PARETO_PATH}'.")
+
+
+if __name__ == "__main__":
+    main()
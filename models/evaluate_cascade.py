@@ -0,0 +1,71 @@
+# models/evaluate_cascade.py
+"""
+Offline evaluation of the fast-path decision cascade.
+
+- Loads engineered features and labels and keeps the held-out evaluation
+  split (train_supervised.split_indices; the fast path was calibrated on
+  the other held-out half)
+- Runs the decision engine with and without the fast-path stage
+- Reports the fraction of transactions short-circuited to ALLOW, the fraud
+  recall (blocked frauds / all frauds) of both configurations and the
+  number of decisions that changed
+- Exits non-zero if the fast path short-circuits any transaction the full
+  cascade does not ALLOW (fraud or anomaly blocks alike)
+"""
+import sys
+
+import numpy as np
+
+from models.train_supervised import load_features_and_labels, split_indices
+
+
+def blocked_mask(decisions) -> np.ndarray:
+    return np.array([d["decision"] != "ALLOW" for d in decisions], dtype=bool)
+
+
+def main():
+    # Imported lazily: loading the engine loads all models
+    from api import decision_engine
+
+    if decision_engine._fast_path is None:
+        print("No fast-path model found; run models.train_supervised first.")
+        sys.exit(1)
+
+    csv_path = "data/upi_transactions.csv"
+    print(f"Loading features and labels from '{csv_path}'...")
+    features, labels = load_features_and_labels(csv_path)
+    _, _, eval_idx = split_indices(labels)
+    features = features.iloc[eval_idx]
+    is_fraud = labels.to_numpy()[eval_idx] == 1
+    n_fraud = int(is_fraud.sum())
+
+    full = decision_engine.make_decisions(features, use_fast_path=False)
+    cascade = decision_engine.make_decisions(features, use_fast_path=True)
+
+    full_blocked = blocked_mask(full)
+    cascade_blocked = blocked_mask(cascade)
+    short_circuited = np.array([d["stage"] == "FAST_PATH" for d in cascade])
+    missed_blocks = short_circuited & full_blocked
+    changed = sum(f["decision"] != c["decision"] for f, c in zip(full, cascade))
+
+    full_recall = full_blocked[is_fraud].sum() / max(n_fraud, 1)
+    cascade_recall = cascade_blocked[is_fraud].sum() / max(n_fraud, 1)
+
+    print(f"\nEvaluation split:        {len(features)} ({n_fraud} fraud, "
+          f"{int(full_blocked.sum())} not ALLOW by the full cascade)")
+    print(f"Allow threshold:         {decision_engine._fast_path['allow_threshold']:.4f}")
+    print(f"Short-circuited (ALLOW): {short_circuited.mean():.2%}")
+    print(f"Fraud recall, full:      {full_recall:.4f}")
+    print(f"Fraud recall, cascade:   {cascade_recall:.4f}")
+    print(f"Decisions changed:       {changed}")
+    print(f"Blocks short-circuited:  {int(missed_blocks.sum())}")
+
+    if missed_blocks.any():
+        reasons = sorted({full[i]["reason_code"] for i in np.flatnonzero(missed_blocks)})
+        print(f"\nFAIL: the fast path allows transactions the full cascade blocks ({', '.join(reasons)}).")
+        sys.exit(1)
+    print("\nOK: the fast path short-circuits no non-ALLOW decision.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Feature specification shared by training and serving.
+
+FEATURE_SPEC fixes the model column order and dtype. Training builds its
+DataFrame in this order (models/features.py) and serving fills a
+preallocated float32 NumPy buffer straight from request payloads, so both
+paths hand the models identical columns without building a DataFrame per
+request.
+
+Derivations used by both paths (night hours, new-beneficiary cut-off) live
+here so they cannot drift apart. Graph features come from
+models/mule_graph.py, read before the transaction's own edge is added;
+txn_velocity_24h and the amount moments behind amount_zscore come from
+models/velocity.py, counted after the transaction itself is added.
+"""
+import math
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.mule_graph import COLD_START, GraphFeatures
+
+
+FEATURE_COLUMNS: Tuple[str, ...] = (
+    "amount",
+    "is_qr",
+    "device_changed",
+    "location_velocity",
+    "failed_auth_24h",
+    "amount_zscore",
+    "is_night",
+    "beneficiary_is_new",
+    "txn_velocity_24h",
+    "beneficiary_fan_in",
+    "component_size",
+)
+
+# is_night: txn_hour between 0 and 4, inclusive
+NIGHT_START_HOUR = 0
+NIGHT_END_HOUR = 4
+
+# beneficiary_is_new: beneficiary added less than 10 minutes ago
+NEW_BENEFICIARY_MAX_AGE_MIN = 10
+
+
+def is_night(txn_hour):
+    """Works on scalars, NumPy arrays and pandas Series."""
+    return (txn_hour >= NIGHT_START_HOUR) & (txn_hour <= NIGHT_END_HOUR)
+
+
+def beneficiary_is_new(beneficiary_age_min):
+    """Works on scalars, NumPy arrays and pandas Series."""
+    return beneficiary_age_min < NEW_BENEFICIARY_MAX_AGE_MIN
+
+
+def amount_zscore(amount: float, moments: Optional[Sequence[float]]) -> float:
+    """
+    z-score of `amount` against the user's amount moments (count, mean,
+    M2) including it, with the sample std; 0 with fewer than two amounts,
+    no spread, or no moments (no user).
+    """
+    if moments is None or moments[0] < 2:
+        return 0.0
+    std = math.sqrt(moments[2] / (moments[0] - 1))
+    return (amount - moments[1]) / std if std > 0 else 0.0
+
+
+class FeatureSpec:
+    """Column order, dtype and payload -> feature-row filling."""
+
+    def __init__(self, columns: Sequence[str], dtype=np.float32):
+        self.columns: Tuple[str, ...] = tuple(columns)
+        self.dtype = np.dtype(dtype)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.columns)}
+
+    @property
+    def n_features(self) -> int:
+        return len(self.columns)
+
+    def new_buffer(self, n_rows: int = 1) -> np.ndarray:
+        return np.zeros((n_rows, self.n_features), dtype=self.dtype)
+
+    def fill_row(
+        self,
+        out: np.ndarray,
+        payload: Any,
+        graph: Optional[GraphFeatures] = None,
+        txn_velocity: Optional[float] = None,
+        amount_moments: Optional[Sequence[float]] = None,
+    ) -> np.ndarray:
+        """
+        Write one payload's features into `out` (a 1-D row of a buffer).
+
+        `payload` needs the raw transaction attributes: amount, txn_hour,
+        is_qr, beneficiary_age_min, device_changed, location_velocity and
+        failed_auth_24h. `graph` holds the mule-graph features (cold-start
+        values if None) and `txn_velocity` the user's 24h transaction count
+        including this one (1 if None, i.e. no history). `amount_moments`
+        are the user's amount moments including this one (see
+        amount_zscore; None gives 0, as for a first transaction).
+        """
+        graph = COLD_START if graph is None else graph
+        i = self.index
+        out[i["amount"]] = payload.amount
+        out[i["is_qr"]] = payload.is_qr
+        out[i["device_changed"]] = payload.device_changed
+        out[i["location_velocity"]] = payload.location_velocity
+        out[i["failed_auth_24h"]] = payload.failed_auth_24h
+        out[i["amount_zscore"]] = amount_zscore(payload.amount, amount_moments)
+        out[i["is_night"]] = is_night(payload.txn_hour)
+        out[i["beneficiary_is_new"]] = beneficiary_is_new(payload.beneficiary_age_min)
+        out[i["txn_velocity_24h"]] = 1.0 if txn_velocity is None else txn_velocity
+        out[i["beneficiary_fan_in"]] = graph.beneficiary_fan_in
+        out[i["component_size"]] = graph.component_size
+        return out
+
+    def fill_batch(
+        self,
+        out: np.ndarray,
+        payloads: Sequence[Any],
+        graphs: Optional[Sequence[Optional[GraphFeatures]]] = None,
+        velocities: Optional[Sequence[Optional[float]]] = None,
+        moments: Optional[Sequence[Optional[Sequence[float]]]] = None,
+    ) -> np.ndarray:
+        """Fill the first len(payloads) rows of `out` and return that view."""
+        if len(payloads) > len(out):
+            raise ValueError("buffer has fewer rows than payloads")
+        if graphs is None:
+            graphs = [None] * len(payloads)
+        if velocities is None:
+            velocities = [None] * len(payloads)
+        if moments is None:
+            moments = [None] * len(payloads)
+        for row, payload, graph, velocity, amount_moments in zip(
+            out, payloads, graphs, velocities, moments
+        ):
+            self.fill_row(row, payload, graph, velocity, amount_moments)
+        return out[:len(payloads)]
+
+    def from_frame(self, frame: pd.DataFrame) -> np.ndarray:
+        """Select and order a feature DataFrame's columns into a 2-D array."""
+        return frame.loc[:, list(self.columns)].to_numpy(dtype=self.dtype)
+
+
+FEATURE_SPEC = FeatureSpec(FEATURE_COLUMNS)
@@ -6,9 +6,15 @@ including statistical features, temporal patterns, and behavioral indicators.
 Designed for regulatory compliance and bank risk team review.
 """
 
+from typing import Optional
+
 import pandas as pd
 import numpy as np
 
+from models.feature_spec import FEATURE_SPEC, amount_zscore, beneficiary_is_new, is_night
+from models.mule_graph import COLD_START, MuleGraph
+from models.velocity import VelocityCounters
+
 
 def build_features(csv_path: str) -> pd.DataFrame:
     """
@@ -18,29 +24,45 @@ def build_features(csv_path: str) -> pd.DataFrame:
     for machine learning models. Features include:
     - Statistical anomalies (z-scores)
     - Temporal patterns (night transactions)
-    - Behavioral indicators (new beneficiaries, transaction velocity)
+    - Behavioral indicators (new beneficiaries, 24h transaction velocity)
+    - Mule-network graph features (beneficiary fan-in, component size)
     - Passthrough features from original data
     
     Args:
         csv_path: Path to the CSV file containing transaction data.
                  Expected columns: txn_id, user_id, amount, txn_hour, is_qr,
                  beneficiary_age_min, device_changed, location_velocity,
-                 failed_auth_24h, label
+                 failed_auth_24h, label; optionally beneficiary_id and
+                 timestamp (epoch seconds)
     
     Returns:
-        DataFrame with engineered features, ready for ML training.
+        DataFrame with engineered features, ready for ML training, with
+        columns in FEATURE_SPEC order (the order served to the models).
         Excludes: txn_id, user_id, label (as per requirements)
     """
     # Load the transaction data
     df = pd.read_csv(csv_path)
+
+    # Stateful features are replayed in time order (file order if there
+    # are no timestamps), before sorting, and realigned to CSV rows
+    timestamped = 'timestamp' in df.columns
+    timeline = df.sort_values('timestamp', kind='stable') if timestamped else df
+    graph_features = compute_graph_features(timeline).loc[df.index]
+    velocity = compute_velocity_features(timeline).loc[df.index] if timestamped else None
+    zscore = compute_amount_zscore(timeline).loc[df.index]
     
     # Ensure proper data types
     df['user_id'] = df['user_id'].astype(str)
     df['txn_hour'] = df['txn_hour'].astype(int)
     
-    # Sort by user_id to ensure proper grouping for rolling calculations
-    # Note: In production, you might want to sort by timestamp if available
-    df = df.sort_values('user_id').reset_index(drop=True)
+    # Sort by user_id to ensure proper grouping for rolling calculations.
+    # A stable sort keeps each user's transactions in time (else file) order;
+    # the original row position is kept so the output can be realigned with
+    # the CSV labels.
+    df = df.reset_index(drop=True)
+    df['_row'] = np.arange(len(df))
+    sort_keys = ['user_id', 'timestamp'] if timestamped else 'user_id'
+    df = df.sort_values(sort_keys, kind='stable').reset_index(drop=True)
     
     # Initialize feature DataFrame with passthrough features
     features = pd.DataFrame({
@@ -51,61 +73,122 @@ def build_features(csv_path: str) -> pd.DataFrame:
         'failed_auth_24h': df['failed_auth_24h'].values,
     })
     
-    # Feature 1: amount_zscore (rolling mean/std per user, window=30 transactions)
-    # Group by user_id and compute rolling statistics
-    df['amount_zscore'] = df.groupby('user_id')['amount'].transform(
-        lambda x: _compute_rolling_zscore(x, window=30)
-    )
-    features['amount_zscore'] = df['amount_zscore'].values
-    
     # Feature 2: is_night (1 if txn_hour between 0-4, inclusive)
-    features['is_night'] = ((df['txn_hour'] >= 0) & (df['txn_hour'] <= 4)).astype(int)
+    features['is_night'] = is_night(df['txn_hour']).astype(int)
     
     # Feature 3: beneficiary_is_new (1 if beneficiary_age_min < 10)
-    features['beneficiary_is_new'] = (df['beneficiary_age_min'] < 10).astype(int)
+    features['beneficiary_is_new'] = beneficiary_is_new(df['beneficiary_age_min']).astype(int)
     
     # Feature 4: txn_velocity_24h (count of user transactions in last 24 hours)
-    # Approximated using rolling window of recent transactions
-    # Using window of 30 transactions as approximation for 24-hour activity
-    df['txn_velocity_24h'] = df.groupby('user_id')['amount'].transform(
-        lambda x: x.rolling(window=30, min_periods=1).count()
-    )
-    features['txn_velocity_24h'] = df['txn_velocity_24h'].values
+    # From timestamped sliding-window counters when the CSV has timestamps;
+    # otherwise approximated by a rolling window of the last 30 transactions
+    if velocity is None:
+        df['txn_velocity_24h'] = df.groupby('user_id')['amount'].transform(
+            lambda x: x.rolling(window=30, min_periods=1).count()
+        )
+        features['txn_velocity_24h'] = df['txn_velocity_24h'].values
     
     # Ensure all features are numeric and handle any NaN values
     features = features.fillna(0)
     
-    return features
+    # Restore original CSV row order so rows line up with the 'label' column
+    features.index = df['_row'].values
+    features = features.sort_index()
+    
+    # Features 1, 4 (timestamped) and 5-6: stateful features (already in CSV row order)
+    features['amount_zscore'] = zscore.values
+    if velocity is not None:
+        features['txn_velocity_24h'] = velocity.values
+    features['beneficiary_fan_in'] = graph_features['beneficiary_fan_in'].values
+    features['component_size'] = graph_features['component_size'].values
+    
+    return features[list(FEATURE_SPEC.columns)]
 
 
-def _compute_rolling_zscore(series: pd.Series, window: int = 30) -> pd.Series:
+def compute_graph_features(df: pd.DataFrame, graph: Optional[MuleGraph] = None) -> pd.DataFrame:
     """
-    Compute rolling z-score for a series.
-    
-    Z-score = (value - rolling_mean) / rolling_std
-    
-    Handles edge cases:
-    - If rolling std is zero or missing, z-score is set to 0
-    - Uses min_periods=1 to ensure all values have a result
-    
+    Replay payer -> beneficiary edges in row order through a mule graph.
+
+    Each row gets the beneficiary's fan-in and component size as they were
+    before that row's payment, the same values serving reads at decision
+    time. Rows without a beneficiary_id get the cold-start values. Edges
+    are recorded at the row's timestamp when the CSV has one, so the
+    graph's recent-window counters follow the data, not the replay clock.
+
     Args:
-        series: Input series to compute z-scores for
-        window: Rolling window size (default: 30)
-    
+        df: Raw transactions (user_id, if present beneficiary_id and
+            timestamp epoch seconds)
+        graph: Graph to replay into (a new, empty one by default)
+
     Returns:
-        Series of z-scores
+        DataFrame with beneficiary_fan_in and component_size, aligned to df
     """
-    rolling_mean = series.rolling(window=window, min_periods=1).mean()
-    rolling_std = series.rolling(window=window, min_periods=1).std()
-    
-    # Compute z-score
-    zscore = (series - rolling_mean) / rolling_std
-    
-    # Handle edge cases: if std is zero or missing, set z-score to 0
-    zscore = zscore.fillna(0)
-    zscore = zscore.replace([np.inf, -np.inf], 0)
-    
-    # Additional check: if std is exactly 0, z-score should be 0
-    zscore[rolling_std == 0] = 0
-    
-    return zscore
+    graph = MuleGraph() if graph is None else graph
+    if 'beneficiary_id' not in df.columns:
+        return pd.DataFrame({
+            'beneficiary_fan_in': np.full(len(df), COLD_START.beneficiary_fan_in),
+            'component_size': np.full(len(df), COLD_START.component_size),
+        }, index=df.index)
+
+    fan_in = np.zeros(len(df), dtype=np.int64)
+    component_size = np.ones(len(df), dtype=np.int64)
+    timestamps = df['timestamp'] if 'timestamp' in df.columns else [None] * len(df)
+    rows = zip(df['user_id'].astype(str), df['beneficiary_id'], timestamps)
+    for i, (payer, beneficiary, ts) in enumerate(rows):
+        if pd.isna(beneficiary):
+            continue
+        graph_row = graph.observe(payer, str(beneficiary), ts)
+        fan_in[i] = graph_row.beneficiary_fan_in
+        component_size[i] = graph_row.component_size
+
+    return pd.DataFrame({
+        'beneficiary_fan_in': fan_in,
+        'component_size': component_size,
+    }, index=df.index)
+
+
+def compute_amount_zscore(df: pd.DataFrame, counters: Optional[VelocityCounters] = None) -> pd.Series:
+    """
+    Replay amounts in row order through per-user running amount moments.
+
+    Each row gets the z-score of its amount against the mean and sample
+    std of all the user's amounts so far, including itself (0 for a
+    user's first transaction or when their amounts do not vary): the
+    value serving computes at decision time.
+
+    Args:
+        df: Raw transactions (user_id, amount), in time order
+        counters: Counters to replay into (new, empty ones by default)
+
+    Returns:
+        Series amount_zscore, aligned to df
+    """
+    counters = VelocityCounters() if counters is None else counters
+    zscore = np.zeros(len(df))
+    rows = zip(df['user_id'].astype(str), df['amount'])
+    for i, (user, amount) in enumerate(rows):
+        zscore[i] = amount_zscore(amount, counters.observe_amount(user, amount))
+    return pd.Series(zscore, index=df.index, name='amount_zscore')
+
+
+def compute_velocity_features(df: pd.DataFrame, counters: Optional[VelocityCounters] = None) -> pd.Series:
+    """
+    Replay transactions in row order through per-user velocity counters.
+
+    Each row gets the user's transaction count over the 24h window ending
+    at its timestamp, including itself: the value serving reads at
+    decision time. Rows must be in timestamp order.
+
+    Args:
+        df: Raw transactions (user_id, timestamp, amount)
+        counters: Counters to replay into (new, empty ones by default)
+
+    Returns:
+        Series txn_velocity_24h, aligned to df
+    """
+    counters = VelocityCounters() if counters is None else counters
+    velocity = np.zeros(len(df))
+    rows = zip(df['user_id'].astype(str), df['timestamp'], df['amount'])
+    for i, (user, ts, amount) in enumerate(rows):
+        velocity[i] = counters.observe(user, ts, (1.0, amount))[0]
+    return pd.Series(velocity, index=df.index, name='txn_velocity_24h')
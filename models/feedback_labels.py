@@ -0,0 +1,67 @@
+# models/feedback_labels.py
+"""
+Read analyst feedback labels exported by api/analyst_actions.py.
+
+- Chunks live in data/feedback/ as labels_<utc-timestamp>.npz (or .parquet)
+- Chunk names sort chronologically, so a later chunk's verdict for a
+  transaction supersedes an earlier one
+- Training refits from scratch, so every chunk is read each time
+"""
+import glob
+import os
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+FEEDBACK_DIR = "data/feedback"
+
+
+def iter_feedback_chunks(feedback_dir: str = FEEDBACK_DIR) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Yield (chunk_name, frame) for every chunk, oldest first."""
+    paths = sorted(
+        glob.glob(os.path.join(feedback_dir, "labels_*.npz"))
+        + glob.glob(os.path.join(feedback_dir, "labels_*.parquet")),
+        key=os.path.basename,
+    )
+    for path in paths:
+        name = os.path.basename(path)
+        if path.endswith(".parquet"):
+            frame = pd.read_parquet(path)
+        else:
+            with np.load(path) as chunk:
+                frame = pd.DataFrame(chunk["X"], columns=[str(c) for c in chunk["columns"]])
+                frame["label"] = chunk["y"]
+                frame["txn_id"] = chunk["txn_id"]
+                frame["seq"] = chunk["seq"]
+        yield name, frame
+
+
+def load_feedback_labels(
+    feature_columns: List[str],
+    feedback_dir: str = FEEDBACK_DIR,
+) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Load all feedback labels, one row per transaction (latest verdict).
+
+    Chunks whose columns do not match `feature_columns` are skipped.
+
+    Returns:
+        (features, labels)
+    """
+    frames = []
+    for name, frame in iter_feedback_chunks(feedback_dir):
+        if not set(feature_columns).issubset(frame.columns):
+            print(f"Skipping feedback chunk '{name}': feature columns do not match.")
+            continue
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=feature_columns), pd.Series(dtype=np.int8)
+
+    # Later chunks win for transactions labeled more than once
+    merged = pd.concat(frames, ignore_index=True).drop_duplicates("txn_id", keep="last")
+    return (
+        merged[feature_columns].reset_index(drop=True),
+        merged["label"].reset_index(drop=True),
+    )
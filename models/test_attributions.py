@@ -0,0 +1,37 @@
+"""
+Attribution check: base_value + contributions reproduce the forest's
+fraud probability, row by row and in a batch, for a fitted
+RandomForestClassifier and its CompactForest form.
+"""
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from models.attributions import ForestAttributor
+from models.compact_forest import CompactForest
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(2000, 6)).astype(np.float32)
+y = ((X[:, 0] > 0.5) & (X[:, 2] < 0) | (X[:, 4] > 1.5)).astype(int)
+
+forest = RandomForestClassifier(n_estimators=50, max_depth=8, random_state=0).fit(X, y)
+compact = CompactForest.from_forest(forest)
+
+X_test = rng.normal(size=(500, 6)).astype(np.float32)
+for model in (forest, compact):
+    attributor = ForestAttributor.from_model(model)
+    base_value, contributions = attributor.explain(X_test)
+    assert contributions.shape == (500, 6)
+
+    reconstructed = base_value + contributions.sum(axis=1)
+    expected = model.predict_proba(X_test)[:, 1]
+    assert np.allclose(reconstructed, expected, atol=1e-6), np.abs(reconstructed - expected).max()
+
+    _, single = attributor.explain(X_test[7])
+    assert np.allclose(single[0], contributions[7])
+
+# Features the label does not depend on get (almost) no credit
+mean_abs = np.abs(contributions).mean(axis=0)
+print("Mean |contribution| per feature:", np.round(mean_abs, 4))
+assert mean_abs[[0, 2, 4]].min() > mean_abs[[1, 3, 5]].max()
+
+print("Attributions reconstruct predict_proba")
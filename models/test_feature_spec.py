@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from models.feature_spec import FEATURE_SPEC
+from models.features import build_features
+from models.mule_graph import MuleGraph
+from models.velocity import VelocityCounters
+
+csv_path = "data/upi_transactions.csv"
+raw = pd.read_csv(csv_path)
+df = build_features(csv_path)
+
+# Training and serving must agree on column order
+assert tuple(df.columns) == FEATURE_SPEC.columns, list(df.columns)
+
+# Fill serving rows straight from the raw CSV rows (same fields as the API
+# payload) in time order, observing each payment in a live mule graph and
+# live velocity counters and amount moments as the API does
+timeline = raw.sort_values("timestamp", kind="stable")
+rows = list(timeline.itertuples(index=False))
+graph, counters = MuleGraph(), VelocityCounters()
+graphs = [graph.observe(row.user_id, row.beneficiary_id) for row in rows]
+velocities = [counters.observe(row.user_id, row.timestamp, (1.0, row.amount))[0] for row in rows]
+moments = [counters.observe_amount(row.user_id, row.amount) for row in rows]
+served = np.empty((len(raw), FEATURE_SPEC.n_features), dtype=FEATURE_SPEC.dtype)
+served[timeline.index] = FEATURE_SPEC.fill_batch(
+    FEATURE_SPEC.new_buffer(len(raw)), rows, graphs, velocities, moments
+)
+expected = FEATURE_SPEC.from_frame(df)
+
+# Every feature, stateless and stateful (graph, velocity, amount_zscore),
+# matches on every row
+mismatched = [c for c in FEATURE_SPEC.columns
+              if not np.array_equal(served[:, FEATURE_SPEC.index[c]], expected[:, FEATURE_SPEC.index[c]])]
+assert not mismatched, mismatched
+
+# amount_zscore carries history: it is non-zero beyond cold-start rows
+zscore = served[:, FEATURE_SPEC.index["amount_zscore"]]
+first_txn = np.zeros(len(raw), dtype=bool)
+first_txn[timeline.index[~timeline["user_id"].duplicated().to_numpy()]] = True
+assert not zscore[first_txn].any() and zscore[~first_txn].any()
+
+print(f"Feature spec parity OK on {len(raw)} rows, all {FEATURE_SPEC.n_features} features")
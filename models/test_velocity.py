@@ -0,0 +1,88 @@
+"""
+Velocity counters check: 24h sliding-window counts and sums against a
+brute-force count over raw events, running amount moments against NumPy,
+capacity growth, and a snapshot / restore round trip that keeps counting
+from the restored state.
+"""
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from models.velocity import BUCKET_SECONDS, N_BUCKETS, VelocityCounters, load_velocity_counters
+
+HOUR = 3600
+T0 = 1_704_067_200
+
+
+def brute_force(events, user, ts):
+    """Count / amount of the user's events in the window's hour buckets."""
+    newest = max(b for u, t, _ in events if u == user for b in [t // BUCKET_SECONDS])
+    first = max(ts // BUCKET_SECONDS, newest) - N_BUCKETS + 1
+    window = [a for u, t, a in events if u == user and t // BUCKET_SECONDS >= first]
+    return len(window), sum(window)
+
+
+def main():
+    counters = VelocityCounters(capacity=4)
+
+    # One user: counts within a day, expiry as buckets slide out
+    assert counters.observe("alice", T0, (1.0, 100.0)).tolist() == [1.0, 100.0]
+    assert counters.observe("alice", T0 + 23 * HOUR, (1.0, 50.0)).tolist() == [2.0, 150.0]
+    assert counters.observe("alice", T0 + 24 * HOUR, (1.0, 25.0)).tolist() == [2.0, 75.0]
+    assert counters.window("alice", T0 + 72 * HOUR).tolist() == [0.0, 0.0]
+    assert counters.window("nobody", T0).tolist() == [0.0, 0.0]
+
+    # Random traffic (mostly in time order, some late events) vs brute force
+    rng = np.random.default_rng(0)
+    users = [f"user_{i}" for i in range(50)]
+    events = []
+    ts = T0
+    for _ in range(5000):
+        ts += int(rng.integers(0, 120))
+        event_ts = ts - int(rng.integers(0, 3 * HOUR)) if rng.random() < 0.05 else ts
+        user, amount = users[rng.integers(len(users))], float(rng.integers(1, 500))
+        got = counters.observe(user, event_ts, (1.0, amount))
+        if event_ts // BUCKET_SECONDS > max(
+            (t // BUCKET_SECONDS for u, t, _ in events if u == user), default=-1
+        ) - N_BUCKETS:
+            events.append((user, event_ts, amount))
+        assert tuple(got) == brute_force(events, user, event_ts), (user, event_ts)
+    assert counters.n_users == 51
+
+    # Running amount moments: count, mean and M2 of all the user's amounts
+    amounts = {}
+    for i in range(2000):
+        user, amount = users[i % 7], float(rng.integers(1, 500))
+        amounts.setdefault(user, []).append(amount)
+        count, mean, m2 = counters.observe_amount(user, amount)
+        history = np.array(amounts[user])
+        assert count == len(history)
+        assert np.isclose(mean, history.mean())
+        assert np.isclose(m2, ((history - history.mean()) ** 2).sum())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        for _ in range(3):
+            counters.save(directory)
+        assert len(list(directory.glob("snapshot-*"))) == 2, "old generations are pruned"
+
+        restored = load_velocity_counters(directory)
+        assert restored.n_users == counters.n_users
+        for user in users:
+            assert np.array_equal(restored.window(user, ts), counters.window(user, ts))
+        assert np.array_equal(restored.observe_amount("user_0", 10.0), counters.observe_amount("user_0", 10.0))
+
+        # Restored state keeps counting (copy-on-write) and grows for new users
+        for i in range(200):
+            restored.observe(f"new_{i}", ts, (1.0, 1.0))
+        expected = counters.observe("user_0", ts + 60, (1.0, 5.0))
+        assert np.array_equal(restored.observe("user_0", ts + 60, (1.0, 5.0)), expected)
+        assert load_velocity_counters(directory).n_users == 51, "snapshot files are not modified"
+
+        assert load_velocity_counters(directory / "missing").n_users == 0
+
+    print(f"Velocity counters OK ({len(events)} events, {counters.n_users} users)")
+
+
+main()
@@ -62,9 +62,10 @@ def main():
         raise ValueError("No legitimate (label==0) transactions found for training.")
 
     # Fit IsolationForest on legitimate transactions only
+    # (NumPy in FEATURE_SPEC column order, exactly as rows are served)
     iso = IsolationForest(random_state=42)
     print(f"Fitting IsolationForest on {X_legit.shape[0]} legitimate transactions...")
-    iso.fit(X_legit)
+    iso.fit(X_legit.values)
 
     # Compute anomaly scores for all transactions
     # decision_function: higher means more normal; lower means more anomalous
@@ -0,0 +1,81 @@
+# models/train_drift_reference.py
+"""
+Record reference distributions for the serving drift monitor.
+
+- Loads engineered features via build_features(...)
+- Runs the trained models through the decision engine (same cascade as
+  serving, so risk/anomaly scores are only taken from full-ensemble rows)
+- Fixes histogram bin edges per model feature and for risk_score and
+  anomaly_score (quantile edges for continuous values, value edges for
+  binary/low-cardinality ones)
+- Saves edges and reference counts to models/drift_reference.json
+
+Run after train_supervised and train_anomaly. api/drift_monitor.py compares
+live traffic against these histograms.
+"""
+import json
+from typing import Dict, List
+
+import numpy as np
+
+from models.train_supervised import load_features_and_labels
+
+
+N_BINS = 10
+REFERENCE_PATH = "models/drift_reference.json"
+
+
+def bin_edges(values: np.ndarray, n_bins: int = N_BINS) -> List[float]:
+    """
+    Inner bin edges for a column; bin i holds edges[i-1] <= x < edges[i].
+
+    Low-cardinality columns get one bin per observed value, continuous
+    columns get (up to) n_bins equal-frequency bins.
+    """
+    unique = np.unique(values)
+    if len(unique) <= n_bins:
+        return [float(v) for v in unique[1:]]
+    quantiles = np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])
+    return [float(v) for v in np.unique(quantiles)]
+
+
+def histogram(values: np.ndarray, edges: List[float]) -> List[int]:
+    bins = np.searchsorted(np.asarray(edges), values, side="right")
+    return np.bincount(bins, minlength=len(edges) + 1).tolist()
+
+
+def build_reference(columns: Dict[str, np.ndarray]) -> Dict:
+    reference = {}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)
+        edges = bin_edges(values)
+        reference[name] = {"edges": edges, "counts": histogram(values, edges)}
+    return reference
+
+
+def main():
+    # Imported lazily: loading the engine loads all models
+    from api.decision_engine import make_decisions
+
+    csv_path = "data/upi_transactions.csv"
+    print(f"Loading features from '{csv_path}'...")
+    features, _ = load_features_and_labels(csv_path)
+
+    decisions = make_decisions(features)
+    full = [d for d in decisions if d["stage"] == "FULL"]
+
+    columns = {name: features[name].to_numpy() for name in features.columns}
+    columns["risk_score"] = np.array([d["risk_score"] for d in full])
+    columns["anomaly_score"] = np.array([d["anomaly_score"] for d in full])
+
+    reference = {"n_bins": N_BINS, "columns": build_reference(columns)}
+    with open(REFERENCE_PATH, "w", encoding="utf-8") as f:
+        json.dump(reference, f, indent=2)
+
+    for name, ref in reference["columns"].items():
+        print(f"  {name}: {len(ref['edges']) + 1} bins, {sum(ref['counts'])} rows")
+    print(f"\nDrift reference saved to '{REFERENCE_PATH}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# models/train_mule_graph.py
+"""
+Build the mule-network graph from the labeled transactions.
+
+- Replays payer -> beneficiary edges in time order (as build_features does)
+- Saves a snapshot to models/mule_graph.npz, which the API restores at
+  startup so live graph features continue from the training history
+"""
+import pandas as pd
+
+from models.features import compute_graph_features
+from models.mule_graph import SNAPSHOT_PATH, MuleGraph
+
+
+def main():
+    csv_path = "data/upi_transactions.csv"
+    print(f"Replaying transactions from '{csv_path}'...")
+    df = pd.read_csv(csv_path).sort_values("timestamp", kind="stable")
+
+    graph = MuleGraph()
+    compute_graph_features(df, graph)
+    graph.save(SNAPSHOT_PATH)
+
+    print(f"Graph: {graph.n_nodes} accounts, {graph.n_edges} distinct edges")
+    print(f"Snapshot saved to '{SNAPSHOT_PATH}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,16 @@ Train a supervised RandomForestClassifier for fraud detection.
 
 - Loads engineered features via build_features(...)
 - Loads labels from the original CSV ('label' column)
+- Adds exported analyst feedback labels (data/feedback/) to the training split
 - Trains a RandomForestClassifier with class_weight="balanced"
 - Prints classification report and ROC-AUC
 - Saves trained model to models/fraud_model.pkl
+- Trains a shallow fast-path tree alongside it, calibrated against the
+  full cascade on half of the held-out split (see train_fast_path), and
+  saves it to models/fast_path_model.pkl; models/evaluate_cascade.py
+  checks it on the other half
 """
-from typing import Tuple
+from typing import Any, Dict, Sequence, Tuple
 
 import joblib
 import numpy as np
@@ -16,8 +21,19 @@ import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, roc_auc_score
 from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier
 
 from models.features import build_features
+from models.feedback_labels import load_feedback_labels
+
+
+# Fast-path (cascade stage 1) configuration
+FAST_PATH_MAX_DEPTH = 3
+
+# Held-out split: TEST_SIZE of the rows, stratified; half of it calibrates
+# the fast path, the other half evaluates the cascade
+TEST_SIZE = 0.2
+SPLIT_SEED = 42
 
 
 def load_features_and_labels(csv_path: str) -> Tuple[pd.DataFrame, pd.Series]:
@@ -43,6 +59,58 @@ def load_features_and_labels(csv_path: str) -> Tuple[pd.DataFrame, pd.Series]:
     return features, labels
 
 
+def split_indices(y: Sequence) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Row indices of the training, calibration and evaluation splits.
+
+    The training split is the same stratified (1 - TEST_SIZE) of rows the
+    RandomForest has always been trained on; the held-out rest is halved,
+    stratified, into calibration and evaluation rows.
+    """
+    y = np.asarray(y)
+    rows = np.arange(len(y))
+    train_idx, held_out_idx = train_test_split(
+        rows, test_size=TEST_SIZE, stratify=y, random_state=SPLIT_SEED
+    )
+    cal_idx, eval_idx = train_test_split(
+        held_out_idx, test_size=0.5, stratify=y[held_out_idx], random_state=SPLIT_SEED
+    )
+    return train_idx, cal_idx, eval_idx
+
+
+def train_fast_path(
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_cal: np.ndarray,
+    cal_blocked: np.ndarray,
+) -> Dict[str, Any]:
+    """
+    Train the cheap first stage of the decision cascade.
+
+    A shallow DecisionTree is fitted on the same training split as the
+    RandomForest. The ALLOW threshold is then calibrated on held-out rows
+    against the full cascade's decisions (`cal_blocked`: the full
+    ensemble and rules decided anything but ALLOW, including anomaly
+    blocks): it is the lowest fast-path probability of any such row, so
+    none of them is short-circuited. Rows scoring strictly below the
+    threshold are allowed without running the full ensemble.
+
+    Returns:
+        dict with the fitted tree and allow_threshold.
+    """
+    tree = DecisionTreeClassifier(
+        max_depth=FAST_PATH_MAX_DEPTH, class_weight="balanced", random_state=42
+    )
+    tree.fit(X_train, y_train)
+
+    cal_blocked = np.asarray(cal_blocked, dtype=bool)
+    if not cal_blocked.any():
+        raise ValueError("No non-ALLOW decisions in the calibration split.")
+    allow_threshold = float(tree.predict_proba(X_cal[cal_blocked])[:, 1].min())
+
+    return {"model": tree, "allow_threshold": allow_threshold}
+
+
 def main():
     csv_path = "data/upi_transactions.csv"
     print(f"Loading features and labels from '{csv_path}'...")
@@ -51,10 +119,19 @@ def main():
     X = X_df.values
     y = y.values
 
-    # Train/test split with stratification to preserve class balance
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, stratify=y, random_state=42
-    )
+    # Train/test split with stratification to preserve class balance; the
+    # test split is the calibration and evaluation halves together
+    train_idx, cal_idx, eval_idx = split_indices(y)
+    test_idx = np.sort(np.concatenate([cal_idx, eval_idx]))
+    X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+
+    # Analyst feedback labels join the training split only, so the test
+    # split stays comparable across retrains
+    fb_X, fb_y = load_feedback_labels(list(X_df.columns))
+    if len(fb_X):
+        print(f"Adding {len(fb_X)} analyst feedback labels to the training split.")
+        X_train = np.vstack([X_train, fb_X.values])
+        y_train = np.concatenate([y_train, fb_y.values])
 
     # Initialize RandomForest with balanced class weights
     clf = RandomForestClassifier(class_weight="balanced", random_state=42, n_jobs=-1)
@@ -92,6 +169,26 @@ def main():
     joblib.dump(clf, model_path)
     print(f"Trained model saved to '{model_path}'.")
 
+    # Cascade stage 1: shallow fast-path model, calibrated against the full
+    # cascade. Imported here: the engine loads the model saved above
+    from api.decision_engine import make_decisions
+
+    cal_blocked = np.array([
+        d["decision"] != "ALLOW" for d in make_decisions(X[cal_idx], use_fast_path=False)
+    ])
+    fast_path = train_fast_path(X_train, y_train, X[cal_idx], cal_blocked)
+    short_circuited = np.mean(
+        fast_path["model"].predict_proba(X[eval_idx])[:, 1] < fast_path["allow_threshold"]
+    )
+    print(
+        f"\nFast path: allow_threshold={fast_path['allow_threshold']:.4f} "
+        f"(calibrated on {len(cal_idx)} held-out rows, {int(cal_blocked.sum())} not ALLOW), "
+        f"short-circuits {short_circuited:.1%} of the evaluation split."
+    )
+    fast_path_path = "models/fast_path_model.pkl"
+    joblib.dump(fast_path, fast_path_path)
+    print(f"Fast-path model saved to '{fast_path_path}'.")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,346 @@
+"""
+Per-user sliding-window counters (transaction velocity) and running
+amount moments (amount_zscore).
+
+Each user has, for every metric (default: transaction count and amount
+sum), a ring of N_BUCKETS time buckets of BUCKET_SECONDS each (24 x 1h),
+and the count, mean and sum of squared deviations (Welford) of all their
+amounts so far. All state lives in NumPy arrays indexed by a dense user row:
+- counts       float32 (capacity, n_metrics, n_buckets)
+- last_bucket  int64   (capacity,)  newest absolute bucket written
+- moments      float64 (capacity, 3)  amount count, mean, M2
+
+Buckets are cleared lazily as a user's newest bucket advances, so an
+update is O(1) and a window read sums at most N_BUCKETS slots. Window
+sums are relative to the newest bucket seen for the user (events older
+than the window are ignored). They have bucket granularity: the 24h
+window ends at the current hour bucket.
+
+Snapshots are a directory of raw .npy files (plus UTF-8 user names and a
+small meta.json), named by generation; the CURRENT file names the
+complete one and is replaced atomically. They are streamed to disk in
+chunks of users, so each chunk holds the lock (and the GIL) only briefly
+and scoring is not paused for the whole copy. Restore memory-maps the arrays copy-on-write, so only the
+user-name index is rebuilt at startup and pages load on first touch.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SNAPSHOT_DIR = BASE_DIR / "data" / "velocity"
+
+SNAPSHOT_FORMAT = 2
+# Format 1 snapshots have no amount moments; they restore with empty ones
+SUPPORTED_FORMATS = (1, 2)
+METRICS = ("txn_count", "amount_sum")
+N_BUCKETS = 24
+BUCKET_SECONDS = 3600
+
+# Users copied per lock acquisition while snapshotting
+SNAPSHOT_CHUNK_USERS = 16384
+SNAPSHOTS_KEPT = 2
+
+# No bucket written yet
+_NEVER = np.iinfo(np.int64).min // 2
+
+
+class VelocityCounters:
+    def __init__(
+        self,
+        metrics: Sequence[str] = METRICS,
+        n_buckets: int = N_BUCKETS,
+        bucket_seconds: int = BUCKET_SECONDS,
+        capacity: int = 1024,
+    ):
+        self.metrics = tuple(metrics)
+        self.n_buckets = n_buckets
+        self.bucket_seconds = bucket_seconds
+        self.snapshot_dir: Optional[Path] = None
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # observe() and observe_amount() calls so far, and as of the last snapshot
+        self._updates = 0
+        self._saved_updates = 0
+
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._counts = np.zeros((capacity, len(self.metrics), n_buckets), dtype=np.float32)
+        self._last_bucket = np.full(capacity, _NEVER, dtype=np.int64)
+        self._moments = np.zeros((capacity, 3), dtype=np.float64)
+
+    @property
+    def n_users(self) -> int:
+        return len(self._names)
+
+    @property
+    def window_seconds(self) -> int:
+        return self.n_buckets * self.bucket_seconds
+
+    # -----------------------------------------------------------------
+    # Decision path
+    # -----------------------------------------------------------------
+
+    def observe(self, user: str, ts: Optional[float] = None, values: Sequence[float] = (1.0,)) -> np.ndarray:
+        """
+        Add one event's metric values (in `metrics` order; missing ones
+        are 0) and return the user's window sums including it.
+        """
+        ts = time.time() if ts is None else ts
+        bucket = int(ts // self.bucket_seconds)
+        with self._lock:
+            self._updates += 1
+            row = self._row(user)
+            last = int(self._last_bucket[row])
+            counts = self._counts[row]
+            if bucket > last:
+                # Clear the slots of the buckets skipped since `last`
+                for a, b in self._slots(max(last + 1, bucket - self.n_buckets + 1), bucket):
+                    counts[:, a:b] = 0.0
+                self._last_bucket[row] = last = bucket
+            if bucket > last - self.n_buckets:
+                counts[:len(values), bucket % self.n_buckets] += values
+            return self._window(row, last)
+
+    def observe_amount(self, user: str, amount: float) -> np.ndarray:
+        """
+        Add one amount to the user's running moments and return
+        (count, mean, M2) including it; independent of event time.
+        """
+        with self._lock:
+            self._updates += 1
+            moments = self._moments[self._row(user)]
+            moments[0] += 1.0
+            delta = amount - moments[1]
+            moments[1] += delta / moments[0]
+            moments[2] += delta * (amount - moments[1])
+            return moments.copy()
+
+    def window(self, user: str, ts: Optional[float] = None) -> np.ndarray:
+        """Read-only window sums for a user (zeros if unknown)."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            row = self._ids.get(user)
+            if row is None:
+                return np.zeros(len(self.metrics))
+            return self._window(row, int(ts // self.bucket_seconds))
+
+    def stats(self, user: str) -> Optional[Dict[str, float]]:
+        """Window sums by metric name, or None for an unknown user."""
+        if user not in self._ids:
+            return None
+        return dict(zip(self.metrics, self.window(user).tolist()))
+
+    def _row(self, user: str) -> int:
+        row = self._ids.get(user)
+        if row is None:
+            row = len(self._names)
+            if row == len(self._last_bucket):
+                self._grow(2 * row)
+            self._ids[user] = row
+            self._names.append(user)
+        return row
+
+    def _grow(self, capacity: int) -> None:
+        counts = np.zeros((capacity,) + self._counts.shape[1:], dtype=np.float32)
+        counts[:len(self._counts)] = self._counts
+        last_bucket = np.full(capacity, _NEVER, dtype=np.int64)
+        last_bucket[:len(self._last_bucket)] = self._last_bucket
+        moments = np.zeros((capacity, 3), dtype=np.float64)
+        moments[:len(self._moments)] = self._moments
+        self._counts, self._last_bucket, self._moments = counts, last_bucket, moments
+
+    def _slots(self, first: int, last: int):
+        """Ring slices holding absolute buckets first..last (at most two)."""
+        a, b = first % self.n_buckets, last % self.n_buckets + 1
+        if last - first + 1 >= self.n_buckets:
+            return ((0, self.n_buckets),)
+        if a < b:
+            return ((a, b),)
+        return ((a, self.n_buckets), (0, b))
+
+    def _window(self, row: int, bucket: int) -> np.ndarray:
+        last = int(self._last_bucket[row])
+        first = max(bucket, last) - self.n_buckets + 1
+        if last < first:
+            return np.zeros(len(self.metrics))
+        counts = self._counts[row]
+        total = np.zeros(len(self.metrics))
+        for a, b in self._slots(first, last):
+            total += counts[:, a:b].sum(axis=1, dtype=np.float64)
+        return total
+
+    # -----------------------------------------------------------------
+    # Snapshot / restore
+    # -----------------------------------------------------------------
+
+    def save(self, directory: Optional[Path] = None) -> Path:
+        """
+        Write a snapshot generation and point CURRENT at it.
+        Only one snapshot runs at a time; observe() keeps running.
+        """
+        directory = Path(directory or self.snapshot_dir or SNAPSHOT_DIR)
+        with self._snapshot_lock:
+            directory.mkdir(parents=True, exist_ok=True)
+            generation = f"snapshot-{time.time_ns()}"
+            target = directory / generation
+            target.mkdir()
+
+            with self._lock:
+                n_users = len(self._names)
+                capacity = len(self._last_bucket)
+                updates = self._updates
+            shape = (capacity,) + self._counts.shape[1:]
+
+            counts = np.zeros((SNAPSHOT_CHUNK_USERS,) + shape[1:], dtype=np.float32)
+            last_bucket = np.empty(SNAPSHOT_CHUNK_USERS, dtype=np.int64)
+            moments = np.empty((SNAPSHOT_CHUNK_USERS, 3), dtype=np.float64)
+            offsets = np.zeros(n_users + 1, dtype=np.int64)
+            with open(target / "counts.npy", "wb") as counts_file, \
+                    open(target / "last_bucket.npy", "wb") as last_file, \
+                    open(target / "moments.npy", "wb") as moments_file, \
+                    open(target / "names.bin", "wb") as names_file:
+                _write_npy_header(counts_file, np.float32, shape)
+                _write_npy_header(last_file, np.int64, shape[:1])
+                _write_npy_header(moments_file, np.float64, (capacity, 3))
+                for start in range(0, capacity, SNAPSHOT_CHUNK_USERS):
+                    end = min(start + SNAPSHOT_CHUNK_USERS, capacity)
+                    # Rows of users added after n_users was read are written empty
+                    used = max(0, min(end, n_users) - start)
+                    with self._lock:
+                        counts[:used] = self._counts[start:start + used]
+                        last_bucket[:used] = self._last_bucket[start:start + used]
+                        moments[:used] = self._moments[start:start + used]
+                    counts[used:] = 0.0
+                    last_bucket[used:] = _NEVER
+                    moments[used:] = 0.0
+                    counts_file.write(memoryview(counts[:end - start]))
+                    last_file.write(memoryview(last_bucket[:end - start]))
+                    moments_file.write(memoryview(moments[:end - start]))
+
+                    if used:
+                        # The name list is append-only, so no lock is needed
+                        encoded = [name.encode("utf-8") for name in self._names[start:start + used]]
+                        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=used)
+                        offsets[start + 1:start + used + 1] = offsets[start] + np.cumsum(lengths)
+                        names_file.write(b"".join(encoded))
+                for f in (counts_file, last_file, moments_file, names_file):
+                    f.flush()
+                    os.fsync(f.fileno())
+            np.save(target / "name_offsets.npy", offsets)
+            with open(target / "meta.json", "w", encoding="utf-8") as f:
+                json.dump({
+                    "format": SNAPSHOT_FORMAT,
+                    "metrics": list(self.metrics),
+                    "n_buckets": self.n_buckets,
+                    "bucket_seconds": self.bucket_seconds,
+                    "n_users": n_users,
+                }, f)
+
+            tmp_current = directory / "CURRENT.tmp"
+            tmp_current.write_text(generation)
+            tmp_current.replace(directory / "CURRENT")
+            _prune(directory, keep=SNAPSHOTS_KEPT)
+            self._saved_updates = updates
+        return target
+
+    @classmethod
+    def load(cls, directory: Path = SNAPSHOT_DIR) -> "VelocityCounters":
+        """Restore the CURRENT snapshot, memory-mapping the arrays."""
+        directory = Path(directory)
+        target = directory / (directory / "CURRENT").read_text().strip()
+        with open(target / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["format"] not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported velocity snapshot format: {meta['format']}")
+
+        counters = cls(meta["metrics"], meta["n_buckets"], meta["bucket_seconds"], capacity=0)
+        # Copy-on-write: updates stay in memory, the snapshot file is not modified
+        counters._counts = np.load(target / "counts.npy", mmap_mode="c")
+        counters._last_bucket = np.load(target / "last_bucket.npy", mmap_mode="c")
+        if meta["format"] >= 2:
+            counters._moments = np.load(target / "moments.npy", mmap_mode="c")
+        else:
+            counters._moments = np.zeros((len(counters._last_bucket), 3), dtype=np.float64)
+
+        blob = (target / "names.bin").read_bytes()
+        offsets = np.load(target / "name_offsets.npy").tolist()
+        counters._names = [
+            blob[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+        counters._ids = {name: row for row, name in enumerate(counters._names)}
+        counters.snapshot_dir = directory
+        return counters
+
+    def reopen(self, directory: Path) -> None:
+        """
+        Switch to another snapshot directory and restore its state
+        (sharded workers each keep their users' counters in their own).
+        """
+        restored = load_velocity_counters(directory)
+        with self._snapshot_lock, self._lock:
+            self.metrics = restored.metrics
+            self.n_buckets = restored.n_buckets
+            self.bucket_seconds = restored.bucket_seconds
+            self._ids, self._names = restored._ids, restored._names
+            self._counts, self._last_bucket = restored._counts, restored._last_bucket
+            self._moments = restored._moments
+            self._updates = self._saved_updates = 0
+            self.snapshot_dir = restored.snapshot_dir
+
+    def start(self, interval_seconds: float) -> None:
+        """
+        Start the daemon thread that snapshots to snapshot_dir every
+        interval_seconds, skipping intervals without updates.
+        """
+        if self._thread is not None:
+            return
+
+        def _loop():
+            while True:
+                time.sleep(interval_seconds)
+                if self._updates == self._saved_updates:
+                    continue
+                try:
+                    self.save()
+                except Exception:
+                    # Keep serving; the previous snapshot stays CURRENT
+                    pass
+
+        self._thread = threading.Thread(target=_loop, name="velocity-snapshot", daemon=True)
+        self._thread.start()
+
+
+def _write_npy_header(f, dtype, shape) -> None:
+    """Start an .npy file whose data is then streamed in C order."""
+    np.lib.format.write_array_header_1_0(f, {
+        "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+        "fortran_order": False,
+        "shape": tuple(shape),
+    })
+
+
+def _prune(directory: Path, keep: int) -> None:
+    """Remove all but the newest `keep` snapshot generations."""
+    generations = sorted(p for p in directory.glob("snapshot-*") if p.is_dir())
+    current = (directory / "CURRENT").read_text().strip()
+    for path in generations[:-keep]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_velocity_counters(directory: Path = SNAPSHOT_DIR) -> VelocityCounters:
+    """Restore the snapshot if there is one, else start empty."""
+    directory = Path(directory)
+    if (directory / "CURRENT").exists():
+        return VelocityCounters.load(directory)
+    counters = VelocityCounters()
+    counters.snapshot_dir = directory
+    return counters
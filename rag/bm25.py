@@ -0,0 +1,102 @@
+"""Inverted-index BM25 retriever over the indexed knowledge chunks.
+
+Postings are built by rag/sentences.py alongside the sentence artifacts
+(same vocabulary, same chunk order as the FAISS index) and stored as
+memory-mappable .npy files:
+
+- bm25_offsets.npy   postings range of each vocab term (n_terms + 1)
+- bm25_docs.npy      chunk ids, grouped by term
+- bm25_weights.npy   precomputed BM25 term weight of each posting
+
+Scoring a query is a sum of its terms' posting weights per chunk, so the
+query path needs only NumPy: no torch and no encoder model.
+"""
+from __future__ import annotations
+
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+# Standard BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def bm25_postings(
+    doc_term_ids: Sequence[Sequence[int]],
+    n_terms: int,
+    k1: float = BM25_K1,
+    b: float = BM25_B,
+) -> Dict[str, np.ndarray]:
+    """
+    Build term-grouped postings with precomputed BM25 weights.
+
+    Args:
+        doc_term_ids: per document (chunk), the vocab id of every token
+            occurrence
+        n_terms: vocabulary size
+
+    Returns:
+        {"bm25_offsets", "bm25_docs", "bm25_weights"} arrays.
+    """
+    n_docs = len(doc_term_ids)
+    doc_len = np.array([len(ids) for ids in doc_term_ids], dtype=np.float64)
+    avg_len = doc_len.mean() if n_docs and doc_len.sum() else 1.0
+
+    terms, docs, tfs = [], [], []
+    for doc, ids in enumerate(doc_term_ids):
+        unique, counts = np.unique(np.asarray(ids, dtype=np.int64), return_counts=True)
+        terms.append(unique)
+        docs.append(np.full(len(unique), doc, dtype=np.int64))
+        tfs.append(counts)
+    terms = np.concatenate(terms) if terms else np.zeros(0, dtype=np.int64)
+    docs = np.concatenate(docs) if docs else np.zeros(0, dtype=np.int64)
+    tfs = np.concatenate(tfs).astype(np.float64) if tfs else np.zeros(0)
+
+    df = np.bincount(terms, minlength=n_terms).astype(np.float64)
+    idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+    norm = k1 * (1 - b + b * doc_len[docs] / avg_len)
+    weights = idf[terms] * tfs * (k1 + 1) / (tfs + norm)
+
+    order = np.lexsort((docs, terms))
+    offsets = np.zeros(n_terms + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(df.astype(np.int64))
+    return {
+        "bm25_offsets": offsets,
+        "bm25_docs": docs[order].astype(np.int32),
+        "bm25_weights": weights[order].astype(np.float32),
+    }
+
+
+class BM25Index:
+    """Memory-mapped BM25 postings; vocab must be the artifacts' vocabulary."""
+
+    def __init__(self, directory: str, vocab: Sequence[str], n_docs: int):
+        path = os.path.join(directory, "bm25_offsets.npy")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"BM25 postings not found in {directory}")
+        self._offsets = np.load(path, mmap_mode="r")
+        self._docs = np.load(os.path.join(directory, "bm25_docs.npy"), mmap_mode="r")
+        self._weights = np.load(os.path.join(directory, "bm25_weights.npy"), mmap_mode="r")
+        self._term_ids: Dict[str, int] = {term: i for i, term in enumerate(vocab)}
+        self.n_docs = n_docs
+
+    def scores(self, query_tokens: Sequence[str]) -> np.ndarray:
+        """BM25 score of every chunk for the (lowercased) query tokens."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for token in query_tokens:
+            term = self._term_ids.get(token.lower())
+            if term is None:
+                continue
+            start, end = self._offsets[term], self._offsets[term + 1]
+            # a term's postings hold each chunk at most once
+            scores[self._docs[start:end]] += self._weights[start:end]
+        return scores
+
+    def top_k(self, query_tokens: Sequence[str], k: int) -> List[int]:
+        """Up to k chunk ids with a positive score, best first (ties by id)."""
+        scores = self.scores(query_tokens)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [int(i) for i in order if scores[i] > 0]
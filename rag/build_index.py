@@ -8,20 +8,23 @@ This script:
 - Builds a FAISS index using cosine similarity (via L2-normalized vectors)
 - Saves:
     - FAISS index to `rag/vector.index`
-    - Text chunks to `rag/chunks.pkl`
+    - Pre-split, PII-scrubbed sentences with token ids, plus BM25
+      postings for the torch-free retriever, to `rag/sentence_index/`
+      (memory-mappable .npy files, see rag/sentences.py and rag/bm25.py)
 
 No LLM calls are made here.
 """
 
 import glob
 import os
-import pickle
 from typing import List
 
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+from rag.sentences import write_sentence_artifacts
+
 
 # ---------------------------------------------------------------------
 # Paths & config
@@ -30,7 +33,7 @@ from sentence_transformers import SentenceTransformer
 BASE_DIR = os.path.dirname(__file__)
 KNOWLEDGE_DIR = os.path.join(BASE_DIR, "knowledge")
 VECTOR_INDEX_PATH = os.path.join(BASE_DIR, "vector.index")
-CHUNKS_PATH = os.path.join(BASE_DIR, "chunks.pkl")
+SENTENCE_INDEX_DIR = os.path.join(BASE_DIR, "sentence_index")
 
 MODEL_NAME = "all-MiniLM-L6-v2"
 MAX_CHARS = 500
@@ -123,14 +126,13 @@ def main() -> None:
 
     index = build_faiss_index(all_chunks)
 
-    # Save index and chunks
+    # Save index and sentence artifacts (same chunk order)
     faiss.write_index(index, VECTOR_INDEX_PATH)
-    with open(CHUNKS_PATH, "wb") as f:
-        pickle.dump(all_chunks, f)
+    n_sentences = write_sentence_artifacts(all_chunks, SENTENCE_INDEX_DIR)
 
-    print(f"✅ Indexed {len(all_chunks)} text chunks")
+    print(f"✅ Indexed {len(all_chunks)} text chunks ({n_sentences} sentences)")
     print(f"📦 FAISS index saved to: {VECTOR_INDEX_PATH}")
-    print(f"📄 Chunks saved to: {CHUNKS_PATH}")
+    print(f"📄 Sentences saved to: {SENTENCE_INDEX_DIR}")
 
 
 if __name__ == "__main__":
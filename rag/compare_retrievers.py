@@ -0,0 +1,152 @@
+"""
+Compare the explainer's retriever backends (embedding, bm25, hybrid).
+
+Each backend runs in its own subprocess (FRAUDSHIELD_RETRIEVER set), so
+startup time and peak RSS reflect only what that backend loads. For every
+reason code the decision engine can emit, the script reports:
+- startup: import + first retrieval (model/index loading), seconds
+- p50 / p95 retrieval latency over repeated calls, milliseconds
+- peak RSS of the process, MB
+- agreement with the embedding backend: top-1 match rate and mean
+  overlap of the top-k chunk sets
+
+Run from the repo root (requires rag/build_index.py to have been run):
+    python -m rag.compare_retrievers [--repeats 200]
+"""
+import argparse
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+DEGRADED_SIGNALS = ("QR", "NEW_BENEFICIARY", "DEVICE_CHANGE", "FAILED_AUTH")
+
+
+def reason_codes() -> List[str]:
+    """Every reason code produced by api/decision_engine.py."""
+    codes = [
+        "QR_NEW_BENEFICIARY_HIGH_FRAUD_HIGH_ANOMALY",
+        "FRAUD_SIGNAL",
+        "ANOMALY_SIGNAL",
+        "FRAUD_SIGNAL_ANOMALY_SIGNAL",
+        "NO_SIGNIFICANT_RISK",
+        "DEGRADED_NO_RULE_SIGNAL",
+    ]
+    for n in range(1, len(DEGRADED_SIGNALS) + 1):
+        for signals in itertools.combinations(DEGRADED_SIGNALS, n):
+            codes.append("DEGRADED_" + "_".join(signals))
+    return codes
+
+
+# ---------------------------------------------------------------------
+# Child: measure one backend
+# ---------------------------------------------------------------------
+
+def run_backend(repeats: int) -> Dict:
+    codes = reason_codes()
+
+    start = time.perf_counter()
+    from rag import explainer
+
+    rankings = {code: explainer.retrieve(code) for code in codes}
+    startup_s = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(repeats):
+        for code in codes:
+            t0 = time.perf_counter()
+            explainer.retrieve(code)
+            latencies.append(time.perf_counter() - t0)
+    latencies_ms = np.array(latencies) * 1000
+
+    # ru_maxrss is in kilobytes on Linux
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "startup_s": startup_s,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "peak_rss_mb": rss_mb,
+        "torch_loaded": "torch" in sys.modules,
+        "rankings": rankings,
+    }
+
+
+# ---------------------------------------------------------------------
+# Parent: run all backends and compare
+# ---------------------------------------------------------------------
+
+def measure(backend: str, repeats: int) -> Dict:
+    env = {**os.environ, "FRAUDSHIELD_RETRIEVER": backend}
+    proc = subprocess.run(
+        [sys.executable, "-m", "rag.compare_retrievers", "--child", "--repeats", str(repeats)],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        last_line = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+        return {"error": last_line}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def agreement(baseline: Dict[str, List[int]], other: Dict[str, List[int]], k: int) -> Dict:
+    """
+    Top-1 match rate and mean top-k overlap with the baseline rankings.
+    Overlap is out of the most the baseline could share (min(k, its hits));
+    codes the baseline retrieves nothing for are skipped (NaN if all are).
+    """
+    top1, overlap = [], []
+    for code, expected in baseline.items():
+        if not expected:
+            continue
+        got = other.get(code, [])
+        top1.append(bool(got) and expected[0] == got[0])
+        overlap.append(len(set(expected[:k]) & set(got[:k])) / min(k, len(expected)))
+    if not top1:
+        return {"top1_match": float("nan"), "mean_overlap_at_k": float("nan")}
+    return {"top1_match": float(np.mean(top1)), "mean_overlap_at_k": float(np.mean(overlap))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(args.repeats)))
+        return
+
+    from rag.explainer import RETRIEVERS, TOP_K
+
+    results = {backend: measure(backend, args.repeats) for backend in RETRIEVERS}
+    baseline = results["embedding"].get("rankings")
+
+    print(f"{len(reason_codes())} reason codes, {args.repeats} repeats, top-{TOP_K}\n")
+    header = f"{'backend':<10} {'startup s':>10} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>8} {'torch':>6} {'top-1':>6} {'overlap':>8}"
+    print(header)
+    print("-" * len(header))
+    for backend, result in results.items():
+        if "error" in result:
+            print(f"{backend:<10} unavailable: {result['error']}")
+            continue
+        if baseline is not None:
+            agree = agreement(baseline, result["rankings"], TOP_K)
+            top1, overlap = f"{agree['top1_match']:.2f}", f"{agree['mean_overlap_at_k']:.2f}"
+        else:
+            top1 = overlap = "n/a"
+        print(
+            f"{backend:<10} {result['startup_s']:>10.2f} {result['p50_ms']:>8.3f} "
+            f"{result['p95_ms']:>8.3f} {result['peak_rss_mb']:>8.0f} "
+            f"{str(result['torch_loaded']):>6} {top1:>6} {overlap:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,174 @@
 """Retrieval-augmented explainer for fraud decision reason codes.
 
-This module loads a FAISS index and associated text chunks, converts a
-reason code to a natural-language query, retrieves the top-3 most
-relevant knowledge chunks, scrubs possible PII, and returns a concise,
-deterministic explanation that references behavior patterns (not users).
+This module loads the sentence artifacts written by build_index.py,
+converts a reason code to a natural-language query, retrieves the top-3
+most relevant knowledge chunks, and returns a concise, deterministic
+explanation that references behavior patterns (not users).
+
+Retrieval backend (FRAUDSHIELD_RETRIEVER):
+- "embedding" (default): sentence-transformers query embedding + FAISS
+- "bm25": inverted-index BM25 over the same chunks (rag/bm25.py); needs
+  neither torch nor FAISS, which are then never imported
+- "hybrid": reciprocal rank fusion of the FAISS and BM25 rankings
+
+Callers may pass the decision's top risk features (by attribution, see
+api/decision_engine.py); their plain-language terms are added to the
+query and listed in the explanation.
+
+Sentences are split and scrubbed of possible PII at build time (see
+rag/sentences.py), so the request path only looks up token ids.
 
 No external APIs are used; all work is local and deterministic.
 """
 from __future__ import annotations
 
 import os
-import pickle
 import re
-from typing import List, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
 
-import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from rag.bm25 import BM25Index
+from rag.sentences import SentenceStore
+
+if TYPE_CHECKING:
+    import faiss
+    from sentence_transformers import SentenceTransformer
 
 
 BASE_DIR = os.path.dirname(__file__)
 VECTOR_INDEX_PATH = os.path.join(BASE_DIR, "vector.index")
-CHUNKS_PATH = os.path.join(BASE_DIR, "chunks.pkl")
+SENTENCE_INDEX_DIR = os.path.join(BASE_DIR, "sentence_index")
 MODEL_NAME = "all-MiniLM-L6-v2"
 TOP_K = 3
 
+RETRIEVERS = ("embedding", "bm25", "hybrid")
+RETRIEVER = os.environ.get("FRAUDSHIELD_RETRIEVER", "embedding")
+if RETRIEVER not in RETRIEVERS:
+    raise ValueError(f"FRAUDSHIELD_RETRIEVER must be one of {RETRIEVERS}, got {RETRIEVER!r}")
+
+# Hybrid mode: candidates taken from each ranking, and the reciprocal rank
+# fusion constant (score = sum of 1 / (RRF_K + rank))
+HYBRID_CANDIDATES = 10
+RRF_K = 60
+
+# Plain-language query terms for model feature names (others: name with
+# underscores as spaces)
+FEATURE_TERMS = {
+    "amount_zscore": "unusual transaction amount",
+    "is_night": "night time transaction",
+    "beneficiary_is_new": "new beneficiary",
+    "txn_velocity_24h": "transaction velocity",
+    "is_qr": "QR code payment",
+    "device_changed": "device change",
+    "location_velocity": "location change",
+    "failed_auth_24h": "failed authentication attempts",
+    "beneficiary_fan_in": "beneficiary receiving from many payers",
+    "component_size": "mule account network",
+}
+
 
 _model = None
 _index = None
-_chunks: List[str] | None = None
+_sentences: SentenceStore | None = None
+_bm25: BM25Index | None = None
 
 
 def _load_model() -> SentenceTransformer:
     global _model
     if _model is None:
+        from sentence_transformers import SentenceTransformer
+
         _model = SentenceTransformer(MODEL_NAME)
     return _model
 
 
-def _load_index_and_chunks() -> Tuple[faiss.Index, List[str]]:
-    global _index, _chunks
+def _load_index() -> faiss.Index:
+    global _index
     if _index is None:
+        import faiss
+
         if not os.path.exists(VECTOR_INDEX_PATH):
             raise FileNotFoundError(f"Vector index not found at {VECTOR_INDEX_PATH}")
         _index = faiss.read_index(VECTOR_INDEX_PATH)
-    if _chunks is None:
-        if not os.path.exists(CHUNKS_PATH):
-            raise FileNotFoundError(f"Chunks file not found at {CHUNKS_PATH}")
-        with open(CHUNKS_PATH, "rb") as fh:
-            _chunks = pickle.load(fh)
-    return _index, _chunks
+    return _index
+
+
+def _load_sentences() -> SentenceStore:
+    global _sentences
+    if _sentences is None:
+        _sentences = SentenceStore(SENTENCE_INDEX_DIR)
+    return _sentences
+
+
+def _load_bm25() -> BM25Index:
+    global _bm25
+    if _bm25 is None:
+        sentences = _load_sentences()
+        _bm25 = BM25Index(sentences.directory, sentences.vocab, sentences.n_chunks)
+    return _bm25
+
+
+def _feature_term(feature: str) -> str:
+    return FEATURE_TERMS.get(feature, feature.replace("_", " "))
+
+
+@lru_cache(maxsize=1024)
+def _query_for(reason_code: str, top_features: Tuple[str, ...] = ()) -> Tuple[str, Tuple[str, ...]]:
+    """Query text and its tokens, built once per reason code and feature list."""
+    query = _code_to_query(reason_code)
+    if top_features:
+        query += " with " + ", ".join(_feature_term(f) for f in top_features)
+    # deterministic tokenization for extraction
+    return query, tuple(re.findall(r"\w+", query))
+
+
+# ---------------------------------------------------------------------
+# Retrieval
+# ---------------------------------------------------------------------
+
+def _embedding_top_k(query: str, k: int) -> List[int]:
+    import faiss
+
+    qvec = _load_model().encode([query], convert_to_numpy=True)
+    if qvec.dtype != np.float32:
+        qvec = qvec.astype(np.float32)
+    faiss.normalize_L2(qvec)
+
+    distances, indices = _load_index().search(qvec, k)
+    # indices shape: (1, k)
+    return [int(i) for i in indices[0] if i != -1]
+
+
+def _reciprocal_rank_fusion(rankings: Sequence[List[int]], k: int) -> List[int]:
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    # ties broken by chunk id for determinism
+    return sorted(scores, key=lambda c: (-scores[c], c))[:k]
+
+
+def retrieve(
+    reason_code: str,
+    retriever: str = RETRIEVER,
+    k: int = TOP_K,
+    top_features: Sequence[str] = (),
+) -> List[int]:
+    """Ids of the top-k knowledge chunks for a reason code, best first."""
+    query, query_tokens = _query_for(reason_code, tuple(top_features))
+    if retriever == "bm25":
+        return _load_bm25().top_k(query_tokens, k)
+    if retriever == "hybrid":
+        return _reciprocal_rank_fusion(
+            [
+                _embedding_top_k(query, HYBRID_CANDIDATES),
+                _load_bm25().top_k(query_tokens, HYBRID_CANDIDATES),
+            ],
+            k,
+        )
+    return _embedding_top_k(query, k)
 
 
 def _code_to_query(reason_code: str) -> str:
@@ -62,90 +181,55 @@ def _code_to_query(reason_code: str) -> str:
     return f"guidance about {s}"
 
 
-def _scrub_pii(text: str) -> str:
-    # remove email-like tokens
-    text = re.sub(r"\b[\w.%-]+@[\w.-]+\.[A-Za-z]{2,6}\b", "[REDACTED]", text)
-    # redact long digit sequences (accounts, phone numbers, UPIs, etc.)
-    text = re.sub(r"\d{5,}", "[REDACTED]", text)
-    # redact tokens that look like handles with @bank (UPI handles)
-    text = re.sub(r"\b[\w.-]+@[\w.-]+\b", "[REDACTED]", text)
-    return text
-
-
-def _extract_relevant_sentences(chunk: str, query_tokens: List[str], max_sentences: int = 2) -> List[str]:
-    # split on sentence-like boundaries
-    parts = re.split(r"(?<=[.!?])\s+|\n+", chunk)
-    selected: List[str] = []
-    lowered_tokens = {t.lower() for t in query_tokens if t}
-    for part in parts:
-        if not part or len(selected) >= max_sentences:
-            continue
-        low = part.lower()
-        # prefer sentences that contain one of the query tokens
-        if any(token in low for token in lowered_tokens):
-            selected.append(part.strip())
-    # if none matched, fall back to first sentences
-    if not selected:
-        for part in parts:
-            if part.strip():
-                selected.append(part.strip())
-            if len(selected) >= max_sentences:
-                break
-    return selected
-
-
-def explain_decision(reason_code: str) -> str:
+def explain_decision(reason_code: str, top_features: Sequence[str] = ()) -> str:
     """Return a concise, factual explanation for a fraud reason code.
 
     The function is deterministic: the same `reason_code` will always
     yield the same explanation given the same index and chunks.
 
     No decision logic is applied; the output is an explanation assembled
-    from retrieved knowledge chunks and scrubbed of likely PII.
+    from sentences of the retrieved knowledge chunks, scrubbed of likely
+    PII when the index was built.
+
+    Args:
+        reason_code: the decision's reason code
+        top_features: model features that raised the risk most, most
+            important first (optional; narrows retrieval)
     """
     if not reason_code:
         raise ValueError("reason_code must be a non-empty string")
 
-    model = _load_model()
-    index, chunks = _load_index_and_chunks()
+    sentences = _load_sentences()
+    top_features = tuple(top_features)
+    idx_list = retrieve(reason_code, top_features=top_features)
 
-    query = _code_to_query(reason_code)
-    # deterministic tokenization for extraction
-    query_tokens = re.findall(r"\w+", query)
-
-    qvec = model.encode([query], convert_to_numpy=True)
-    if qvec.dtype != np.float32:
-        qvec = qvec.astype(np.float32)
-    faiss.normalize_L2(qvec)
-
-    distances, indices = index.search(qvec, TOP_K)
-    # indices shape: (1, TOP_K)
-    idx_list = [int(i) for i in indices[0] if i != -1]
-
-    retrieved_texts: List[str] = []
-    for idx in idx_list:
-        if 0 <= idx < len(chunks):
-            retrieved_texts.append(chunks[idx])
+    _, query_tokens = _query_for(reason_code, top_features)
+    token_mask = sentences.token_mask(query_tokens)
 
     # build explanation deterministically from top results
     summary_sentences: List[str] = []
-    for chunk in retrieved_texts:
-        sentences = _extract_relevant_sentences(chunk, query_tokens, max_sentences=2)
-        for s in sentences:
-            cleaned = _scrub_pii(s)
+    for idx in idx_list:
+        if not 0 <= idx < sentences.n_chunks:
+            continue
+        for s in sentences.select(idx, token_mask, max_sentences=2):
             # avoid duplicates while preserving order
-            if cleaned and cleaned not in summary_sentences:
-                summary_sentences.append(cleaned)
+            if s not in summary_sentences:
+                summary_sentences.append(s)
 
     if not summary_sentences:
         body = "No relevant guidance found in the knowledge index."
     else:
         body = " ".join(summary_sentences)
 
+    factors = ""
+    if top_features:
+        factors = "Top risk factors: " + ", ".join(_feature_term(f) for f in top_features) + ".\n"
+
     # emphasize behavior patterns rather than individuals
     explanation = (
         f"Explanation for reason code '{reason_code}':\n"
         f"Summary: {body}\n"
+        f"{factors}"
         "Behavior patterns referenced: The retrieved guidance focuses on observable transaction and authentication patterns (for example, anomalous transaction amounts, unusual beneficiary additions, or repeated authentication failures) rather than on any individual or account."
     )
 
@@ -0,0 +1,198 @@
+"""Sentence-level knowledge artifacts for the explainer.
+
+build_index.py splits every indexed chunk into sentences, scrubs likely
+PII from them and records each sentence's set of lowercase word tokens,
+so the request path does no regex work. The artifacts are plain NumPy
+arrays plus a JSON vocabulary (no pickle), and the arrays are opened
+memory-mapped:
+
+- sentence_text.npy            UTF-8 bytes of all sentences, concatenated
+- sentence_offsets.npy         byte offsets into sentence_text (n_sentences + 1)
+- chunk_sentence_offsets.npy   sentence range of each chunk (n_chunks + 1)
+- token_ids.npy                sorted unique vocab ids of each sentence
+- token_offsets.npy            ranges into token_ids (n_sentences + 1)
+- vocab.json                   {"vocab": [...], "n_chunks": ...}
+- bm25_*.npy                   BM25 postings over the same vocab (rag/bm25.py)
+
+A query token matches a sentence when it is a substring of the
+(lowercased) sentence; since tokens are runs of word characters, that is
+the same as being a substring of one of the sentence's words. Each query
+is therefore expanded once over the vocabulary into a boolean mask, and
+matching a sentence is a lookup of its token ids in that mask.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from rag.bm25 import bm25_postings
+
+
+FORMAT_VERSION = 2
+
+# Query token masks kept per store (one vocabulary-size array each), LRU
+MASK_CACHE_SIZE = 1024
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+_TOKEN = re.compile(r"\w+")
+
+
+# ---------------------------------------------------------------------
+# Build-time text processing
+# ---------------------------------------------------------------------
+
+def split_sentences(chunk: str) -> List[str]:
+    """Split on sentence-like boundaries, dropping empty parts."""
+    return [part.strip() for part in _SENTENCE_BOUNDARY.split(chunk) if part.strip()]
+
+
+def scrub_pii(text: str) -> str:
+    # remove email-like tokens
+    text = re.sub(r"\b[\w.%-]+@[\w.-]+\.[A-Za-z]{2,6}\b", "[REDACTED]", text)
+    # redact long digit sequences (accounts, phone numbers, UPIs, etc.)
+    text = re.sub(r"\d{5,}", "[REDACTED]", text)
+    # redact tokens that look like handles with @bank (UPI handles)
+    text = re.sub(r"\b[\w.-]+@[\w.-]+\b", "[REDACTED]", text)
+    return text
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens."""
+    return _TOKEN.findall(text.lower())
+
+
+def write_sentence_artifacts(chunks: Sequence[str], out_dir: str) -> int:
+    """
+    Write the sentence artifacts for `chunks` (in FAISS index order).
+
+    Sentences are scrubbed before tokenizing, so no PII reaches the
+    vocabulary either.
+
+    Returns:
+        number of sentences written.
+    """
+    sentences: List[str] = []
+    chunk_offsets = [0]
+    for chunk in chunks:
+        sentences.extend(scrub_pii(s) for s in split_sentences(chunk))
+        chunk_offsets.append(len(sentences))
+
+    vocab: Dict[str, int] = {}
+    token_ids: List[int] = []
+    token_offsets = [0]
+    # every token occurrence per chunk, for BM25 term frequencies
+    chunk_terms: List[List[int]] = [[] for _ in chunks]
+    chunk_of_sentence = np.repeat(np.arange(len(chunks)), np.diff(chunk_offsets))
+    for sentence, chunk_id in zip(sentences, chunk_of_sentence):
+        occurrences = [vocab.setdefault(token, len(vocab)) for token in tokenize(sentence)]
+        chunk_terms[chunk_id].extend(occurrences)
+        token_ids.extend(sorted(set(occurrences)))
+        token_offsets.append(len(token_ids))
+
+    encoded = [s.encode("utf-8") for s in sentences]
+    sentence_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    sentence_offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = {
+        "sentence_text": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "sentence_offsets": sentence_offsets,
+        "chunk_sentence_offsets": np.array(chunk_offsets, dtype=np.int64),
+        "token_ids": np.array(token_ids, dtype=np.int32),
+        "token_offsets": np.array(token_offsets, dtype=np.int64),
+        **bm25_postings(chunk_terms, len(vocab)),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+    with open(os.path.join(out_dir, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {"format": FORMAT_VERSION, "n_chunks": len(chunks), "vocab": list(vocab)},
+            f,
+            ensure_ascii=False,
+        )
+    return len(sentences)
+
+
+# ---------------------------------------------------------------------
+# Request-time lookup
+# ---------------------------------------------------------------------
+
+class SentenceStore:
+    """Memory-mapped sentence artifacts with cached per-query token masks."""
+
+    def __init__(self, directory: str):
+        meta_path = os.path.join(directory, "vocab.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Sentence artifacts not found in {directory}")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported sentence artifact format: {meta.get('format')}")
+
+        self.directory = directory
+        self.vocab: List[str] = meta["vocab"]
+        self.n_chunks: int = meta["n_chunks"]
+
+        def _load(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        self._text = _load("sentence_text")
+        self._sentence_offsets = _load("sentence_offsets")
+        self._chunk_offsets = _load("chunk_sentence_offsets")
+        self._token_ids = _load("token_ids")
+        self._token_offsets = _load("token_offsets")
+
+        self._masks_lock = threading.Lock()
+        self._masks: "OrderedDict[Tuple[str, ...], np.ndarray]" = OrderedDict()
+
+    def token_mask(self, query_tokens: Sequence[str]) -> np.ndarray:
+        """
+        Boolean mask over the vocabulary: True for words containing any
+        (lowercased) query token. Cached per token tuple, for the
+        MASK_CACHE_SIZE most recently used tuples.
+        """
+        key = tuple(query_tokens)
+        with self._masks_lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+
+        lowered = {t.lower() for t in key if t}
+        mask = np.fromiter(
+            (any(t in word for t in lowered) for word in self.vocab),
+            dtype=bool,
+            count=len(self.vocab),
+        )
+        with self._masks_lock:
+            self._masks[key] = mask
+            while len(self._masks) > MASK_CACHE_SIZE:
+                self._masks.popitem(last=False)
+        return mask
+
+    def sentence(self, i: int) -> str:
+        start, end = self._sentence_offsets[i], self._sentence_offsets[i + 1]
+        return self._text[start:end].tobytes().decode("utf-8")
+
+    def select(self, chunk_id: int, token_mask: np.ndarray, max_sentences: int = 2) -> List[str]:
+        """
+        Up to `max_sentences` of the chunk's sentences that match the
+        token mask, in order; if none match, its first sentences.
+        """
+        first, last = int(self._chunk_offsets[chunk_id]), int(self._chunk_offsets[chunk_id + 1])
+        selected: List[int] = []
+        for i in range(first, last):
+            ids = self._token_ids[self._token_offsets[i]:self._token_offsets[i + 1]]
+            if token_mask[ids].any():
+                selected.append(i)
+                if len(selected) >= max_sentences:
+                    break
+        if not selected:
+            selected = list(range(first, min(last, first + max_sentences)))
+        return [self.sentence(i) for i in selected]
@@ -0,0 +1,31 @@
+import tempfile
+
+from rag.bm25 import BM25Index
+from rag.sentences import SentenceStore, write_sentence_artifacts
+
+chunks = [
+    "Fraudsters add a new beneficiary. Contact them at scam@example.com or 9876543210.\nUnrelated line.",
+    "QR codes can be malicious!  Always verify the payee.",
+]
+out_dir = tempfile.mkdtemp()
+assert write_sentence_artifacts(chunks, out_dir) == 5
+
+store = SentenceStore(out_dir)
+# PII is scrubbed before storage, including from the vocabulary
+assert store.sentence(1) == "Contact them at [REDACTED] or [REDACTED]."
+assert not any("example" in word or "987" in word for word in store.vocab)
+
+# Query tokens match as substrings of sentence words ("benefic" -> "beneficiary")
+mask = store.token_mask(["benefic", "unrelated"])
+assert store.select(0, mask) == ["Fraudsters add a new beneficiary.", "Unrelated line."]
+
+# No match falls back to the chunk's first sentences
+assert store.select(1, mask, max_sentences=1) == ["QR codes can be malicious!"]
+
+# BM25 over the same artifacts ranks by exact terms; no match, no result
+bm25 = BM25Index(out_dir, store.vocab, store.n_chunks)
+assert bm25.top_k(["guidance", "about", "qr", "codes"], 3) == [1]
+assert sorted(bm25.top_k(["beneficiary", "payee"], 3)) == [0, 1]
+assert bm25.top_k(["unknown"], 3) == []
+
+print("Sentence artifacts OK")
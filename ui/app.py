@@ -0,0 +1,293 @@
+"""
+Analyst dashboard for the FraudShield decision service.
+
+Run next to the API (api.main or the sharded api.dispatcher):
+    FRAUDSHIELD_API_URL=http://localhost:8000 uvicorn ui.app:app --port 8501
+
+The page is a single HTML document. Its script talks to the API through
+this app's /api/ passthrough, so the browser sees one origin and the API
+needs no CORS setup. The passthrough forwards only the calls the page
+makes (API_ROUTES); anything else is a 404 here. Polling is incremental:
+- the first screen is one /transactions/page for the selected decision;
+  "Load older" fetches the next page, filtered and paginated server-side
+- every POLL_INTERVAL_MS the page asks /transactions/delta for changes
+  since its seq cursor, with If-None-Match, so an idle queue costs a
+  304 and a busy one costs only the new or changed rows
+- explanations are fetched from /explain only when a row is expanded,
+  then kept client-side
+- analyst actions are posted to /analyst/action; the changed row comes
+  back through the next delta
+"""
+import os
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import HTMLResponse
+
+API_URL = os.environ.get("FRAUDSHIELD_API_URL", "http://localhost:8000").rstrip("/")
+POLL_INTERVAL_MS = int(os.environ.get("FRAUDSHIELD_UI_POLL_MS", "3000"))
+PAGE_SIZE = 50
+
+# Request / response headers passed through to and from the API
+FORWARDED_REQUEST_HEADERS = ("content-type", "if-none-match")
+FORWARDED_RESPONSE_HEADERS = ("content-type", "etag")
+
+# The API calls the dashboard makes: (method, path) pairs
+API_ROUTES = frozenset({
+    ("GET", "transactions/page"),
+    ("GET", "transactions/delta"),
+    ("POST", "explain"),
+    ("POST", "analyst/action"),
+})
+
+app = FastAPI(title="FraudShield Analyst Dashboard")
+
+_client: httpx.AsyncClient = None
+
+
+@app.on_event("startup")
+async def open_client():
+    global _client
+    _client = httpx.AsyncClient(base_url=API_URL, timeout=10.0)
+
+
+@app.on_event("shutdown")
+async def close_client():
+    await _client.aclose()
+
+
+@app.get("/", response_class=HTMLResponse)
+def dashboard() -> str:
+    return (
+        DASHBOARD_HTML
+        .replace("__POLL_INTERVAL_MS__", str(POLL_INTERVAL_MS))
+        .replace("__PAGE_SIZE__", str(PAGE_SIZE))
+    )
+
+
+@app.api_route("/api/{path:path}", methods=["GET", "POST"])
+async def api_passthrough(path: str, request: Request) -> Response:
+    """Forward a dashboard call (one of API_ROUTES) to the decision service."""
+    if (request.method, path) not in API_ROUTES:
+        return Response(status_code=404, content=b"Not a dashboard API route")
+    headers = {k: v for k, v in request.headers.items() if k.lower() in FORWARDED_REQUEST_HEADERS}
+    try:
+        upstream = await _client.request(
+            request.method,
+            f"/{path}",
+            params=request.query_params,
+            content=await request.body(),
+            headers=headers,
+        )
+    except httpx.HTTPError:
+        return Response(status_code=502, content=b"Decision service unreachable")
+    return Response(
+        status_code=upstream.status_code,
+        content=upstream.content,
+        headers={
+            k: v for k, v in upstream.headers.items() if k.lower() in FORWARDED_RESPONSE_HEADERS
+        },
+    )
+
+
+DASHBOARD_HTML = """<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>FraudShield - Analyst Queue</title>
+<style>
+  body { font-family: system-ui, sans-serif; margin: 1.5rem; color: #222; }
+  header { display: flex; gap: 1rem; align-items: center; margin-bottom: 1rem; }
+  h1 { font-size: 1.3rem; margin: 0 1rem 0 0; }
+  #status { color: #777; font-size: 0.85rem; }
+  table { border-collapse: collapse; width: 100%; font-size: 0.9rem; }
+  th, td { text-align: left; padding: 0.35rem 0.6rem; border-bottom: 1px solid #eee; }
+  th { background: #fafafa; }
+  tr.new td { background: #fffbe6; }
+  .badge { padding: 0.1rem 0.45rem; border-radius: 0.3rem; font-size: 0.8rem; color: #fff; }
+  .HARD_BLOCK { background: #c0392b; } .SOFT_BLOCK { background: #e67e22; } .ALLOW { background: #27ae60; }
+  td.explanation { white-space: pre-wrap; background: #f7f9fc; color: #333; }
+  button { font-size: 0.8rem; }
+</style>
+</head>
+<body>
+<header>
+  <h1>Analyst queue</h1>
+  <label>Decision
+    <select id="decision">
+      <option>ALL</option><option>HARD_BLOCK</option><option>SOFT_BLOCK</option><option>ALLOW</option>
+    </select>
+  </label>
+  <span id="status"></span>
+</header>
+<table>
+  <thead><tr>
+    <th>Time (UTC)</th><th>Transaction</th><th>Amount</th><th>Decision</th>
+    <th>Risk</th><th>Reason</th><th>Analyst</th><th></th>
+  </tr></thead>
+  <tbody id="rows"></tbody>
+</table>
+<p><button id="older">Load older</button></p>
+<script>
+const POLL_INTERVAL_MS = __POLL_INTERVAL_MS__;
+const PAGE_SIZE = __PAGE_SIZE__;
+const ACTIONS = ["CONFIRM_FRAUD", "FALSE_POSITIVE", "ESCALATE"];
+
+// Client-held state; cursors are opaque strings from the API
+let decision = "ALL";
+let records = new Map();          // txn_id -> record
+let seq = null;                   // delta cursor
+let etag = null;                  // last delta ETag, sent as If-None-Match
+let nextBefore = null;            // page cursor
+let generation = 0;               // bumped on reload; stale responses are dropped
+const explanations = new Map();   // txn_id -> explanation text
+const expanded = new Set();
+
+const $ = (id) => document.getElementById(id);
+
+async function getJSON(path, headers = {}) {
+  const response = await fetch("/api" + path, { headers });
+  if (response.status === 304) return { notModified: true };
+  if (!response.ok) throw new Error(response.status + " " + path);
+  return { body: await response.json(), etag: response.headers.get("ETag") };
+}
+
+function query(params) {
+  return "?" + new URLSearchParams(
+    Object.entries(params).filter(([, v]) => v !== null && v !== undefined)
+  ).toString();
+}
+
+async function reload() {
+  const mine = ++generation;
+  records = new Map(); seq = null; etag = null; nextBefore = null;
+  const { body } = await getJSON("/transactions/page" + query({ decision, limit: PAGE_SIZE }));
+  if (mine !== generation) return;
+  body.records.forEach((r) => records.set(r.txn_id, r));
+  seq = body.seq; nextBefore = body.next_before;
+  render(new Set());
+}
+
+async function loadOlder() {
+  if (nextBefore === null) return;
+  const mine = generation;
+  const { body } = await getJSON("/transactions/page" + query({ decision, before: nextBefore, limit: PAGE_SIZE }));
+  if (mine !== generation) return;
+  body.records.forEach((r) => { if (!records.has(r.txn_id)) records.set(r.txn_id, r); });
+  nextBefore = body.next_before;
+  render(new Set());
+}
+
+let polling = false;
+
+async function poll() {
+  if (seq === null || polling) return;
+  polling = true;
+  try { await pollDeltas(); } finally { polling = false; }
+}
+
+async function pollDeltas() {
+  const mine = generation;
+  const changed = new Set();
+  let more = true;
+  while (more) {
+    const result = await getJSON(
+      "/transactions/delta" + query({ since: seq, decision }),
+      etag ? { "If-None-Match": etag } : {}
+    );
+    if (mine !== generation) return;
+    if (result.notModified) break;
+    const body = result.body;
+    if (body.reset) return reload();
+    body.records.forEach((r) => { records.set(r.txn_id, r); changed.add(r.txn_id); });
+    seq = body.seq; etag = result.etag; more = body.more;
+  }
+  $("status").textContent = "Updated " + new Date().toLocaleTimeString() +
+    (changed.size ? " - " + changed.size + " new or changed" : "");
+  if (changed.size) render(changed);
+}
+
+async function toggleExplanation(record) {
+  if (expanded.has(record.txn_id)) { expanded.delete(record.txn_id); return render(new Set()); }
+  expanded.add(record.txn_id);
+  if (!explanations.has(record.txn_id)) {
+    explanations.set(record.txn_id, "Loading explanation...");
+    render(new Set());
+    const response = await fetch("/api/explain", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ reason_code: record.reason_code, txn_id: record.txn_id }),
+    });
+    const body = response.ok ? await response.json() : { explanation: "Explanation unavailable." };
+    explanations.set(record.txn_id, body.explanation);
+  }
+  render(new Set());
+}
+
+async function act(record, action) {
+  await fetch("/api/analyst/action", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ txn_id: record.txn_id, action }),
+  });
+  poll();
+}
+
+function cell(text, className) {
+  const td = document.createElement("td");
+  td.textContent = text;
+  if (className) td.className = className;
+  return td;
+}
+
+function render(changed) {
+  const rows = [...records.values()].sort((a, b) => b.timestamp.localeCompare(a.timestamp));
+  const tbody = $("rows");
+  tbody.replaceChildren();
+  for (const r of rows) {
+    const tr = document.createElement("tr");
+    if (changed.has(r.txn_id)) tr.className = "new";
+    tr.append(
+      cell(r.timestamp.replace("T", " ").slice(0, 19)),
+      cell(r.txn_id),
+      cell(Number(r.amount).toLocaleString()),
+    );
+    const badge = document.createElement("span");
+    badge.className = "badge " + r.decision;
+    badge.textContent = r.decision;
+    const decisionCell = cell(""); decisionCell.append(badge);
+    tr.append(decisionCell, cell(r.risk_score.toFixed(3)), cell(r.reason_code), cell(r.analyst_action || ""));
+
+    const actions = cell("");
+    const explain = document.createElement("button");
+    explain.textContent = expanded.has(r.txn_id) ? "Hide" : "Explain";
+    explain.onclick = () => toggleExplanation(r);
+    actions.append(explain);
+    for (const action of ACTIONS) {
+      const button = document.createElement("button");
+      button.textContent = action.replace("_", " ").toLowerCase();
+      button.onclick = () => act(r, action);
+      actions.append(" ", button);
+    }
+    tr.append(actions);
+    tbody.append(tr);
+
+    if (expanded.has(r.txn_id)) {
+      const detail = document.createElement("tr");
+      const td = cell(explanations.get(r.txn_id) || "", "explanation");
+      td.colSpan = 8;
+      detail.append(td);
+      tbody.append(detail);
+    }
+  }
+  $("older").disabled = nextBefore === null;
+}
+
+$("decision").onchange = (e) => { decision = e.target.value; reload(); };
+$("older").onclick = loadOlder;
+
+reload().then(() => setInterval(() => poll().catch(console.error), POLL_INTERVAL_MS));
+</script>
+</body>
+</html>
+"""